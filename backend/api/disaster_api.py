@@ -1,5 +1,8 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from backend.core.data_loader import DATA
+from backend.services.feature_stream import collections_fetcher, paged_features_response, wants_pagination
+from backend.services.field_projection import cache_suffix, project, requested_fields
+from backend.services.response_cache import cached_json_response
 
 disaster_bp = Blueprint("disaster", __name__)
 
@@ -7,37 +10,68 @@ disaster_bp = Blueprint("disaster", __name__)
 @disaster_bp.route("/cyclones", methods=["GET"])
 def get_cyclones():
     try:
-        return jsonify({
-            "status": "success",
-            "lines": DATA.get("cyclone_lines", {}),
-            "points": DATA.get("cyclone_points", {})
-        })
+        fields = requested_fields()
+
+        def build():
+            layers = DATA.snapshot()
+            return {
+                "status": "success",
+                "lines": project(layers.get("cyclone_lines", {}), fields),
+                "points": project(layers.get("cyclone_points", {}), fields)
+            }
+
+        return cached_json_response(
+            "cyclones" + cache_suffix(fields),
+            (DATA.version("cyclone_lines"), DATA.version("cyclone_points")),
+            build,
+        )
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
 
+def _landslides_page(fmt):
+    """Page or stream the features of all landslide files as one sequence."""
+    try:
+        landslides, version = DATA.get_versioned("landslides")
+    except KeyError:
+        landslides, version = [], DATA.version("landslides")
+
+    total, fetch = collections_fetcher(landslides or [])
+    return paged_features_response(total, fetch, version, fmt, requested_fields())
+
+
 @disaster_bp.route("/landslides", methods=["GET"])
 def get_landslides():
-    return jsonify(DATA.get("landslides", []))
+    # ?format=ndjson, ?limit= and ?cursor= flatten the files into one feature sequence
+    fmt = request.args.get("format", "json").lower()
+    if wants_pagination(fmt):
+        return _landslides_page(fmt)
+    return jsonify(project(DATA.get("landslides", []), requested_fields()))
 
 @disaster_bp.route("/api/disaster/landslides", methods=["GET"])
 def get_all_landslides():
+    fmt = request.args.get("format", "json").lower()
+    if wants_pagination(fmt):
+        return _landslides_page(fmt)
+
+    landslides = DATA.get("landslides", [])
     return jsonify({
         "status": "success",
-        "count": len(DATA.get("landslides", [])),
-        "files": DATA.get("landslides", [])
+        "count": len(landslides),
+        "files": project(landslides, requested_fields())
     })
 
 @disaster_bp.route("/statistics", methods=["GET"])
 def get_disaster_statistics():
+    layers = DATA.snapshot()
 
     total_landslides = 0
-    for ls in DATA.get("landslides", []):
+    for ls in layers.get("landslides", []):
         total_landslides += len(ls.get("features", []))
 
     return jsonify({
-        "cyclone_lines": len(DATA.get("cyclone_lines", {}).get("features", [])) if DATA.get("cyclone_lines") else 0,
-        "cyclone_points": len(DATA.get("cyclone_points", {}).get("features", [])) if DATA.get("cyclone_points") else 0,
+        "cyclone_lines": len(layers.get("cyclone_lines", {}).get("features", [])) if layers.get("cyclone_lines") else 0,
+        "cyclone_points": len(layers.get("cyclone_points", {}).get("features", [])) if layers.get("cyclone_points") else 0,
         "landslides": total_landslides
     })
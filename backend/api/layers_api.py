@@ -306,11 +306,51 @@ API endpoints for map layers and spatial data (GeoJSON based, no DB).
 """
 
 from flask import Blueprint, jsonify, current_app, request
-from shapely.geometry import box
 from backend.core.data_loader import DATA
+from backend.core.layer_index import get_layer_index, parse_bbox
+from backend.core.simplification import band_for_zoom, get_pyramid
+from backend.core.topology import get_topology
+from backend.services.feature_stream import paged_features_response, wants_pagination
+from backend.services.field_projection import cache_suffix, project, requested_fields
+from backend.services.response_cache import cached_json_response
+from backend.services.vector_tiles import tile_response, valid_tile
 
 layers_bp = Blueprint("layers", __name__)
 
+EMPTY_COLLECTION = {"type": "FeatureCollection", "features": []}
+
+# ?level= of /boundaries -> layer key
+BOUNDARY_LEVELS = {
+    1: "state",
+    2: "districts",
+    3: "taluks",
+    4: "villages"
+}
+
+# Tile layer of /tiles -> layer keys drawn into it ("boundaries" uses ?level=)
+TILE_LAYERS = {
+    "rivers": ["rivers"],
+    "waters": ["waters_area", "waters_lines"],
+    "coastline": ["coastline"],
+    "hospitals": ["hospitals"],
+    "shelters": ["shelters"],
+    "landslides": ["landslides"],
+    "cyclones": ["cyclone_lines", "cyclone_points"],
+}
+
+
+def _index_boundaries_on_load(key, layer):
+    """
+    Build the spatial index of a boundary level as soon as it is loaded.
+    The topology and simplification pyramid are built on the first
+    request that needs them, so a lazy load does not wait for them.
+    """
+    if key in BOUNDARY_LEVELS.values() and layer is not None:
+        get_layer_index(key)
+
+
+DATA.add_load_hook(_index_boundaries_on_load)
+
 
 @layers_bp.route("/", methods=["GET"])
 def get_all_layers():
@@ -370,23 +410,132 @@ def get_roads_layer():
 
 @layers_bp.route("/boundaries", methods=["GET"])
 def get_boundaries():
-    """Return administrative boundaries based on ?level="""
+    """
+    Return administrative boundaries based on ?level=
+
+    Query Parameters:
+        level (int, optional): 1=state, 2=districts (default), 3=taluks, 4=villages
+        bbox (str, optional): minLon,minLat,maxLon,maxLat; only features
+            intersecting it are returned
+        zoom (int, optional): Map zoom; geometries are simplified for it
+        format (str, optional): geojson (default), topojson or ndjson;
+            topojson returns the whole level with shared borders stored
+            once, ndjson streams one feature per line
+        limit (int, optional): Page size (geojson/ndjson)
+        cursor (str, optional): next_cursor / X-Next-Cursor of the previous page
+        fields (str, optional): Comma-separated properties to keep (empty
+            for geometry only)
+    """
 
     level = request.args.get("level", default=2, type=int)
-
-    key = {
-        1: "state",
-        2: "districts",
-        3: "taluks",
-        4: "villages"
-    }.get(level)
+    key = BOUNDARY_LEVELS.get(level)
 
     if key is None:
         return jsonify({"status": "error", "message": "Invalid level"}), 400
 
-    layer = DATA.get(key)
-    if layer is None:
-        return jsonify({"status": "success", "data": {"type": "FeatureCollection", "features": []}})
-
-    return jsonify({"status": "success", "data": layer})
-
+    fmt = request.args.get("format", "geojson").lower()
+    if fmt not in ("geojson", "topojson", "ndjson"):
+        return jsonify({"status": "error", "message": "Invalid format. Use: geojson, topojson, ndjson"}), 400
+
+    bbox_str = request.args.get("bbox")
+    fields = requested_fields()
+    suffix = cache_suffix(fields)
+
+    if fmt == "topojson":
+        if bbox_str:
+            return jsonify({"status": "error", "message": "bbox is not supported with format=topojson"}), 400
+        return cached_json_response(
+            f"boundaries:{level}:topojson{suffix}",
+            DATA.version(key),
+            lambda: {"status": "success", "data": project(get_topology(key), fields)},
+        )
+
+    if bbox_str:
+        try:
+            bbox = parse_bbox(bbox_str)
+        except ValueError:
+            return jsonify({
+                "status": "error",
+                "message": "Invalid bbox format. Use: minLon,minLat,maxLon,maxLat"
+            }), 400
+
+    band = band_for_zoom(request.args.get("zoom", type=int))
+
+    if wants_pagination(fmt):
+        index = get_layer_index(key)
+        positions = index.query_bbox(*bbox) if bbox_str else None
+        total = len(positions) if positions is not None else len(index)
+        pyramid = get_pyramid(key) if band is not None else None
+
+        def fetch(lo, hi):
+            ids = positions[lo:hi] if positions is not None else range(lo, hi)
+            if pyramid is not None:
+                return pyramid.features_for(band, ids)
+            return [index.features[i] for i in ids]
+
+        return paged_features_response(total, fetch, DATA.version(key), fmt, fields)
+
+    if bbox_str:
+        indices = get_layer_index(key).query_bbox(*bbox)
+        if band is None:
+            features = [get_layer_index(key).features[i] for i in indices]
+        else:
+            features = get_pyramid(key).features_for(band, indices)
+        collection = {"type": "FeatureCollection", "features": features}
+        return jsonify({"status": "success", "data": project(collection, fields)})
+
+    if band is not None:
+        return cached_json_response(
+            f"boundaries:{level}:z{band}{suffix}",
+            DATA.version(key),
+            lambda: {"status": "success", "data": project({
+                "type": "FeatureCollection",
+                "features": get_pyramid(key).features_for(band),
+            }, fields)},
+        )
+
+    # Only a cache miss touches (and possibly loads) the layer itself
+    return cached_json_response(
+        f"boundaries:{level}{suffix}",
+        DATA.version(key),
+        lambda: {"status": "success", "data": project(DATA.get(key) or EMPTY_COLLECTION, fields)},
+    )
+
+
+
+@layers_bp.route("/resident", methods=["GET"])
+def get_resident_layers():
+    """Report which layers this worker holds in memory and their estimated size."""
+    return jsonify({"status": "success", "data": DATA.resident()})
+
+
+@layers_bp.route("/tiles/<layer>/<int:z>/<int:x>/<int:y>.pbf", methods=["GET"])
+def get_tile(layer, z, x, y):
+    """
+    Return one Mapbox Vector Tile of a static layer.
+
+    Path Parameters:
+        layer (str): boundaries, rivers, waters, coastline, hospitals,
+            shelters, landslides or cyclones
+        z, x, y (int): Tile address (XYZ scheme)
+
+    Query Parameters:
+        level (int, optional): Boundary level for layer=boundaries (default 2)
+        fields (str, optional): Comma-separated properties to keep (empty
+            for geometry only)
+    """
+    if layer == "boundaries":
+        level = request.args.get("level", default=2, type=int)
+        key = BOUNDARY_LEVELS.get(level)
+        if key is None:
+            return jsonify({"status": "error", "message": "Invalid level"}), 400
+        name, keys = key, [key]
+    elif layer in TILE_LAYERS:
+        name, keys = layer, TILE_LAYERS[layer]
+    else:
+        return jsonify({"status": "error", "message": f"Unknown tile layer: {layer}"}), 404
+
+    if not valid_tile(z, x, y):
+        return jsonify({"status": "error", "message": "Invalid tile address"}), 400
+
+    return tile_response(name, keys, z, x, y, fields=requested_fields())
@@ -260,17 +260,58 @@
 Routes API Module
 =================
 API endpoints for route calculation and navigation.
+
+Routes are searched on the road graph compiled once from the "roads"
+layer (see road_graph); requests never build a graph of their own. Edges
+closed by hazard zones come precomputed from the hazard overlay.
 """
 
-from flask import Blueprint, jsonify, request
+import numpy as np
+from flask import Blueprint, current_app, jsonify, request
+
+import config
+from backend.core.contraction import get_contraction
+from backend.core.data_loader import DATA
+from backend.core.distance_matrix import MATRIX
+from backend.core.facility_index import get_facility_index
+from backend.core.hazard_overlay import HAZARDS
+from backend.core.road_graph import get_road_graph
+from backend.core.route_cache import ROUTE_CACHE, snap_key
+from backend.core.route_optimizer import find_alternative_routes, find_path, route_along
+from backend.core.route_safety import score_routes
+from backend.services.field_projection import project, requested_fields
 
 routes_bp = Blueprint("routes", __name__)
 
 
+def _compile_graph_on_load(key, layer):
+    """
+    Compile the road graph (with its ALT landmarks for ROUTING_ALGORITHM =
+    'alt') when the roads are (re)loaded, and apply hazard zones when the
+    roads or a hazard layer is, not on the first request. With 'ch' the
+    contraction hierarchy is preprocessed and customized for the current
+    hazards too.
+    """
+    if key != "roads" and key not in HAZARDS.layers:
+        return
+    if not DATA.is_resident("roads"):
+        return
+    graph = get_road_graph()
+    # Layers that are not resident are applied by the first query; loading
+    # them from inside another layer's load could deadlock
+    if all(DATA.is_resident(k) for k in HAZARDS.layers if k in DATA):
+        blocked = HAZARDS.blocked(graph)
+        if config.ROUTING_ALGORITHM == "ch":
+            get_contraction().metric(blocked)
+
+
+DATA.add_load_hook(_compile_graph_on_load)
+
+
 @routes_bp.route("/safe-route", methods=["POST"])
 def calculate_safe_route():
     """
-    Calculate a safe evacuation route (placeholder implementation).
+    Calculate a safe evacuation route on the road network.
 
     Body:
       {
@@ -303,28 +344,220 @@ def calculate_safe_route():
 
         avoid_disasters = data.get("avoid_disaster_zones", True)
 
-        # TODO: plug in real route_optimizer here
-        route = {
-            "path": [
-                [start["lon"], start["lat"]],
-                [start["lon"] + 0.01, start["lat"] + 0.01],
-                [end["lon"], end["lat"]],
-            ],
-            "geometry": {
-                "type": "LineString",
-                "coordinates": [
-                    [start["lon"], start["lat"]],
-                    [start["lon"] + 0.01, start["lat"] + 0.01],
-                    [end["lon"], end["lat"]],
-                ],
-            },
-            "total_distance_km": 15.3,
-            "estimated_time_minutes": 25,
-            "safety_score": 85.5,
-            "avoids_disaster_zones": avoid_disasters,
-        }
-
+        # Read before the graph it describes: a roads change racing this
+        # request can only leave the route under an older stamp
+        roads_version = DATA.version("roads")
+        graph = get_road_graph()
+        if not graph.num_edges:
+            return jsonify({"status": "error", "message": "Road network not loaded"}), 503
+
+        algorithm = current_app.config.get("ROUTING_ALGORITHM", "dijkstra")
+        start_point = (float(start["lon"]), float(start["lat"]))
+        end_point = (float(end["lon"]), float(end["lat"]))
+        # The revision comes with the mask, after pending hazard layer
+        # versions are applied, so a hit never predates a hazard change
+        blocked, revision = HAZARDS.state(graph) if avoid_disasters else (None, 0)
+        stamp = (roads_version, revision)
+
+        # Nearby endpoints on the same roads and hazards share the path
+        # between their edges; the partial first and last edges are cut
+        # at this request's own points
+        start_snap, end_snap = graph.snap(*start_point), graph.snap(*end_point)
+        path = ROUTE_CACHE.route(
+            (algorithm, bool(avoid_disasters)),
+            stamp,
+            snap_key(start_snap, current_app.config["ROUTE_CACHE_SNAP_METRES"]),
+            snap_key(end_snap, current_app.config["ROUTE_CACHE_SNAP_METRES"]),
+            lambda: find_path(
+                graph,
+                start_snap,
+                end_snap,
+                algorithm=algorithm,
+                blocked=blocked if blocked is not None else graph.closed_edges(),
+                hierarchy=get_contraction() if algorithm == "ch" else None,
+            ),
+        )
+        if path is None:
+            return jsonify({"status": "error", "message": "No route found"}), 404
+
+        route = route_along(graph, path, start_snap, end_snap)
+        route["safety_status"] = "safe"
+        route["avoided_disaster_zones"] = 0
+        route["avoids_disaster_zones"] = avoid_disasters
         return jsonify({"status": "success", "data": route}), 200
 
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route("/alternative-routes", methods=["POST"])
+def get_alternative_routes():
+    """
+    Alternative routes between two points, shortest first.
+
+    Body:
+      {
+        "start": {"lat": float, "lon": float},
+        "end": {"lat": float, "lon": float},
+        "num_routes": int (optional, default: 3),
+        "avoid_disaster_zones": bool (optional),
+        "rank_by": "distance" | "safety" (optional, default: distance)
+      }
+
+    Each route carries its safety against the hazard layers (score,
+    closest approach and per-segment exposure), scored in one batch.
+    """
+    try:
+        data = request.get_json(silent=True)
+
+        if not data or "start" not in data or "end" not in data:
+            return jsonify({"status": "error", "message": "Missing start or end coordinates"}), 400
+
+        start = data["start"]
+        end = data["end"]
+
+        if "lat" not in start or "lon" not in start:
+            return jsonify({"status": "error", "message": "Invalid start coords"}), 400
+        if "lat" not in end or "lon" not in end:
+            return jsonify({"status": "error", "message": "Invalid end coords"}), 400
+
+        try:
+            num_routes = int(data.get("num_routes", 3))
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "num_routes must be an integer"}), 400
+        max_routes = current_app.config["ROUTING_ALTERNATIVES_MAX"]
+        if not 1 <= num_routes <= max_routes:
+            return jsonify({"status": "error", "message": f"num_routes must be between 1 and {max_routes}"}), 400
+        rank_by = data.get("rank_by", "distance")
+        if rank_by not in ("distance", "safety"):
+            return jsonify({"status": "error", "message": "rank_by must be 'distance' or 'safety'"}), 400
+
+        graph = get_road_graph()
+        if not graph.num_edges:
+            return jsonify({"status": "error", "message": "Road network not loaded"}), 503
+
+        avoid_disasters = data.get("avoid_disaster_zones", True)
+        routes = find_alternative_routes(
+            graph,
+            (float(start["lon"]), float(start["lat"])),
+            (float(end["lon"]), float(end["lat"])),
+            num_routes=num_routes,
+            blocked=HAZARDS.blocked(graph) if avoid_disasters else graph.closed_edges(),
+            penalty=current_app.config["ROUTING_ALTERNATIVE_PENALTY"],
+            max_overlap=current_app.config["ROUTING_ALTERNATIVE_OVERLAP"],
+        )
+        if not routes:
+            return jsonify({"status": "error", "message": "No route found"}), 404
+
+        for route, safety in zip(routes, score_routes([r["path"] for r in routes], HAZARDS.layers)):
+            route["avoids_disaster_zones"] = avoid_disasters
+            route["safety_score"] = safety["safety_score"]
+            route["safety"] = safety
+        if rank_by == "safety":
+            routes.sort(key=lambda r: (-r["safety_score"], r["safety"]["exposure_m"], r["total_distance_meters"]))
+        return jsonify({"status": "success", "data": routes, "count": len(routes)}), 200
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route("/cache", methods=["GET"])
+def get_route_cache_stats():
+    """Route cache size, hit rate and search time saved."""
+    return jsonify({"status": "success", "data": ROUTE_CACHE.stats()}), 200
+
+
+# Facility layers that can be matrix targets
+MATRIX_LAYERS = ("shelters", "hospitals")
+
+
+def _lonlat(points):
+    """(lons, lats) arrays of [{"lat": .., "lon": ..}, ...]."""
+    lons = np.array([float(p["lon"]) for p in points], dtype=np.float64)
+    lats = np.array([float(p["lat"]) for p in points], dtype=np.float64)
+    return lons, lats
+
+
+@routes_bp.route("/matrix", methods=["POST"])
+def get_distance_matrix():
+    """
+    Road distances from many sources to many targets.
+
+    Body:
+      {
+        "sources": [{"lat": float, "lon": float}, ...],
+        "targets": [{"lat": float, "lon": float}, ...] (optional),
+        "layers": ["shelters", "hospitals"] (optional; their facilities
+                  become targets after the points above),
+        "avoid_disaster_zones": bool (optional)
+      }
+
+    Response data:
+        distance_km (list): One row per source, one column per target
+            (null where unreachable within MAX_ROUTE_DISTANCE)
+        columns (list): {"layer": "points" | layer, "count": n} in column order
+        facilities (dict): Per layer, the target facilities in column order
+            (?fields= applies)
+    """
+    try:
+        data = request.get_json(silent=True)
+        src_lons, src_lats = _lonlat(data["sources"])
+        tgt_lons, tgt_lats = _lonlat(data.get("targets") or [])
+        layers = list(data.get("layers") or [])
+    except Exception:
+        return jsonify({"status": "error", "message": "Invalid input"}), 400
+
+    if not len(src_lons):
+        return jsonify({"status": "error", "message": "At least one source is required"}), 400
+    unknown = [layer for layer in layers if layer not in MATRIX_LAYERS]
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown layer(s): {', '.join(map(str, unknown))}"}), 400
+
+    columns = [{"layer": "points", "count": len(tgt_lons)}] if len(tgt_lons) else []
+    facilities = {}
+    for layer in layers:
+        index = get_facility_index(layer)
+        tgt_lons = np.concatenate([tgt_lons, index.lonlat[:, 0]])
+        tgt_lats = np.concatenate([tgt_lats, index.lonlat[:, 1]])
+        columns.append({"layer": layer, "count": len(index)})
+        facilities[layer] = index
+
+    if not len(tgt_lons):
+        return jsonify({"status": "error", "message": "At least one target is required"}), 400
+    if not (np.all(np.isfinite(src_lons) & np.isfinite(src_lats)) and np.all(np.isfinite(tgt_lons) & np.isfinite(tgt_lats))):
+        return jsonify({"status": "error", "message": "Coordinates must be finite numbers"}), 400
+    max_cells = current_app.config["ROUTING_MATRIX_MAX_CELLS"]
+    if len(src_lons) * len(tgt_lons) > max_cells:
+        return jsonify({"status": "error", "message": f"At most {max_cells} source x target cells per request"}), 400
+
+    try:
+        graph = get_road_graph()
+        if not graph.num_edges:
+            return jsonify({"status": "error", "message": "Road network not loaded"}), 503
+
+        avoid_disasters = data.get("avoid_disaster_zones", True)
+        distances = MATRIX.distances(
+            graph,
+            graph.snap_many(src_lons, src_lats),
+            graph.snap_many(tgt_lons, tgt_lats),
+            blocked=HAZARDS.blocked(graph) if avoid_disasters else graph.closed_edges(),
+            limit=current_app.config["MAX_ROUTE_DISTANCE"],
+        )
+
+        fields = requested_fields()
+        km = np.round(distances.astype(np.float64) / 1000.0, 3).tolist()
+        return jsonify({
+            "status": "success",
+            "data": {
+                "distance_km": [[d if d != float("inf") else None for d in row] for row in km],
+                "columns": columns,
+                "facilities": {
+                    layer: [project(feat, fields) for feat in index.features]
+                    for layer, index in facilities.items()
+                },
+                "avoids_disaster_zones": avoid_disasters,
+            },
+        }), 200
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
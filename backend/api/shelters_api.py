@@ -137,40 +137,45 @@ Shelters API Module (Direct Loading Version)
 Loads GeoJSON from DATA[] which is preloaded at startup.
 """
 
-from flask import Blueprint, jsonify, request
-from shapely.geometry import Point
+import math
+
+import numpy as np
+import shapely
+from flask import Blueprint, current_app, jsonify, request
+from shapely.geometry import shape
 from backend.core.data_loader import DATA   # << Direct access
+from backend.core.facility_index import get_facility_index
+from backend.services.field_projection import cache_suffix, project, requested_fields
+from backend.services.response_cache import cached_json_response
 
 shelters_bp = Blueprint("shelters", __name__)
 
+EMPTY_COLLECTION = {"type": "FeatureCollection", "features": []}
 
-# ---------- Helper: nearest shelters/hospitals ----------
+# Point layers served by the nearest-facility queries
+FACILITY_LAYERS = ("shelters", "hospitals")
 
-def _nearest_features(geojson, lat, lon, limit=5):
-    """Return nearest features from a loaded GeoJSON (DATA[] version)."""
 
-    if not geojson or "features" not in geojson:
-        return {"type": "FeatureCollection", "features": []}
+def _index_facilities_on_load(key, layer):
+    """Build the nearest-neighbour index of a facility layer as soon as it is loaded."""
+    if key in FACILITY_LAYERS and layer is not None:
+        get_facility_index(key)
 
-    pt = Point(lon, lat)
 
-    # Convert GeoJSON → list of features with distance
-    enriched = []
-    for feat in geojson["features"]:
-        geom = feat.get("geometry")
-        if not geom:
-            continue
+DATA.add_load_hook(_index_facilities_on_load)
 
-        try:
-            shp = Point(geom["coordinates"][0], geom["coordinates"][1])
-            dist = shp.distance(pt) * 111.0   # degrees → km
-            enriched.append((dist, feat))
-        except:
-            continue
 
-    # Sort and return top N
-    enriched.sort(key=lambda x: x[0])
-    nearest = [f for (_, f) in enriched[:limit]]
+# ---------- Helper: nearest shelters/hospitals ----------
+
+def _nearest_features(key, lat, lon, limit=5):
+    """
+    Return the nearest features of a facility layer as GeoJSON.
+
+    Each returned feature is a copy whose properties also carry the
+    haversine distance to the query point in "distance_km".
+    """
+    index = get_facility_index(key)
+    nearest = [_with_distance(feat, dist) for feat, dist in index.nearest(lat, lon, limit)]
 
     return {
         "type": "FeatureCollection",
@@ -178,59 +183,212 @@ def _nearest_features(geojson, lat, lon, limit=5):
     }
 
 
-# ---------- API ENDPOINTS ----------
-
-@shelters_bp.route("/all", methods=["GET"])
-def get_all_shelters():
-    """Return ALL shelters from DATA."""
-    shelters = DATA.get("shelters")
-
-    if shelters is None:
-        return jsonify({"status": "success", "data": {"type": "FeatureCollection", "features": []}})
-
-    return jsonify({"status": "success", "data": shelters})
+def _nearest(key):
+    """Nearest features of a facility layer to the posted coordinate."""
+    try:
+        data = request.get_json()
+        lat = float(data["latitude"])
+        lon = float(data["longitude"])
+    except Exception:
+        return jsonify({"status": "error", "message": "Invalid input"}), 400
 
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        return jsonify({"status": "error", "message": "Coordinates must be finite numbers"}), 400
 
-@shelters_bp.route("/hospitals/all", methods=["GET"])
-def get_all_hospitals():
-    """Return ALL hospitals from DATA."""
-    hospitals = DATA.get("hospitals")
+    limit, error = _count(data, "limit")
+    if error:
+        return error
 
-    if hospitals is None:
-        return jsonify({"status": "success", "data": {"type": "FeatureCollection", "features": []}})
+    nearest = _nearest_features(key, lat, lon, limit)
+    return jsonify({"status": "success", "data": project(nearest, requested_fields())})
 
-    return jsonify({"status": "success", "data": hospitals})
 
+def _count(data, name, default=5):
+    """
+    A facility count from the request body: an integer in 1..NEAREST_MAX_K.
 
-@shelters_bp.route("/nearest", methods=["POST"])
-def get_nearest_shelters():
-    """Return nearest shelters to a coordinate."""
+    Returns:
+        tuple: (count, None), or (None, 400 response) for booleans,
+        non-integral or non-numeric values and counts out of range
+    """
+    value = data.get(name, default)
+    try:
+        if isinstance(value, bool) or int(value) != float(value):
+            raise ValueError
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None, (jsonify({"status": "error", "message": f"{name} must be an integer"}), 400)
+    max_k = current_app.config["NEAREST_MAX_K"]
+    if not 1 <= value <= max_k:
+        return None, (jsonify({"status": "error", "message": f"{name} must be between 1 and {max_k}"}), 400)
+    return value, None
+
+
+def _with_distance(feat, dist):
+    """Copy of a feature with "distance_km" added to its properties."""
+    feat = dict(feat)
+    feat["properties"] = {**(feat.get("properties") or {}), "distance_km": round(float(dist), 3)}
+    return feat
+
+
+def _within_radius(key):
+    """Features of a facility layer within ?radius_km of a coordinate."""
     try:
         data = request.get_json()
         lat = float(data["latitude"])
         lon = float(data["longitude"])
-        limit = int(data.get("limit", 5))
-    except:
+        radius = float(data["radius_km"])
+    except Exception:
+        return jsonify({"status": "error", "message": "Invalid input"}), 400
+
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        return jsonify({"status": "error", "message": "Coordinates must be finite numbers"}), 400
+    if not (radius > 0 and math.isfinite(radius)):
+        return jsonify({"status": "error", "message": "radius_km must be a positive finite number"}), 400
+
+    index = get_facility_index(key)
+    indices, distances = index.within_radius(lat, lon, radius)
+    features = [_with_distance(index.features[i], d) for i, d in zip(indices.tolist(), distances.tolist())]
+
+    collection = {"type": "FeatureCollection", "features": features}
+    return jsonify({"status": "success", "count": len(features), "data": project(collection, requested_fields())})
+
+
+def _within_polygon(key):
+    """Features of a facility layer inside a GeoJSON polygon."""
+    try:
+        geom = request.get_json()["polygon"]
+        if geom.get("type") == "Feature":
+            geom = geom["geometry"]
+        polygon = shape(geom)
+    except Exception:
         return jsonify({"status": "error", "message": "Invalid input"}), 400
 
-    geojson = DATA.get("shelters")
-    nearest = _nearest_features(geojson, lat, lon, limit)
+    if polygon.geom_type not in ("Polygon", "MultiPolygon") or polygon.is_empty:
+        return jsonify({"status": "error", "message": "polygon must be a Polygon or MultiPolygon"}), 400
+    if not polygon.is_valid:
+        polygon = shapely.make_valid(polygon)
+
+    index = get_facility_index(key)
+    features = [index.features[i] for i in index.within_polygon(polygon).tolist()]
 
-    return jsonify({"status": "success", "data": nearest})
+    collection = {"type": "FeatureCollection", "features": features}
+    return jsonify({"status": "success", "count": len(features), "data": project(collection, requested_fields())})
+
+
+
+@shelters_bp.route("/all", methods=["GET"])
+def get_all_shelters():
+    """Return ALL shelters from DATA (?fields= keeps only those properties)."""
+    fields = requested_fields()
+    # Only a cache miss touches (and possibly loads) the layer itself
+    return cached_json_response(
+        "shelters:all" + cache_suffix(fields),
+        DATA.version("shelters"),
+        lambda: {"status": "success", "data": project(DATA.get("shelters") or EMPTY_COLLECTION, fields)},
+    )
+
+
+@shelters_bp.route("/hospitals/all", methods=["GET"])
+def get_all_hospitals():
+    """Return ALL hospitals from DATA (?fields= keeps only those properties)."""
+    fields = requested_fields()
+    # Only a cache miss touches (and possibly loads) the layer itself
+    return cached_json_response(
+        "hospitals:all" + cache_suffix(fields),
+        DATA.version("hospitals"),
+        lambda: {"status": "success", "data": project(DATA.get("hospitals") or EMPTY_COLLECTION, fields)},
+    )
+
+
+@shelters_bp.route("/nearest", methods=["POST"])
+def get_nearest_shelters():
+    """Return nearest shelters to a coordinate (?limit of 1..NEAREST_MAX_K)."""
+    return _nearest("shelters")
 
 
 @shelters_bp.route("/hospitals/nearest", methods=["POST"])
 def get_nearest_hospitals():
-    """Return nearest hospitals to a coordinate."""
+    """Return nearest hospitals to a coordinate (?limit of 1..NEAREST_MAX_K)."""
+    return _nearest("hospitals")
+
+
+@shelters_bp.route("/within_radius", methods=["POST"])
+def get_shelters_within_radius():
+    """Return shelters within radius_km of a coordinate, nearest first."""
+    return _within_radius("shelters")
+
+
+@shelters_bp.route("/hospitals/within_radius", methods=["POST"])
+def get_hospitals_within_radius():
+    """Return hospitals within radius_km of a coordinate, nearest first."""
+    return _within_radius("hospitals")
+
+
+@shelters_bp.route("/within_polygon", methods=["POST"])
+def get_shelters_within_polygon():
+    """Return shelters inside a drawn GeoJSON polygon."""
+    return _within_polygon("shelters")
+
+
+@shelters_bp.route("/hospitals/within_polygon", methods=["POST"])
+def get_hospitals_within_polygon():
+    """Return hospitals inside a drawn GeoJSON polygon."""
+    return _within_polygon("hospitals")
+
+
+@shelters_bp.route("/nearest/batch", methods=["POST"])
+def get_nearest_batch():
+    """
+    Return the k nearest shelters and/or hospitals for many origins at once.
+
+    Request body:
+        points (list): [{"latitude": .., "longitude": ..}, ...]
+        k (int, optional): Facilities per origin (default 5)
+        layers (list, optional): Subset of ["shelters", "hospitals"] (default both)
+
+    Response data, per layer:
+        nearest (list): For each origin, k indices into "facilities"
+            (nearest first; null where the layer has fewer than k)
+        distance_km (list): Matching haversine distances
+        facilities (list): Each referenced feature once (?fields= applies)
+    """
     try:
         data = request.get_json()
-        lat = float(data["latitude"])
-        lon = float(data["longitude"])
-        limit = int(data.get("limit", 5))
-    except:
+        points = data["points"]
+        lats = np.array([float(p["latitude"]) for p in points], dtype=np.float64)
+        lons = np.array([float(p["longitude"]) for p in points], dtype=np.float64)
+        layers = data.get("layers") or list(FACILITY_LAYERS)
+    except Exception:
         return jsonify({"status": "error", "message": "Invalid input"}), 400
 
-    geojson = DATA.get("hospitals")
-    nearest = _nearest_features(geojson, lat, lon, limit)
-
-    return jsonify({"status": "success", "data": nearest})
+    if not np.all(np.isfinite(lats) & np.isfinite(lons)):
+        return jsonify({"status": "error", "message": "Coordinates must be finite numbers"}), 400
+    k, error = _count(data, "k")
+    if error:
+        return error
+    if len(points) > current_app.config["NEAREST_BATCH_MAX_POINTS"]:
+        return jsonify({"status": "error", "message": f"At most {current_app.config['NEAREST_BATCH_MAX_POINTS']} points per batch"}), 400
+    unknown = [layer for layer in layers if layer not in FACILITY_LAYERS]
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown layer(s): {', '.join(map(str, unknown))}"}), 400
+
+    fields = requested_fields()
+    result = {}
+    for layer in layers:
+        index = get_facility_index(layer)
+        distances, indices = index.nearest_many(lats, lons, k)
+
+        # Ship each referenced facility once and point at it by position
+        found = indices < len(index)
+        referenced, inverse = np.unique(indices[found], return_inverse=True)
+        positions = np.full(indices.shape, -1, dtype=np.int64)
+        positions[found] = inverse
+
+        result[layer] = {
+            "nearest": [[p if p >= 0 else None for p in row] for row in positions.tolist()],
+            "distance_km": [[round(d, 3) if d != float("inf") else None for d in row] for row in distances.tolist()],
+            "facilities": [project(index.features[i], fields) for i in referenced.tolist()],
+        }
+
+    return jsonify({"status": "success", "count": len(points), "data": result})
@@ -0,0 +1,396 @@
+"""
+Contraction Module
+==================
+Customizable contraction hierarchy (CCH) over the road graph.
+
+Preprocessing is metric independent and runs once per road graph:
+
+1. Nodes are ordered by geometric nested dissection: each cell is split
+   at the median of its longer axis, the nodes on one side of the cut
+   edges form a separator, and separators are ranked above both halves.
+2. Nodes are contracted in that order without witness searches, which
+   adds a shortcut between every pair of higher neighbours (the upward
+   graph becomes chordal). Each lower triangle (v; u, w) of the result
+   is recorded.
+
+Customization turns edge weights into shortcut weights: triangles are
+relaxed level by level of the elimination tree, one vectorized update
+per level. It takes a fraction of the preprocessing time, so when hazard
+closures change the edge weights only the customization is redone.
+
+A query runs an upward search from both endpoints. In a CCH the upward
+search space of a node is its ancestors in the elimination tree, so each
+side walks up the tree once, without a priority queue, and the two meet at
+the best common ancestor. Shortcuts are then unpacked into road edges.
+"""
+
+import threading
+from array import array
+
+import numpy as np
+
+from backend.core.data_loader import DATA
+from backend.core.road_graph import get_road_graph
+
+# Cells of at most this many nodes are not dissected further
+LEAF_SIZE = 16
+
+
+def nested_dissection_order(lonlat, edge_u, edge_v, leaf_size=LEAF_SIZE):
+    """
+    Contraction order of the nodes, lowest rank first.
+
+    Args:
+        lonlat (np.ndarray): (n, 2) node coordinates
+        edge_u, edge_v (np.ndarray): Edge endpoints
+        leaf_size (int): Cells of at most this many nodes are not split
+
+    Returns:
+        np.ndarray: Node ids in contraction order
+    """
+    n = len(lonlat)
+    side = np.zeros(n, dtype=np.int8)
+    # Pre-order with separators first; reversed at the end so that every
+    # separator ranks above the two cells it separates
+    chunks = []
+    stack = [(np.arange(n), np.asarray(edge_u), np.asarray(edge_v))]
+
+    while stack:
+        nodes, u, v = stack.pop()
+        if len(nodes) <= leaf_size or not len(u):
+            chunks.append(nodes)
+            continue
+
+        coords = lonlat[nodes]
+        axis = int(np.ptp(coords[:, 1]) > np.ptp(coords[:, 0]))
+        half = len(nodes) // 2
+        left = np.zeros(len(nodes), dtype=bool)
+        left[np.argpartition(coords[:, axis], half)[:half]] = True
+
+        side[nodes] = np.where(left, 1, 2)
+        crossing = side[u] != side[v]
+        cut_u, cut_v = u[crossing], v[crossing]
+        on_left = side[cut_u] == 1
+        left_ends = np.unique(np.where(on_left, cut_u, cut_v))
+        right_ends = np.unique(np.where(on_left, cut_v, cut_u))
+        separator = left_ends if len(left_ends) <= len(right_ends) else right_ends
+
+        side[separator] = 0
+        inner = ~crossing & (side[u] != 0) & (side[v] != 0)
+        u, v = u[inner], v[inner]
+        in_left = side[u] == 1
+
+        chunks.append(separator)
+        for label, mask in ((1, in_left), (2, ~in_left)):
+            child = nodes[side[nodes] == label]
+            if len(child):
+                stack.append((child, u[mask], v[mask]))
+        side[nodes] = 0
+
+    return np.concatenate(chunks[::-1]) if chunks else np.empty(0, dtype=np.int64)
+
+
+class Customization:
+    """
+    Shortcut weights of a hierarchy for one edge metric.
+    """
+
+    def __init__(self, weight, arc_edge, child_a, child_b):
+        self.weight = weight
+        self.arc_edge = arc_edge      # cheapest road edge of an arc, -1 for pure shortcuts
+        self.child_a = child_a        # lower triangle an improved arc came from, else -1
+        self.child_b = child_b
+        self._weights = array("d", weight.tobytes())
+
+    @property
+    def nbytes(self):
+        return self.weight.nbytes * 2 + self.arc_edge.nbytes + self.child_a.nbytes + self.child_b.nbytes
+
+
+class ContractionHierarchy:
+    """
+    Metric-independent contraction of a RoadGraph plus its customizations.
+    """
+
+    def __init__(self, graph, leaf_size=LEAF_SIZE):
+        """
+        Args:
+            graph (RoadGraph): Graph to contract
+            leaf_size (int): Nested dissection leaf size
+        """
+        self.graph = graph
+        n = graph.num_nodes
+
+        self.order = nested_dissection_order(graph.node_lonlat, graph.edge_u, graph.edge_v, leaf_size)
+        self.rank = np.empty(n, dtype=np.int64)
+        self.rank[self.order] = np.arange(n)
+
+        lo, hi = self._contract()
+        self.arc_lo, self.arc_hi = lo, hi
+        self.up_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lo, minlength=n), out=self.up_ptr[1:])
+        self._keys = lo * n + hi
+
+        # Elimination tree: a node's parent is its lowest upward neighbour
+        degree = np.diff(self.up_ptr)
+        self.parent = np.full(n, -1, dtype=np.int64)
+        has_up = degree > 0
+        self.parent[has_up] = hi[self.up_ptr[:-1][has_up]]
+
+        # Arc of every road edge
+        ru, rv = self.rank[graph.edge_u], self.rank[graph.edge_v]
+        self._edge_arc = self.arc_id(np.minimum(ru, rv), np.maximum(ru, rv))
+
+        self._triangles(degree)
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._arrays = (
+            array("q", self.up_ptr.tobytes()),
+            array("q", self.arc_lo.tobytes()),
+            array("q", self.arc_hi.tobytes()),
+            array("q", self.parent.tobytes()),
+        )
+
+    @property
+    def nbytes(self):
+        """Memory held by the hierarchy and its cached metrics (used by the layer registry)."""
+        total = sum(v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+        total += sum(a.itemsize * len(a) for a in self._arrays)
+        return total + sum(metric.nbytes for _, metric in list(self._metrics.values()))
+
+    @property
+    def num_arcs(self):
+        return len(self.arc_lo)
+
+    def arc_id(self, lo, hi):
+        """Arc ids of (lower, higher) rank pairs."""
+        return np.searchsorted(self._keys, np.asarray(lo) * self.graph.num_nodes + np.asarray(hi))
+
+    # ---------- Preprocessing ----------
+
+    def _contract(self):
+        """Chordal completion of the graph in rank order: arcs (lo, hi)."""
+        n = self.graph.num_nodes
+        ru, rv = self.rank[self.graph.edge_u], self.rank[self.graph.edge_v]
+        lo, hi = np.minimum(ru, rv), np.maximum(ru, rv)
+        order = np.lexsort((hi, lo))
+        lo, hi = lo[order], hi[order]
+        ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lo, minlength=n), out=ptr[1:])
+        ptr, hi_list = ptr.tolist(), hi.tolist()
+
+        # Contracting v makes its upward neighbours a clique; adding them to
+        # the lowest one (v's parent) is enough, it passes them on in turn
+        fill = {}
+        arc_lo, arc_hi = [], []
+        for v in range(n):
+            up = set(hi_list[ptr[v]:ptr[v + 1]])
+            extra = fill.pop(v, None)
+            if extra:
+                up |= extra
+            if not up:
+                continue
+            up = sorted(up)
+            arc_lo.extend([v] * len(up))
+            arc_hi.extend(up)
+            if len(up) > 1:
+                fill.setdefault(up[0], set()).update(up[1:])
+
+        return np.array(arc_lo, dtype=np.int64), np.array(arc_hi, dtype=np.int64)
+
+    def _triangles(self, degree):
+        """Lower triangles grouped by elimination tree level of their bottom node."""
+        n = self.graph.num_nodes
+
+        # Height in the elimination tree: arcs below v are final once every
+        # level below v's has been relaxed
+        level = [0] * n
+        parent = self.parent.tolist()
+        for v in range(n):
+            p = parent[v]
+            if p >= 0 and level[p] <= level[v]:
+                level[p] = level[v] + 1
+        level = np.array(level, dtype=np.int64)
+
+        bottoms, first, second = [], [], []
+        for d in np.unique(degree[degree > 1]):
+            nodes = np.flatnonzero(degree == d)
+            i, j = np.triu_indices(d, 1)
+            base = self.up_ptr[nodes][:, None]
+            bottoms.append(np.repeat(nodes, len(i)))
+            first.append((base + i).ravel())
+            second.append((base + j).ravel())
+
+        if bottoms:
+            bottom = np.concatenate(bottoms)
+            a, b = np.concatenate(first), np.concatenate(second)
+        else:
+            bottom = a = b = np.empty(0, dtype=np.int64)
+        top = self.arc_id(self.arc_hi[a], self.arc_hi[b])
+
+        order = np.argsort(level[bottom], kind="stable")
+        self.tri_a, self.tri_b, self.tri_top = a[order], b[order], top[order]
+        self._level_bounds = np.searchsorted(level[bottom][order], np.arange(level.max(initial=0) + 2))
+
+    # ---------- Customization ----------
+
+    def customize(self, weights=None, blocked=None):
+        """
+        Shortcut weights for an edge metric.
+
+        Args:
+            weights (np.ndarray, optional): Cost per edge id (default: length)
+            blocked (sequence, optional): Truthy per edge id to close it
+
+        Returns:
+            Customization
+        """
+        edge_weight = np.array(self.graph.edge_length if weights is None else weights, dtype=np.float64)
+        if blocked is not None:
+            edge_weight[np.asarray(blocked, dtype=bool)] = np.inf
+
+        # Cheapest original edge of every arc
+        base = np.full(self.num_arcs, np.inf)
+        np.minimum.at(base, self._edge_arc, edge_weight)
+        order = np.lexsort((edge_weight, self._edge_arc))
+        arcs, first = np.unique(self._edge_arc[order], return_index=True)
+        arc_edge = np.full(self.num_arcs, -1, dtype=np.int64)
+        arc_edge[arcs] = order[first]
+
+        weight = base.copy()
+        a, b, top = self.tri_a, self.tri_b, self.tri_top
+        bounds = self._level_bounds
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if lo < hi:
+                np.minimum.at(weight, top[lo:hi], weight[a[lo:hi]] + weight[b[lo:hi]])
+
+        # The triangle each improved arc came from, for unpacking
+        child_a = np.full(self.num_arcs, -1, dtype=np.int64)
+        child_b = np.full(self.num_arcs, -1, dtype=np.int64)
+        via = (weight[top] == weight[a] + weight[b]) & (weight[top] < base[top])
+        child_a[top[via]] = a[via]
+        child_b[top[via]] = b[via]
+        return Customization(weight, arc_edge, child_a, child_b)
+
+    def metric(self, blocked=None):
+        """
+        Customization for a blocked-edge mask, cached while the same mask
+        object is passed (the hazard overlay hands out one object per
+        revision).
+
+        Args:
+            blocked (list, optional): Default: the graph's closed roads
+        """
+        if blocked is None:
+            blocked = self.graph.closed_edges()
+        key = id(blocked)
+        with self._lock:
+            cached = self._metrics.get(key)
+            if cached is not None and cached[0] is blocked:
+                return cached[1]
+
+        metric = self.customize(blocked=blocked)
+        with self._lock:
+            # Keep the default metric and the latest custom one
+            default = self.graph.closed_edges()
+            self._metrics = {k: v for k, v in self._metrics.items() if v[0] is default}
+            self._metrics[key] = (blocked, metric)
+        return metric
+
+    # ---------- Query ----------
+
+    def _upward(self, start, weights):
+        """Distances, parent arcs and arcs relaxed of the upward search from a rank node."""
+        up_ptr, _, arc_hi, parent = self._arrays
+        dist, pred = {start: 0.0}, {}
+        relaxed = 0
+        v = start
+        while v >= 0:
+            dv = dist.get(v)
+            if dv is not None:
+                relaxed += up_ptr[v + 1] - up_ptr[v]
+                for k in range(up_ptr[v], up_ptr[v + 1]):
+                    nd = dv + weights[k]
+                    u = arc_hi[k]
+                    if nd < dist.get(u, float("inf")):
+                        dist[u] = nd
+                        pred[u] = k
+            v = parent[v]
+        return dist, pred, relaxed
+
+    def _unpack(self, k, forward, metric, steps):
+        """Append the (edge id, next rank node) steps of an arc."""
+        stack = [(k, forward)]
+        while stack:
+            k, forward = stack.pop()
+            a = metric.child_a[k]
+            if a < 0:
+                steps.append((int(metric.arc_edge[k]), int(self.arc_hi[k] if forward else self.arc_lo[k])))
+                continue
+            b = metric.child_b[k]
+            # a = (x, lo), b = (x, hi): lo -> x -> hi
+            if forward:
+                stack.append((b, True))
+                stack.append((a, False))
+            else:
+                stack.append((a, True))
+                stack.append((b, False))
+
+    def shortest_path(self, source, target, metric=None, stats=None):
+        """
+        Shortest path between two nodes.
+
+        Args:
+            source, target (int): Node ids of the road graph
+            metric (Customization, optional): Default: lengths, closed roads
+            stats (dict, optional): Filled with the search space size
+                ("settled_nodes", "relaxed_edges")
+
+        Returns:
+            tuple | None: (cost, node ids, edge ids) as RoadGraph.shortest_path
+        """
+        if metric is None:
+            metric = self.metric()
+        s, t = int(self.rank[source]), int(self.rank[target])
+        fwd, fpred, fwd_relaxed = self._upward(s, metric._weights)
+        bwd, bpred, bwd_relaxed = self._upward(t, metric._weights)
+        if stats is not None:
+            stats["settled_nodes"] = len(fwd) + len(bwd)
+            stats["relaxed_edges"] = fwd_relaxed + bwd_relaxed
+
+        best, meet = float("inf"), None
+        for v, d in fwd.items():
+            total = d + bwd.get(v, float("inf"))
+            if total < best:
+                best, meet = total, v
+        if meet is None:
+            return None
+
+        arc_lo, arc_hi = self._arrays[1], self._arrays[2]
+        up_chain, v = [], meet
+        while v != s:
+            up_chain.append(fpred[v])
+            v = arc_lo[fpred[v]]
+
+        steps = []
+        for k in reversed(up_chain):
+            self._unpack(k, True, metric, steps)
+        v = meet
+        while v != t:
+            k = bpred[v]
+            self._unpack(k, False, metric, steps)
+            v = arc_lo[k]
+
+        nodes = [source] + [int(self.order[r]) for _, r in steps]
+        return best, nodes, [e for e, _ in steps]
+
+
+def get_contraction():
+    """
+    Contraction hierarchy of the road graph (preprocessed once per roads
+    layer version).
+
+    Returns:
+        ContractionHierarchy
+    """
+    return DATA.derived("roads", "contraction", lambda layer: ContractionHierarchy(get_road_graph()))
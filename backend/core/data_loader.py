@@ -84,19 +84,99 @@
 #     print("[INFO] All data loaded into DATA[]")
 #     print("============================================")
 import os
+import gc
 import json
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+
+from backend.core import snapshot
+from backend.core.data_watcher import DataWatcher
+from backend.core.geojson_stream import load_geojson_streaming
+from backend.core.layer_registry import LayerRegistry
+
+# Layers load on first access (see init_data); API modules import this object
+DATA = LayerRegistry()
+
+# Background hot-reload thread (see init_data)
+_watcher = None
+
+# Per-layer load report: key -> {"file", "origin", "bytes", "seconds", "features"}
+LOAD_STATS = {}
+
+FIXED_FILES = {
+    "boundary": "kerala_boundary_area_fixed.geojson",
+    "state": "kerala_state_fixed.geojson",
+    "districts": "kerala_district_fixed.geojson",
+    "taluks": "kerala_taluk_fixed.geojson",
+    "villages": "kerala_village_fixed.geojson",
+
+    "roads": "kerala_roads_lines_fixed.geojson",
+    "rivers": "kerala_rivers_lines_fixed.geojson",
+    "waters_area": "kerala_waters_area_fixed.geojson",
+    "waters_lines": "kerala_waters_lines_fixed.geojson",
+    "coastline": "kerala_coastline_lines_fixed.geojson",
+
+    "hospitals": "kerala_hospitals_fixed.geojson",
+    "shelters": "kerala_shelter_fixed.geojson",
+
+    # cyclone files (your actual filenames)
+    "cyclone_lines": "cyclone_lines.geojson",
+    "cyclone_points": "cyclone_points.geojson",
+}
+
+LANDSLIDE_DIR = "landslides_processed"
+
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def paused_gc():
+    """
+    Suspend the cyclic garbage collector while building large layers.
+
+    Parsing allocates millions of lists and dicts and none of them are
+    garbage, yet each allocation burst triggers a generational scan over
+    everything built so far. Pauses nest and are shared between threads.
+    """
+    global _gc_pauses, _gc_was_enabled
+
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
 
-DATA = {}
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def load_geojson(path, stream_threshold=None):
+    """
+    Load and validate GeoJSON file.
 
-def load_geojson(path):
-    """Load and validate GeoJSON file."""
+    Files of at least stream_threshold bytes are parsed feature by feature
+    (see geojson_stream) instead of with a single json.load.
+    """
     if not os.path.exists(path):
         print(f"[WARN] File missing: {path}")
         return None
 
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        if stream_threshold and os.path.getsize(path) >= stream_threshold:
+            data = load_geojson_streaming(path)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
 
         if isinstance(data, dict) and "features" in data:
             print(f"[LOADED] {os.path.basename(path)} ({len(data['features'])} features)")
@@ -110,58 +190,246 @@ def load_geojson(path):
         return None
 
 
-def load_landslides(folder):
-    """Load all landslide GeoJSONs from landslides_processed/"""
-    DATA["landslides"] = []
+def load_geojson_timed(path, base=None, snapshot_dir=None, stream_threshold=None):
+    """
+    Load a GeoJSON file and measure the work.
 
-    if not os.path.exists(folder):
-        print("[WARN] Landslide folder not found:", folder)
-        return
+    When snapshot_dir is given, a fresh compiled snapshot of the file is
+    read instead of the JSON, and a stale or missing one is rebuilt after
+    parsing. Module-level so it can be shipped to a process pool.
 
-    for file in os.listdir(folder):
-        if file.endswith(".geojson"):
-            fp = os.path.join(folder, file)
-            obj = load_geojson(fp)
-            if obj:
-                DATA["landslides"].append(obj)
-                print("[LANDSLIDE] Loaded:", file)
+    Returns:
+        tuple: (data, bytes_on_disk, seconds, origin) where origin is
+        'snapshot' or 'json'
+    """
+    with paused_gc():
+        return _load_geojson_timed(path, base, snapshot_dir, stream_threshold)
 
-    print(f"[OK] Total landslide files loaded: {len(DATA['landslides'])}")
 
+def _load_geojson_timed(path, base, snapshot_dir, stream_threshold):
+    started = time.perf_counter()
 
-def init_data(app):
-    """Initialize all GIS datasets."""
-    base = app.config["DATA_PROCESSED_DIR"]
+    if not os.path.exists(path):
+        print(f"[WARN] File missing: {path}")
+        return None, 0, time.perf_counter() - started, "json"
 
-    print("========== LOADING GIS DATA FROM", base, "==========")
+    size = os.path.getsize(path)
+
+    if snapshot_dir:
+        snap = snapshot.snapshot_path(path, base or os.path.dirname(path), snapshot_dir)
+        signature = snapshot.source_signature(path)
 
-    fixed_files = {
-        "boundary": "kerala_boundary_area_fixed.geojson",
-        "state": "kerala_state_fixed.geojson",
-        "districts": "kerala_district_fixed.geojson",
-        "taluks": "kerala_taluk_fixed.geojson",
-        "villages": "kerala_village_fixed.geojson",
+        try:
+            data = snapshot.read_snapshot(snap, signature)
+        except Exception as e:
+            print(f"[WARN] Unreadable snapshot {snap}: {e}")
+            data = None
 
-        "rivers": "kerala_rivers_lines_fixed.geojson",
-        "waters_area": "kerala_waters_area_fixed.geojson",
-        "waters_lines": "kerala_waters_lines_fixed.geojson",
-        "coastline": "kerala_coastline_lines_fixed.geojson",
+        if data is not None:
+            print(f"[SNAPSHOT] {os.path.basename(path)} ({len(data['features'])} features)")
+            return data, size, time.perf_counter() - started, "snapshot"
 
-        "hospitals": "kerala_hospitals_fixed.geojson",
-        "shelters": "kerala_shelter_fixed.geojson",
+    data = load_geojson(path, stream_threshold)
 
-        # cyclone files (your actual filenames)
-        "cyclone_lines": "cyclone_lines.geojson",
-        "cyclone_points": "cyclone_points.geojson",
+    if data is not None and snapshot_dir:
+        try:
+            snapshot.write_snapshot(snap, data, signature)
+        except Exception as e:
+            print(f"[WARN] Could not write snapshot {snap}: {e}")
+
+    return data, size, time.perf_counter() - started, "json"
+
+
+def _landslide_files(folder, warn=True):
+    """List landslide GeoJSON files inside landslides_processed/."""
+    if not os.path.exists(folder):
+        if warn:
+            print("[WARN] Landslide folder not found:", folder)
+        return []
+
+    return [f for f in os.listdir(folder) if f.endswith(".geojson")]
+
+
+def _make_executor(workers, kind):
+    """Create the worker pool used for parsing layers."""
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="data-loader")
+
+
+def _record_stats(key, path, data, size, seconds, origin="json"):
+    LOAD_STATS[key] = {
+        "file": os.path.basename(path),
+        "origin": origin,
+        "bytes": size,
+        "seconds": round(seconds, 4),
+        "features": len(data["features"]) if data else 0,
     }
 
-    # Load fixed files
-    for key, filename in fixed_files.items():
-        full = os.path.join(base, filename)
-        DATA[key] = load_geojson(full)
 
-    # Load landslides folder
-    landslide_dir = os.path.join(base, "landslides_processed")
-    load_landslides(landslide_dir)
+def load_all(base, workers=1, executor="thread", snapshot_dir=None, keys=None, stream_threshold=None):
+    """
+    Parse the fixed layers and landslide files, optionally in a worker pool.
+
+    Args:
+        base (str): Directory holding the processed GeoJSON files
+        workers (int): Pool size (1 loads sequentially in this thread)
+        executor (str): 'thread' or 'process'
+        snapshot_dir (str, optional): Where compiled snapshots are kept
+            (None parses the JSON every time)
+        keys (iterable, optional): Layer keys to load (default: all)
+        stream_threshold (int, optional): Parse files of at least this many
+            bytes incrementally
+
+    Returns:
+        dict: Layer key -> GeoJSON dict (landslides -> list of dicts)
+    """
+    keys = set(layer_keys() if keys is None else keys)
+    landslide_dir = os.path.join(base, LANDSLIDE_DIR)
+
+    jobs = [
+        (key, os.path.join(base, filename))
+        for key, filename in FIXED_FILES.items() if key in keys
+    ]
+    if "landslides" in keys:
+        jobs += [
+            (f"landslides/{file}", os.path.join(landslide_dir, file))
+            for file in _landslide_files(landslide_dir)
+        ]
+
+    load = partial(load_geojson_timed, base=base, snapshot_dir=snapshot_dir, stream_threshold=stream_threshold)
+
+    if workers <= 1:
+        results = [load(path) for _, path in jobs]
+    else:
+        with _make_executor(workers, executor) as pool:
+            # map() keeps submission order, so landslides stay in listing order
+            results = list(pool.map(load, [path for _, path in jobs]))
+
+    loaded = {"landslides": []} if "landslides" in keys else {}
+    for (key, path), (data, size, seconds, origin) in zip(jobs, results):
+        _record_stats(key, path, data, size, seconds, origin)
+
+        if key.startswith("landslides/"):
+            if data:
+                loaded["landslides"].append(data)
+                print("[LANDSLIDE] Loaded:", os.path.basename(path))
+        else:
+            loaded[key] = data
 
-    print("========== DATA LOADING COMPLETE ==========")
+    if "landslides" in keys:
+        print(f"[OK] Total landslide files loaded: {len(loaded['landslides'])}")
+    return loaded
+
+
+def layer_keys():
+    """Every layer key init_data registers."""
+    return [*FIXED_FILES, "landslides"]
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.basename(path), st.st_mtime_ns, st.st_size
+
+
+def source_signatures(base):
+    """
+    Current signatures of every layer's source files.
+
+    Returns:
+        dict: Layer key -> tuple of (file, mtime_ns, size); empty when missing
+    """
+    signatures = {}
+    for key, filename in FIXED_FILES.items():
+        sig = _file_signature(os.path.join(base, filename))
+        signatures[key] = (sig,) if sig else ()
+
+    landslide_dir = os.path.join(base, LANDSLIDE_DIR)
+    files = (_file_signature(os.path.join(landslide_dir, f)) for f in _landslide_files(landslide_dir, warn=False))
+    signatures["landslides"] = tuple(sorted(sig for sig in files if sig))
+    return signatures
+
+
+def _layer_loader(key, base, snapshot_dir, stream_threshold):
+    """Loader used by the registry to materialize one layer on demand."""
+    def load():
+        print(f"[LAZY] Loading layer '{key}'")
+        with paused_gc():
+            return load_all(base, snapshot_dir=snapshot_dir, keys=[key], stream_threshold=stream_threshold)[key]
+    return load
+
+
+def report_load_stats():
+    """Print per-layer load time and size, slowest first."""
+    total_bytes = 0
+    for key, stats in sorted(LOAD_STATS.items(), key=lambda kv: -kv[1]["seconds"]):
+        total_bytes += stats["bytes"]
+        print(
+            f"[STATS] {key:<40} {stats['bytes'] / 1_048_576:8.2f} MB "
+            f"{stats['seconds']:8.3f}s {stats['origin']:>8} ({stats['features']} features)"
+        )
+    print(f"[STATS] {len(LOAD_STATS)} files, {total_bytes / 1_048_576:.2f} MB total")
+
+
+def init_data(app):
+    """
+    Initialize all GIS datasets.
+
+    Every layer is registered in DATA. With DATA_LAZY_LOADING only the
+    layers in DATA_PRELOAD_LAYERS are parsed now; the rest load on first
+    access and may be evicted again under DATA_MEMORY_BUDGET_MB (except
+    the roads and the hazard layers, which stay once loaded).
+    """
+    base = app.config["DATA_PROCESSED_DIR"]
+    workers = app.config.get("DATA_LOADER_WORKERS", 1)
+    executor = app.config.get("DATA_LOADER_EXECUTOR", "thread")
+    snapshot_dir = app.config.get("DATA_SNAPSHOT_DIR") if app.config.get("DATA_SNAPSHOTS_ENABLED") else None
+    lazy = app.config.get("DATA_LAZY_LOADING", False)
+    stream_threshold = int(app.config.get("DATA_STREAMING_THRESHOLD_MB", 0) * 1_048_576) or None
+
+    print("========== LOADING GIS DATA FROM", base, "==========")
+    print(f"[INFO] Loader pool: {workers} {executor} worker(s)")
+
+    LOAD_STATS.clear()
+    started = time.perf_counter()
+
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+    # Reset the registry in place: API modules hold a reference to it
+    DATA.clear()
+    DATA.memory_budget = int(app.config.get("DATA_MEMORY_BUDGET_MB", 0) * 1_048_576)
+    # Evicting the roads or a hazard layer would throw away the road graph,
+    # its hierarchy and landmarks, or the hazard mask, rebuilt on the next route
+    pinned = {"roads", *app.config.get("ROUTING_HAZARD_LAYERS", [])}
+    for key in layer_keys():
+        DATA.register(key, _layer_loader(key, base, snapshot_dir, stream_threshold), pinned=key in pinned)
+
+    eager = [k for k in app.config.get("DATA_PRELOAD_LAYERS", []) if k in DATA] if lazy else layer_keys()
+    print(f"[INFO] Lazy loading: {'on' if lazy else 'off'}, preloading {len(eager)} layer(s)")
+
+    # Take the watcher's baseline before parsing so no change is missed
+    if app.config.get("DATA_HOT_RELOAD", False):
+        _watcher = DataWatcher(DATA, lambda: source_signatures(base), app.config.get("DATA_RELOAD_INTERVAL", 5))
+
+    with paused_gc():
+        loaded = load_all(base, workers, executor, snapshot_dir, keys=eager, stream_threshold=stream_threshold)
+    for key, value in loaded.items():
+        DATA.put(key, value)
+
+    if _watcher is not None:
+        _watcher.start()
+        print(f"[INFO] Watching {base} for changes every {_watcher.interval}s")
+
+    report_load_stats()
+    resident = DATA.resident()
+    print(
+        f"[INFO] Resident: {len(resident['resident'])} layer(s), "
+        f"{resident['resident_bytes'] / 1_048_576:.1f} MB"
+    )
+    print(f"========== DATA LOADING COMPLETE ({time.perf_counter() - started:.2f}s) ==========")
@@ -0,0 +1,97 @@
+"""
+Data Watcher Module
+===================
+Background hot reload of changed datasets under DATA_PROCESSED_DIR.
+
+The watcher polls file signatures (mtime, size) of every registered layer.
+When a layer's files change and then stay unchanged for one more poll (so
+half-written files are not picked up), only that layer is reloaded:
+
+- resident layers are rebuilt in this thread and published with an atomic
+  swap, so requests in flight keep the version they already hold;
+- layers that are not in memory are only invalidated and load the new
+  files on their next access.
+"""
+
+import threading
+
+
+class DataWatcher(threading.Thread):
+    """
+    Polling watcher that reloads changed layers in the background.
+    """
+
+    def __init__(self, registry, scan, interval=5.0):
+        """
+        Args:
+            registry (LayerRegistry): Registry to publish reloaded layers to
+            scan (callable): Returns {layer_key: signature} for the current files
+            interval (float): Seconds between polls
+        """
+        super().__init__(name="data-watcher", daemon=True)
+        self.registry = registry
+        self.scan = scan
+        self.interval = interval
+        self.reloads = 0
+        self._known = scan()
+        self._pending = {}
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[WATCH] Poll failed: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+    def poll(self):
+        """
+        Check every layer once and reload those whose files have settled
+        on a new signature.
+
+        Returns:
+            list: Keys reloaded or invalidated by this poll
+        """
+        current = self.scan()
+        applied = []
+
+        for key, signature in current.items():
+            if signature == self._known.get(key):
+                self._pending.pop(key, None)
+                continue
+
+            # Wait one interval for writers to finish before reloading
+            if self._pending.get(key) != signature:
+                self._pending[key] = signature
+                continue
+
+            if self._apply(key):
+                self._known[key] = signature
+                self._pending.pop(key, None)
+                applied.append(key)
+
+        return applied
+
+    def _apply(self, key):
+        if not self.registry.is_resident(key):
+            self.registry.invalidate(key)
+            print(f"[WATCH] '{key}' changed on disk; will load on next access")
+            return True
+
+        loader = self.registry.loader_for(key)
+        if loader is None:
+            return False
+
+        value = loader()
+        if value is None and self.scan().get(key):
+            # Files exist but did not parse; keep serving the old version
+            print(f"[WATCH] '{key}' changed but failed to load; keeping current version")
+            return False
+
+        self.registry.swap(key, value)
+        self.reloads += 1
+        print(f"[WATCH] Reloaded '{key}' (version {self.registry.version(key)})")
+        return True
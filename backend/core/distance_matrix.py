@@ -0,0 +1,243 @@
+"""
+Distance Matrix Module
+======================
+Many-to-many road distances (sources x targets) for dispatch planning.
+
+A matrix is a batch of one-to-many searches: one Dijkstra run from each
+node settles every target at once. Sources and targets are snapped onto
+road edges as for /safe-route, so each is reached through both ends of
+its edge at the cost of the partial edge (or directly along a shared
+edge). The searches run between the distinct end nodes (facilities often
+share an edge), and since the road graph is undirected they start from
+whichever side has fewer; the node distances are transposed when that is
+the targets. Searches stop at MAX_ROUTE_DISTANCE. Only the target columns
+of each search are kept, chunk by chunk, so memory stays at a few rows of
+the full node range.
+
+The searches run in scipy.sparse.csgraph, which holds the GIL, so they are
+spread over a process pool. The pool is created once, with a forkserver
+(or spawn) context so the multithreaded server process is never forked,
+and its workers start on the first matrix. The sparse graph of each
+blocked-edge mask (the hazard overlay hands out one object per revision)
+is published once in shared memory; tasks carry only its block names and
+each worker attaches to a graph the first time it sees it.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+import config
+
+# Most searches per task: larger chunks amortize the transfer, smaller ones
+# balance the workers
+MAX_CHUNK = 32
+
+# Graph this worker process last attached to: (spec, matrix, blocks)
+_WORKER_GRAPH = None
+
+
+class SharedGraph:
+    """
+    A csgraph matrix copied into shared memory blocks, released once it
+    is replaced and no search uses it any more.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self._blocks = []
+        arrays = []
+        for a in (matrix.data, matrix.indices, matrix.indptr):
+            block = shared_memory.SharedMemory(create=True, size=max(a.nbytes, 1))
+            np.ndarray(a.shape, a.dtype, buffer=block.buf)[:] = a
+            self._blocks.append(block)
+            arrays.append((block.name, a.dtype.str, len(a)))
+        # Picklable description the workers attach from
+        self.spec = (matrix.shape, tuple(arrays))
+        self.users = 0
+        self.retired = False
+
+    def release(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def _attach(spec):
+    """Worker side: the matrix described by spec, attaching on first use."""
+    global _WORKER_GRAPH
+    if _WORKER_GRAPH is None or _WORKER_GRAPH[0] != spec:
+        if _WORKER_GRAPH is not None:
+            for block in _WORKER_GRAPH[2]:
+                block.close()
+        shape, arrays = spec
+        blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in arrays]
+        data, indices, indptr = (
+            np.ndarray(n, np.dtype(dtype), buffer=block.buf) for block, (_, dtype, n) in zip(blocks, arrays)
+        )
+        _WORKER_GRAPH = (spec, csr_matrix((data, indices, indptr), shape=shape, copy=False), blocks)
+    return _WORKER_GRAPH[1]
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _search_rows(matrix, sources, targets, limit):
+    """Distances from each source to the targets (float32, inf if unreachable)."""
+    dist = dijkstra(matrix, directed=True, indices=sources, limit=limit)
+    return dist.reshape(len(sources), -1)[:, targets].astype(np.float32)
+
+
+def _worker_rows(spec, sources, targets, limit):
+    return _search_rows(_attach(spec), sources, targets, limit)
+
+
+def _end_arrays(snaps):
+    """
+    End nodes of each snap's edge and the partial-edge cost to each, as
+    (k, 2) arrays; an edge with one end (a loop) repeats it at inf cost.
+    """
+    nodes = np.empty((len(snaps), 2), dtype=np.int64)
+    costs = np.full((len(snaps), 2), np.inf)
+    for i, snap in enumerate(snaps):
+        ends = list(snap.ends().items())
+        nodes[i] = [ends[0][0], ends[-1][0]]
+        costs[i, :len(ends)] = [cost for _, cost in ends]
+    return nodes, costs
+
+
+class MatrixEngine:
+    """
+    Distance matrices over a road graph, with a process pool per
+    blocked-edge mask.
+    """
+
+    def __init__(self, workers=1):
+        """
+        Args:
+            workers (int): Worker processes; 1 searches in the calling thread
+        """
+        self.workers = max(1, int(workers))
+        self._lock = threading.Lock()
+        self._key = None        # (graph, blocked) of the matrix below
+        self._matrix = None     # np matrix (1 worker) or SharedGraph
+        # Processes start on the first submit, from the forkserver
+        self._pool = (
+            ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+            if self.workers > 1 else None
+        )
+
+    def _prepare(self, graph, blocked):
+        """Sparse graph for a blocked-edge mask, in use until _done(). Call with the lock held."""
+        if self._key is None or self._key[0] is not graph or self._key[1] is not blocked:
+            matrix = graph.to_csgraph(blocked)
+            if self._pool is not None:
+                if self._matrix is not None:
+                    self._retire(self._matrix)
+                matrix = SharedGraph(matrix)
+            self._matrix = matrix
+            self._key = (graph, blocked)
+        if isinstance(self._matrix, SharedGraph):
+            self._matrix.users += 1
+        return self._matrix
+
+    def _done(self, matrix):
+        if isinstance(matrix, SharedGraph):
+            with self._lock:
+                matrix.users -= 1
+                if matrix.retired and not matrix.users:
+                    matrix.release()
+
+    @staticmethod
+    def _retire(shared):
+        """Release a replaced graph once its running searches finish. Call with the lock held."""
+        shared.retired = True
+        if not shared.users:
+            shared.release()
+
+    def distances(self, graph, sources, targets, blocked=None, limit=np.inf):
+        """
+        Road distances between snapped points.
+
+        Args:
+            graph (RoadGraph): Road graph
+            sources, targets (list): EdgeSnap per point (see RoadGraph.snap_many())
+            blocked (sequence, optional): bool per edge id (edges left out;
+                the partial edges of the points themselves are kept)
+            limit (float): Longest distance searched in metres
+
+        Returns:
+            np.ndarray: (len(sources), len(targets)) float32 metres, inf
+            where unreachable or beyond limit
+        """
+        if not len(sources) or not len(targets):
+            return np.empty((len(sources), len(targets)), dtype=np.float32)
+
+        src_ends, src_cost = _end_arrays(sources)
+        tgt_ends, tgt_cost = _end_arrays(targets)
+        src_nodes, src_pos = np.unique(src_ends, return_inverse=True)
+        tgt_nodes, tgt_pos = np.unique(tgt_ends, return_inverse=True)
+        src_pos, tgt_pos = src_pos.reshape(-1, 2), tgt_pos.reshape(-1, 2)
+        transposed = len(tgt_nodes) < len(src_nodes)
+        if transposed:
+            src_nodes, tgt_nodes = tgt_nodes, src_nodes
+
+        chunk = int(np.clip(np.ceil(len(src_nodes) / (self.workers * 4)), 1, MAX_CHUNK))
+        chunks = [src_nodes[i:i + chunk] for i in range(0, len(src_nodes), chunk)]
+
+        with self._lock:
+            matrix = self._prepare(graph, blocked)
+
+        try:
+            if isinstance(matrix, SharedGraph) and len(chunks) > 1:
+                futures = [self._pool.submit(_worker_rows, matrix.spec, c, tgt_nodes, limit) for c in chunks]
+                rows = [f.result() for f in futures]
+            else:
+                local = matrix.matrix if isinstance(matrix, SharedGraph) else matrix
+                rows = [_search_rows(local, c, tgt_nodes, limit) for c in chunks]
+        finally:
+            self._done(matrix)
+
+        between = np.vstack(rows)
+        if transposed:
+            between = between.T
+
+        # Best of the (up to) four end pairs, plus the partial edges
+        result = np.full((len(sources), len(targets)), np.inf)
+        for a in range(2):
+            for b in range(2):
+                via = between[np.ix_(src_pos[:, a], tgt_pos[:, b])]
+                np.minimum(result, src_cost[:, a, None] + via + tgt_cost[None, :, b], out=result)
+
+        # Points on the same edge may go directly along it
+        src_edge = np.array([s.edge for s in sources])
+        tgt_edge = np.array([t.edge for t in targets])
+        si, ti = np.nonzero(src_edge[:, None] == tgt_edge[None, :])
+        if len(si):
+            direct = [sources[i].direct_cost(targets[j]) for i, j in zip(si.tolist(), ti.tolist())]
+            result[si, ti] = np.minimum(result[si, ti], direct)
+
+        result[result > limit] = np.inf
+        return result.astype(np.float32)
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+            self._pool = None
+            if isinstance(self._matrix, SharedGraph):
+                self._retire(self._matrix)
+            self._key = self._matrix = None
+
+
+# Shared by every request of this worker
+MATRIX = MatrixEngine(config.ROUTING_MATRIX_WORKERS)
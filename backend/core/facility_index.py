@@ -0,0 +1,200 @@
+"""
+Facility Index Module
+=====================
+k-nearest and range queries over point facility layers (shelters,
+hospitals).
+
+Facilities are stored as unit vectors on the sphere in a KD-tree. The
+straight-line (chord) distance between unit vectors grows monotonically
+with the great-circle distance, so the tree's nearest neighbours are the
+nearest facilities on the Earth's surface, and chord lengths convert
+exactly to haversine kilometres. The index is a derived structure of the
+layer registry, built once per layer version.
+"""
+
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+from shapely.geometry import shape
+
+from backend.core.data_loader import DATA
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(lon, lat):
+    """
+    Convert degrees to 3D unit vectors.
+
+    Args:
+        lon, lat (array-like): Coordinates in degrees
+
+    Returns:
+        np.ndarray: (n, 3) unit vectors
+    """
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord):
+    """Great-circle (haversine) distance of a unit-sphere chord length."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def km_to_chord(km):
+    """Unit-sphere chord length of a great-circle distance."""
+    return 2 * np.sin(np.minimum(np.asarray(km, dtype=np.float64), np.pi * EARTH_RADIUS_KM) / (2 * EARTH_RADIUS_KM))
+
+
+def _position(geometry):
+    """Longitude/latitude of a facility (centroid for non-point geometries)."""
+    if geometry.get("type") == "Point":
+        coords = geometry["coordinates"]
+        return float(coords[0]), float(coords[1])
+    point = shape(geometry).centroid
+    return point.x, point.y
+
+
+class FacilityIndex:
+    """
+    KD-tree over the positions of one facility layer.
+    """
+
+    def __init__(self, collection):
+        """
+        Args:
+            collection (dict | None): GeoJSON FeatureCollection
+        """
+        features, positions = [], []
+        for feat in (collection or {}).get("features", []):
+            geom = feat.get("geometry")
+            if not geom:
+                continue
+            try:
+                positions.append(_position(geom))
+            except Exception:
+                continue
+            features.append(feat)
+
+        self.features = features
+        self.lonlat = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        self.tree = cKDTree(to_unit_vectors(self.lonlat[:, 0], self.lonlat[:, 1])) if features else None
+
+    def __len__(self):
+        return len(self.features)
+
+    @property
+    def nbytes(self):
+        """Memory held by the positions and KD-tree (the features are the layer's)."""
+        total = self.lonlat.nbytes
+        if self.tree is not None:
+            total += self.tree.data.nbytes + self.tree.indices.nbytes
+        return total
+
+    def nearest(self, lat, lon, k=5):
+        """
+        The k facilities nearest to a point.
+
+        Args:
+            lat, lon (float): Query point in degrees
+            k (int): Number of facilities
+
+        Returns:
+            list: (feature, distance_km) pairs, nearest first
+        """
+        if k <= 0:
+            return []
+        distances, indices = self.nearest_many([lat], [lon], k)
+        return [
+            (self.features[i], float(d))
+            for d, i in zip(distances[0], indices[0])
+            if i < len(self.features)
+        ]
+
+    def nearest_many(self, lats, lons, k=5):
+        """
+        The k facilities nearest to each of many points, in one tree query.
+
+        Args:
+            lats, lons (array-like): Query points in degrees
+            k (int): Number of facilities per point
+
+        Returns:
+            tuple: (distances_km, indices), both shaped (n, k). Missing
+            neighbours (fewer than k facilities) have distance inf and
+            index len(self).
+        """
+        n = len(np.atleast_1d(lats))
+        k = max(1, int(k))
+        if self.tree is None:
+            return np.full((n, k), np.inf), np.full((n, k), 0, dtype=np.intp)
+
+        chords, indices = self.tree.query(to_unit_vectors(lons, lats), k=k)
+        chords = np.asarray(chords, dtype=np.float64).reshape(n, k)
+        indices = np.asarray(indices).reshape(n, k)
+        return np.where(np.isinf(chords), np.inf, chord_to_km(np.where(np.isinf(chords), 0, chords))), indices
+
+    def within_radius(self, lat, lon, radius_km):
+        """
+        Facilities within a great-circle radius of a point.
+
+        Args:
+            lat, lon (float): Centre in degrees
+            radius_km (float): Radius in kilometres
+
+        Returns:
+            tuple: (indices, distances_km), nearest first
+        """
+        if self.tree is None:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        centre = to_unit_vectors([lon], [lat])[0]
+        indices = np.asarray(self.tree.query_ball_point(centre, km_to_chord(radius_km)), dtype=np.intp)
+        if not len(indices):
+            return indices, np.empty(0)
+
+        points = self.tree.data[indices]
+        distances = chord_to_km(np.linalg.norm(points - centre, axis=1))
+        order = np.argsort(distances, kind="stable")
+        return indices[order], distances[order]
+
+    def within_polygon(self, polygon):
+        """
+        Facilities inside (or on the boundary of) a polygon.
+
+        The polygon is prepared once and only facilities inside its
+        bounding box are tested.
+
+        Args:
+            polygon: Shapely Polygon or MultiPolygon in lon/lat
+
+        Returns:
+            np.ndarray: Facility indices in layer order
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.intp)
+
+        minx, miny, maxx, maxy = polygon.bounds
+        x, y = self.lonlat[:, 0], self.lonlat[:, 1]
+        candidates = np.flatnonzero((x >= minx) & (x <= maxx) & (y >= miny) & (y <= maxy))
+        if not len(candidates):
+            return candidates
+
+        shapely.prepare(polygon)
+        inside = shapely.intersects_xy(polygon, x[candidates], y[candidates])
+        return candidates[inside]
+
+
+def get_facility_index(key):
+    """
+    Facility index of a registered point layer (built once per version).
+
+    Args:
+        key (str): Layer key in DATA
+
+    Returns:
+        FacilityIndex
+    """
+    return DATA.derived(key, "facilities", FacilityIndex)
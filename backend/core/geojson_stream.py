@@ -0,0 +1,140 @@
+"""
+GeoJSON Stream Module
+=====================
+Incremental, feature-by-feature parsing of large GeoJSON files.
+
+`json.load` reads the whole file into one string and only then builds the
+object tree, so peak memory is the file text plus the parsed layer. The
+parser here reads the file in chunks and decodes one feature at a time with
+the standard library decoder, so only a chunk of text is held next to the
+features built so far.
+"""
+
+import re
+import json
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+DEFAULT_CHUNK_SIZE = 1 << 20   # characters
+
+
+class _ChunkReader:
+    """Text buffer over a file that is refilled as values are consumed."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size):
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what was consumed so the buffer stays about one chunk long
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill(self.chunk_size):
+                return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def take(self, expected):
+        """Consume one structural character, which must be one of expected."""
+        char = self.peek()
+        if not char or char not in expected:
+            raise ValueError(f"Expected one of {expected!r}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill(size):
+                continue
+            size *= 2
+
+
+def iter_features(path, members=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the features of a GeoJSON FeatureCollection one at a time.
+
+    Args:
+        path (str): GeoJSON file
+        members (dict, optional): Filled with the collection's other
+            top-level members ("type", "crs", "name", ...)
+        chunk_size (int): Characters read per refill
+
+    Yields:
+        dict: GeoJSON Feature
+    """
+    if members is None:
+        members = {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _ChunkReader(f, chunk_size)
+        reader.take("{")
+        if reader.peek() == "}":
+            return
+
+        while True:
+            key = reader.value()
+            reader.take(":")
+
+            if key == "features":
+                reader.take("[")
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield reader.value()
+                        if reader.take(",]") == "]":
+                            break
+            else:
+                members[key] = reader.value()
+
+            if reader.take(",}") == "}":
+                return
+
+
+def load_geojson_streaming(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parse a GeoJSON FeatureCollection without reading the whole file at once.
+
+    Args:
+        path (str): GeoJSON file
+        chunk_size (int): Characters read per refill
+
+    Returns:
+        dict: GeoJSON FeatureCollection (same result as json.load)
+
+    Raises:
+        ValueError: If the file is not a FeatureCollection-shaped document
+    """
+    members = {}
+    features = list(iter_features(path, members, chunk_size))
+
+    if "type" not in members and not features:
+        raise ValueError("No GeoJSON members found")
+
+    collection = members
+    collection["features"] = features
+    return collection
@@ -0,0 +1,147 @@
+"""
+Hazard Overlay Module
+=====================
+Road graph edges closed by active hazard zones (landslides, floods).
+
+Safe routing used to buffer every disaster zone, overlay it with every
+road and rebuild the graph from what was left, on each query. The overlay
+instead keeps, for every hazard zone, the edges its buffer touches, and a
+per-edge count of the zones covering it. When a hazard layer gets a new
+version only the zones that appeared or disappeared are buffered and
+matched against the graph's edge index, and only their edges' counts
+change. The blocked-edge mask handed to the searches is rebuilt from the
+counts once per change, so a safe-route query pays nothing for hazards.
+"""
+
+import threading
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+import config
+from backend.core.data_loader import DATA
+from backend.core.layer_index import get_layer_index
+from backend.core.spatial_analysis import create_buffer
+
+
+class HazardOverlay:
+    """
+    Hazard coverage of the edges of one road graph, updated per hazard
+    layer version.
+    """
+
+    def __init__(self, layers=("landslides",), buffer_distance=1000):
+        """
+        Args:
+            layers (iterable): Hazard layer keys in DATA
+            buffer_distance (float): Safety buffer around each zone in metres
+        """
+        self.layers = tuple(layers)
+        self.buffer_distance = buffer_distance
+        self._lock = threading.Lock()
+        # Increases with every change of the mask, across graphs too
+        self.revision = 0
+        self._reset(None)
+
+    def _reset(self, graph):
+        self._graph = graph
+        self._coverage = np.zeros(graph.num_edges if graph else 0, dtype=np.int32)
+        self._zones = {}        # layer -> {zone WKB: edge ids}
+        self._versions = {}     # layer -> version applied
+        self._blocked = None
+        self.revision += 1
+        self.changed_edges = np.empty(0, dtype=np.int64)
+
+    def blocked(self, graph):
+        """
+        Blocked-edge mask for searches on graph: closed roads plus every
+        edge inside a buffered hazard zone.
+
+        Hazard layers that changed since the last call are applied first.
+
+        Returns:
+            list: bool per edge id (shared; do not modify)
+        """
+        return self.state(graph)[0]
+
+    def state(self, graph):
+        """
+        Blocked-edge mask for graph (see blocked()) and the revision it
+        belongs to, read together once pending hazard changes are applied.
+
+        Returns:
+            tuple: (mask, revision)
+        """
+        while True:
+            # Hazard layers are fetched before taking the lock: loading one
+            # runs the load hooks, which may call back in here
+            pending = {}
+            for layer in self.layers:
+                version = DATA.version(layer)
+                if graph is not self._graph or self._versions.get(layer) != version:
+                    pending[layer] = (version, self._zone_geometries(layer))
+
+            with self._lock:
+                if graph is not self._graph:
+                    self._reset(graph)
+
+                stale = [k for k in self.layers if self._versions.get(k) != DATA.version(k)]
+                if all(k in pending and pending[k][0] == DATA.version(k) for k in stale):
+                    for layer in stale:
+                        self._apply(layer, *pending[layer])
+                    if self._blocked is None:
+                        self._blocked = (graph.edge_blocked | (self._coverage > 0)).tolist()
+                    return self._blocked, self.revision
+            # A layer or the graph changed meanwhile: fetch again
+
+    def coverage(self):
+        """Number of hazard zones covering each edge (copy)."""
+        with self._lock:
+            return self._coverage.copy()
+
+    @staticmethod
+    def _zone_geometries(layer):
+        try:
+            return get_layer_index(layer).geometries
+        except KeyError:
+            return np.empty(0, dtype=object)
+
+    def _apply(self, layer, version, geometries):
+        geometries = geometries[~shapely.is_missing(geometries)]
+        current = dict(zip(shapely.to_wkb(geometries).tolist(), geometries)) if len(geometries) else {}
+        known = self._zones.setdefault(layer, {})
+
+        removed = [known.pop(wkb) for wkb in [k for k in known if k not in current]]
+        added = [wkb for wkb in current if wkb not in known]
+
+        changed = []
+        for edges in removed:
+            self._coverage[edges] -= 1
+            changed.append(edges)
+
+        if added:
+            zones = gpd.GeoDataFrame(geometry=[current[wkb] for wkb in added], crs=f"EPSG:{config.DEFAULT_SRID}")
+            buffered = create_buffer(zones, self.buffer_distance).geometry.values
+            zone_of, edge_ids = self._graph.edges_touching(np.asarray(buffered, dtype=object))
+
+            order = np.argsort(zone_of, kind="stable")
+            zone_of, edge_ids = zone_of[order], edge_ids[order]
+            bounds = np.searchsorted(zone_of, np.arange(len(added) + 1))
+            for i, wkb in enumerate(added):
+                edges = edge_ids[bounds[i]:bounds[i + 1]]
+                known[wkb] = edges
+                changed.append(edges)
+            np.add.at(self._coverage, edge_ids, 1)
+
+        self._versions[layer] = version
+        if removed or added:
+            self._blocked = None
+            self.revision += 1
+            self.changed_edges = np.unique(np.concatenate(changed)) if changed else np.empty(0, dtype=np.int64)
+            print(f"[HAZARD] {layer}: +{len(added)} -{len(removed)} zones, "
+                  f"{len(self.changed_edges)} edges updated, {int((self._coverage > 0).sum())} closed")
+
+
+# Shared by every request of this worker
+HAZARDS = HazardOverlay(config.ROUTING_HAZARD_LAYERS, config.ROUTING_HAZARD_BUFFER)
@@ -0,0 +1,118 @@
+"""
+Layer Index Module
+==================
+Spatial indexes over the features of a loaded GeoJSON layer.
+
+A LayerIndex holds the Shapely geometry of every feature and an STRtree
+over them, so viewport (bounding box) queries touch only the candidate
+features instead of the whole layer. Indexes are derived structures of
+the layer registry: built once per layer version and dropped with it.
+"""
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import box, shape
+
+from backend.core.data_loader import DATA
+
+# Rough GEOS footprint per coordinate, and per geometry (Python object,
+# GEOS header and STRtree node)
+_COORD_BYTES = 24
+_GEOMETRY_BYTES = 200
+
+
+def geometry_nbytes(geometries):
+    """Approximate memory held by an array of Shapely geometries and an STRtree over them."""
+    geometries = np.asarray(geometries, dtype=object).reshape(-1)
+    coords = int(shapely.get_num_coordinates(geometries).sum()) if len(geometries) else 0
+    return coords * _COORD_BYTES + len(geometries) * _GEOMETRY_BYTES
+
+
+class LayerIndex:
+    """
+    Feature geometries of one layer plus an STRtree over them.
+    """
+
+    def __init__(self, collection):
+        """
+        Args:
+            collection (dict | list | None): GeoJSON FeatureCollection, or a
+                list of them (e.g. the landslide files) indexed as one
+        """
+        if isinstance(collection, list):
+            self.features = [f for c in collection if c for f in c.get("features", [])]
+        else:
+            self.features = collection.get("features", []) if collection else []
+
+        geometries = np.empty(len(self.features), dtype=object)
+        for i, feat in enumerate(self.features):
+            geom = feat.get("geometry")
+            if not geom:
+                continue
+            try:
+                geometries[i] = shape(geom)
+            except Exception:
+                continue
+
+        self.geometries = geometries
+        self.tree = STRtree(geometries)
+
+    def __len__(self):
+        return len(self.features)
+
+    @property
+    def nbytes(self):
+        """Memory held by the geometries and tree (the features are the layer's)."""
+        return geometry_nbytes(self.geometries)
+
+    def query_bbox(self, minx, miny, maxx, maxy):
+        """
+        Indices of features intersecting a bounding box, in layer order.
+
+        Args:
+            minx, miny, maxx, maxy (float): Bounding box in degrees
+
+        Returns:
+            np.ndarray: Sorted feature indices
+        """
+        hits = self.tree.query(box(minx, miny, maxx, maxy), predicate="intersects")
+        hits.sort()
+        return hits
+
+    def features_in_bbox(self, minx, miny, maxx, maxy):
+        """GeoJSON features intersecting a bounding box."""
+        return [self.features[i] for i in self.query_bbox(minx, miny, maxx, maxy)]
+
+
+def get_layer_index(key):
+    """
+    Spatial index of a registered layer (built on first use per version).
+
+    Args:
+        key (str): Layer key in DATA
+
+    Returns:
+        LayerIndex
+    """
+    return DATA.derived(key, "index", LayerIndex)
+
+
+def parse_bbox(value):
+    """
+    Parse a 'minx,miny,maxx,maxy' query parameter.
+
+    Returns:
+        tuple: (minx, miny, maxx, maxy)
+
+    Raises:
+        ValueError: If the string is not four numbers with min <= max
+    """
+    parts = [float(x) for x in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox needs four numbers")
+
+    minx, miny, maxx, maxy = parts
+    if minx > maxx or miny > maxy:
+        raise ValueError("bbox min must not exceed max")
+    return minx, miny, maxx, maxy
@@ -0,0 +1,481 @@
+"""
+Layer Registry Module
+=====================
+Lazy, memory-budgeted container for the GIS layers served by the API.
+
+Layers are registered with a loader and only materialized the first time
+they are accessed. Resident layers are tracked in least-recently-used
+order; when the estimated size of everything resident exceeds the memory
+budget, the coldest layers are dropped and will be reloaded on their next
+access. Pinned layers are never dropped.
+
+The registry behaves like the plain dict it replaces (`get`, `[]`, `in`,
+`keys`), so API modules keep using `DATA.get("shelters")`.
+
+Layers are never mutated in place. A reload builds the new version fully
+and swaps it in with a single assignment, bumping the layer's version
+number; readers holding the old object keep a consistent copy, and
+`snapshot()` pins one version of every layer a request touches.
+
+Structures computed from a layer (spatial indexes, simplified copies, ...)
+are kept with `derived()` and live exactly as long as the layer version
+they were built from. Load hooks let modules build them as soon as a
+layer is materialized. Their size counts against the budget together
+with the layer's (structures report it as `nbytes`, others are estimated),
+and so does the size of any response cache tracked with track_cache().
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+# Features sampled when estimating the in-memory size of a layer
+_SIZE_SAMPLE = 200
+
+
+def _deep_size(obj):
+    """
+    Approximate memory footprint of a JSON-like object tree in bytes.
+
+    Long lists are extrapolated from an evenly spaced sample of items.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += sys.getsizeof(k) + _deep_size(v)
+    elif isinstance(obj, (list, tuple)) and obj:
+        sample = obj[::max(1, len(obj) // _SIZE_SAMPLE)]
+        size += int(sum(_deep_size(v) for v in sample) * len(obj) / len(sample))
+    return size
+
+
+def estimate_size(layer):
+    """
+    Estimate the in-memory size of a loaded layer.
+
+    Walks an evenly spaced sample of features and extrapolates, so the cost
+    does not grow with the layer.
+
+    Args:
+        layer (dict | list | None): GeoJSON FeatureCollection, or a list of them
+
+    Returns:
+        int: Estimated bytes
+    """
+    if layer is None:
+        return 0
+    if isinstance(layer, list):
+        return sys.getsizeof(layer) + sum(estimate_size(item) for item in layer)
+    if not isinstance(layer, dict) or not isinstance(layer.get("features"), list):
+        return _deep_size(layer)
+
+    features = layer["features"]
+    n = len(features)
+    if n == 0:
+        return _deep_size(layer)
+
+    step = max(1, n // _SIZE_SAMPLE)
+    sample = features[::step]
+    per_feature = sum(_deep_size(f) for f in sample) / len(sample)
+    return int(per_feature * n) + sys.getsizeof(features) + sys.getsizeof(layer)
+
+
+def derived_size(value):
+    """
+    Memory held by a derived structure: its `nbytes` when it reports one,
+    otherwise estimated like a layer.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    return estimate_size(value)
+
+
+class _Resident:
+    """A materialized layer and its bookkeeping."""
+
+    __slots__ = ("value", "nbytes", "loaded_at", "last_access", "hits")
+
+    def __init__(self, value, nbytes):
+        self.value = value
+        self.nbytes = nbytes
+        self.loaded_at = time.time()
+        self.last_access = self.loaded_at
+        self.hits = 0
+
+
+class LayerRegistry:
+    """
+    Dict-like registry that loads layers on first access and evicts cold
+    layers under a memory budget.
+    """
+
+    def __init__(self, memory_budget=0):
+        """
+        Args:
+            memory_budget (int): Budget in bytes for resident layers (0 = unlimited)
+        """
+        self.memory_budget = memory_budget
+        self._loaders = {}
+        self._resident = OrderedDict()   # LRU order: coldest first
+        self._pinned = set()
+        self._load_locks = {}
+        self._versions = {}
+        self._derived = {}               # (key, name) -> (version, value)
+        self._load_hooks = []
+        self._caches = []
+        self._lock = threading.RLock()
+        self.loads = 0
+        self.evictions = 0
+
+    # ---------- Registration ----------
+
+    def register(self, key, loader, pinned=False):
+        """
+        Register a layer loader. Any resident copy of the layer is dropped.
+
+        Args:
+            key (str): Layer key
+            loader (callable): Zero-argument function returning the layer
+            pinned (bool): Never evict this layer once loaded
+        """
+        with self._lock:
+            self._loaders[key] = loader
+            self._resident.pop(key, None)
+            self._load_locks.setdefault(key, threading.Lock())
+            if pinned:
+                self._pinned.add(key)
+            else:
+                self._pinned.discard(key)
+
+    def clear(self):
+        """Forget every loader and resident layer."""
+        with self._lock:
+            # Anything cached against the old layers must not match again
+            for key in {*self._versions, *self._loaders, *self._resident}:
+                self._versions[key] = self._versions.get(key, 0) + 1
+            self._loaders.clear()
+            self._resident.clear()
+            self._pinned.clear()
+            self._derived.clear()
+
+    # ---------- Dict interface ----------
+
+    def get(self, key, default=None):
+        """Return a layer, loading it if needed, or default if unknown."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        return self.get_versioned(key)[0]
+
+    def get_versioned(self, key):
+        """
+        Return (layer, version) read atomically, loading the layer if needed.
+
+        Raises:
+            KeyError: If the layer is neither registered nor stored
+        """
+        with self._lock:
+            entry = self._resident.get(key)
+            if entry is not None:
+                self._touch(key, entry)
+                return entry.value, self._versions.get(key, 0)
+            if key not in self._loaders:
+                raise KeyError(key)
+            load_lock = self._load_locks[key]
+
+        # Load outside the registry lock so other layers stay available;
+        # the per-layer lock makes concurrent first accesses load only once
+        with load_lock:
+            while True:
+                with self._lock:
+                    entry = self._resident.get(key)
+                    if entry is not None:
+                        self._touch(key, entry)
+                        return entry.value, self._versions.get(key, 0)
+                    loader = self._loaders.get(key)
+                    version = self._versions.get(key, 0)
+
+                if loader is None:
+                    raise KeyError(key)
+
+                value = loader()
+
+                with self._lock:
+                    # The source changed while loading: load it again
+                    if self._versions.get(key, 0) != version:
+                        continue
+                    self._store(key, value)
+
+                self._run_load_hooks(key, value)
+                return value, version
+
+    def __setitem__(self, key, value):
+        """Store a layer directly. Layers without a loader are never evicted."""
+        self.put(key, value)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._loaders or key in self._resident
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        with self._lock:
+            return list(dict.fromkeys([*self._loaders, *self._resident]))
+
+    def put(self, key, value, nbytes=None):
+        """
+        Make a loaded layer resident and enforce the memory budget.
+
+        Args:
+            key (str): Layer key
+            value: Layer object
+            nbytes (int, optional): Size estimate (computed when omitted)
+        """
+        self._store(key, value, nbytes)
+        self._run_load_hooks(key, value)
+
+    def _store(self, key, value, nbytes=None):
+        if nbytes is None:
+            nbytes = estimate_size(value)
+
+        with self._lock:
+            self._resident[key] = _Resident(value, nbytes)
+            self._resident.move_to_end(key)
+            self.loads += 1
+            self._enforce_budget(keep=key)
+
+    # ---------- Versions and reloads ----------
+
+    def version(self, key):
+        """Version number of a layer; it changes whenever the layer is replaced."""
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def swap(self, key, value, nbytes=None):
+        """
+        Atomically publish a new version of a layer.
+
+        The value must be fully built before calling; readers see either
+        the old object or the new one, never a partially updated layer.
+        """
+        if nbytes is None:
+            nbytes = estimate_size(value)
+
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._drop_derived(key)
+            self._store(key, value, nbytes)
+
+        self._run_load_hooks(key, value)
+
+    def loader_for(self, key):
+        """Registered loader of a layer, or None."""
+        with self._lock:
+            return self._loaders.get(key)
+
+    def invalidate(self, key):
+        """Mark a layer's source as changed; a resident copy is dropped."""
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._resident.pop(key, None)
+            self._drop_derived(key)
+
+    def snapshot(self):
+        """Consistent read-only view for one request (see LayerSnapshot)."""
+        return LayerSnapshot(self)
+
+    # ---------- Derived structures ----------
+
+    def derived(self, key, name, build):
+        """
+        Return a structure computed from a layer, building it once per
+        layer version.
+
+        Args:
+            key (str): Layer key
+            name (str): Name of the derived structure (e.g. "index")
+            build (callable): Called with the layer to compute the structure
+
+        Returns:
+            The cached or freshly built structure
+        """
+        value, version = self.get_versioned(key)
+
+        with self._lock:
+            cached = self._derived.get((key, name))
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        result = build(value)
+
+        with self._lock:
+            # Only keep it if the layer was not replaced or evicted meanwhile
+            if self._versions.get(key, 0) == version and key in self._resident:
+                self._derived[(key, name)] = (version, result)
+                self._enforce_budget(keep=key)
+        return result
+
+    def add_load_hook(self, hook):
+        """
+        Call hook(key, layer) whenever a layer is loaded or swapped in,
+        e.g. to build derived structures at load time. Hooks survive clear().
+        """
+        self._load_hooks.append(hook)
+
+    def track_cache(self, cache):
+        """
+        Count a cache's memory against the budget. The cache reports its
+        size as `nbytes`, drops its coldest entries with shrink(nbytes),
+        and calls enforce_budget() after growing (outside its own lock).
+        Tracked caches survive clear().
+        """
+        with self._lock:
+            self._caches.append(cache)
+        cache.registry = self
+
+    def _run_load_hooks(self, key, value):
+        for hook in list(self._load_hooks):
+            try:
+                hook(key, value)
+            except Exception as e:
+                print(f"[ERROR] Load hook {getattr(hook, '__name__', hook)} failed for '{key}': {e}")
+
+    def _drop_derived(self, key):
+        for derived_key in [k for k in self._derived if k[0] == key]:
+            del self._derived[derived_key]
+
+    # ---------- Residency ----------
+
+    def is_resident(self, key):
+        with self._lock:
+            return key in self._resident
+
+    def evict(self, key):
+        """Drop a resident layer; it reloads on next access if it has a loader."""
+        with self._lock:
+            if key in self._loaders and self._resident.pop(key, None) is not None:
+                self._drop_derived(key)
+                self.evictions += 1
+                return True
+            return False
+
+    def resident_bytes(self):
+        """Bytes counted against the budget: layers, derived structures and tracked caches."""
+        with self._lock:
+            return sum(self._layer_bytes(key) for key in self._resident) + self._cache_bytes()
+
+    def _derived_bytes(self, key):
+        # Measured on demand: structures such as the road graph grow caches lazily
+        return sum(derived_size(v[1]) for k, v in list(self._derived.items()) if k[0] == key)
+
+    def _layer_bytes(self, key):
+        return self._resident[key].nbytes + self._derived_bytes(key)
+
+    def _cache_bytes(self):
+        return sum(cache.nbytes for cache in self._caches)
+
+    def resident(self):
+        """
+        Report what is currently in memory.
+
+        Returns:
+            dict: Budget, totals and per-layer size/age/hit counts
+        """
+        now = time.time()
+        with self._lock:
+            layers = {
+                key: {
+                    "bytes": entry.nbytes,
+                    "derived_bytes": self._derived_bytes(key),
+                    "hits": entry.hits,
+                    "idle_seconds": round(now - entry.last_access, 1),
+                    "pinned": key in self._pinned or key not in self._loaders,
+                }
+                for key, entry in reversed(self._resident.items())
+            }
+            cache_bytes = self._cache_bytes()
+            return {
+                "memory_budget_bytes": self.memory_budget,
+                "resident_bytes": sum(v["bytes"] + v["derived_bytes"] for v in layers.values()) + cache_bytes,
+                "cache_bytes": cache_bytes,
+                "resident": layers,
+                "registered": sorted(self._loaders),
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def _touch(self, key, entry):
+        entry.hits += 1
+        entry.last_access = time.time()
+        self._resident.move_to_end(key)
+
+    def enforce_budget(self):
+        """Evict cold layers (then cache entries) until within the budget."""
+        with self._lock:
+            self._enforce_budget()
+
+    def _enforce_budget(self, keep=None):
+        if not self.memory_budget:
+            return
+
+        sizes = {key: self._layer_bytes(key) for key in self._resident}
+        total = sum(sizes.values()) + self._cache_bytes()
+        for key in list(self._resident):
+            if total <= self.memory_budget:
+                return
+            if key == keep or key in self._pinned or key not in self._loaders:
+                continue
+            del self._resident[key]
+            self._drop_derived(key)
+            total -= sizes[key]
+            self.evictions += 1
+            print(f"[EVICT] {key} (resident {total / 1_048_576:.1f} MB)")
+
+        # Only pinned and in-use layers left: shrink the caches instead
+        for cache in self._caches:
+            if total <= self.memory_budget:
+                return
+            before = cache.nbytes
+            cache.shrink(max(0, before - (total - self.memory_budget)))
+            total -= before - cache.nbytes
+
+
+class LayerSnapshot:
+    """
+    Read-only view over a LayerRegistry that pins the first version of
+    each layer it returns, so one request never mixes two versions of a
+    layer that is reloaded while the request is running.
+    """
+
+    def __init__(self, registry):
+        self._registry = registry
+        self._seen = {}
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if key not in self._seen:
+            self._seen[key] = self._registry.get_versioned(key)
+        return self._seen[key][0]
+
+    def __contains__(self, key):
+        return key in self._seen or key in self._registry
+
+    def version(self, key):
+        """Version of the copy this snapshot returns for key."""
+        self.get(key)
+        return self._seen[key][1] if key in self._seen else self._registry.version(key)
@@ -0,0 +1,746 @@
+"""
+Road Graph Module
+=================
+Compact routing graph compiled once from the road network layer.
+
+Road vertices are merged into integer node ids (coordinates are matched
+on a 1e-7 degree grid) and every consecutive vertex pair becomes an
+undirected edge. Adjacency is stored in compressed sparse row (CSR) form:
+the directed arcs leaving node u are positions indptr[u]..indptr[u+1]-1
+of the `heads` (neighbour node) and `arc_edge` (edge id) arrays. Edge
+attributes (length in metres, source road, road type, blocked flag) live
+in parallel NumPy arrays indexed by edge id.
+
+Route endpoints are snapped onto the nearest edge through an STRtree over
+the edge segments, and the edge is split virtually at the projected point
+(EdgeSnap): searches start from and end at both of its end nodes, offset
+by the partial edge lengths, so a point halfway along a long road is not
+routed from a far junction.
+
+The graph is a derived structure of the "roads" layer, compiled once per
+layer version and shared by all requests. It is never modified: per-request
+state (blocked edges, alternative weights) is passed into the searches.
+"""
+
+import heapq
+import math
+from array import array
+
+import numpy as np
+import shapely
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
+
+import config
+from backend.core.data_loader import DATA
+from backend.core.facility_index import EARTH_RADIUS_KM, to_unit_vectors
+from backend.core.layer_index import geometry_nbytes
+
+# Vertices closer than this (in degrees) become one node
+COORD_PRECISION = 1e-7
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    """Great-circle distance in metres (vectorized)."""
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2000 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _categories(values):
+    """Encode a list of labels as (int16 codes, list of names)."""
+    names, codes = {}, np.empty(len(values), dtype=np.int16)
+    for i, value in enumerate(values):
+        codes[i] = names.setdefault(value, len(names))
+    return codes, list(names)
+
+
+def _lines(geometry):
+    kind = geometry.get("type") if geometry else None
+    if kind == "LineString":
+        return [geometry["coordinates"]]
+    if kind == "MultiLineString":
+        return geometry["coordinates"]
+    return []
+
+
+class RoadGraph:
+    """
+    Undirected road network with integer nodes and CSR adjacency.
+    """
+
+    def __init__(self, node_lonlat, edge_u, edge_v, edge_road, road_types, road_blocked, road_conditions):
+        """
+        Args:
+            node_lonlat (np.ndarray): (n, 2) node coordinates
+            edge_u, edge_v (np.ndarray): Endpoint node ids per edge
+            edge_road (np.ndarray): Source road (feature) index per edge
+            road_types, road_blocked, road_conditions (list): Per-road attributes
+        """
+        self.node_lonlat = np.ascontiguousarray(node_lonlat, dtype=np.float64)
+        self.edge_u = np.asarray(edge_u, dtype=np.int64)
+        self.edge_v = np.asarray(edge_v, dtype=np.int64)
+        self.edge_road = np.asarray(edge_road, dtype=np.int64)
+
+        u, v = self.node_lonlat[self.edge_u], self.node_lonlat[self.edge_v]
+        self.edge_length = haversine_m(u[:, 0], u[:, 1], v[:, 0], v[:, 1])
+
+        type_codes, self.road_type_names = _categories(road_types)
+        condition_codes, self.condition_names = _categories(road_conditions)
+        self.edge_road_type = type_codes[self.edge_road] if len(self.edge_road) else type_codes[:0]
+        self.edge_condition = condition_codes[self.edge_road] if len(self.edge_road) else condition_codes[:0]
+        self.edge_blocked = np.asarray(road_blocked, dtype=bool)[self.edge_road] if len(self.edge_road) else np.zeros(0, bool)
+
+        # CSR over both directions of every edge
+        n = len(self.node_lonlat)
+        tails = np.concatenate([self.edge_u, self.edge_v])
+        heads = np.concatenate([self.edge_v, self.edge_u])
+        arc_edge = np.concatenate([np.arange(len(self.edge_u)), np.arange(len(self.edge_u))])
+        order = np.argsort(tails, kind="stable")
+        self.heads = heads[order]
+        self.arc_edge = arc_edge[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=n), out=self.indptr[1:])
+
+        self._tree = None
+        self._segments = None
+        self._segment_tree = None
+        self._closed = None
+        self._csgraph = None
+        self._landmarks = None
+        self._xyz = None
+        self._arrays = None
+
+    @classmethod
+    def from_geojson(cls, collection):
+        """
+        Compile a road FeatureCollection (LineString/MultiLineString).
+
+        Road attributes are read from the properties "road_type" (falling
+        back to OSM "highway"), "is_blocked" and "condition".
+        """
+        starts, ends, road_ids = [], [], []
+        road_types, road_blocked, road_conditions = [], [], []
+
+        for feature in (collection or {}).get("features", []):
+            road = len(road_types)
+            props = feature.get("properties") or {}
+            road_types.append(props.get("road_type") or props.get("highway") or "unknown")
+            road_blocked.append(bool(props.get("is_blocked", False)))
+            road_conditions.append(props.get("condition") or "unknown")
+
+            for line in _lines(feature.get("geometry")):
+                try:
+                    coords = np.asarray(line, dtype=np.float64)[:, :2]
+                except (ValueError, IndexError):
+                    coords = np.array([c[:2] for c in line], dtype=np.float64).reshape(-1, 2)
+                if len(coords) < 2:
+                    continue
+                starts.append(coords[:-1])
+                ends.append(coords[1:])
+                road_ids.append(np.full(len(coords) - 1, road, dtype=np.int64))
+
+        if not starts:
+            return cls(np.empty((0, 2)), [], [], [], road_types, road_blocked, road_conditions)
+
+        points = np.concatenate([np.concatenate(starts), np.concatenate(ends)])
+        grid = np.rint(points / COORD_PRECISION).astype(np.int64)
+        keys = (grid[:, 0] + 1_800_000_000) * 1_800_000_001 + (grid[:, 1] + 900_000_000)
+        _, first, node_of = np.unique(keys, return_index=True, return_inverse=True)
+
+        m = len(points) // 2
+        edge_u, edge_v = node_of[:m], node_of[m:]
+        edge_road = np.concatenate(road_ids)
+
+        # Zero-length segments (repeated vertices) are not edges
+        keep = edge_u != edge_v
+        return cls(points[first], edge_u[keep], edge_v[keep], edge_road[keep],
+                   road_types, road_blocked, road_conditions)
+
+    # ---------- Size ----------
+
+    @property
+    def num_nodes(self):
+        return len(self.node_lonlat)
+
+    @property
+    def num_edges(self):
+        return len(self.edge_u)
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the graph's arrays and the caches built so far
+        (used by the layer registry).
+        """
+        arrays = [v for v in vars(self).values() if isinstance(v, np.ndarray) and v.dtype != object]
+        total = sum(a.nbytes for a in arrays)
+        for flat in (self._arrays, self._xyz):
+            total += sum(a.itemsize * len(a) for a in flat or ())
+        if self._landmarks is not None:
+            total += 2 * self._landmarks[1].nbytes
+        if self._segments is not None:
+            total += geometry_nbytes(self._segments)
+        if self._tree is not None:
+            total += self._tree.data.nbytes + self._tree.indices.nbytes
+        if self._csgraph is not None:
+            total += self._csgraph.data.nbytes + self._csgraph.indices.nbytes + self._csgraph.indptr.nbytes
+        if self._closed is not None:
+            total += 8 * len(self._closed)
+        return total
+
+    def __len__(self):
+        return self.num_nodes
+
+    # ---------- Lookups ----------
+
+    def nearest_node(self, lon, lat):
+        """Node id closest to a coordinate (great-circle), or None if empty."""
+        if not self.num_nodes:
+            return None
+        return int(self.nearest_nodes([lon], [lat])[0])
+
+    def nearest_nodes(self, lons, lats):
+        """
+        Node ids closest to many coordinates, in one tree query.
+
+        Args:
+            lons, lats (array-like): Coordinates in degrees
+
+        Returns:
+            np.ndarray: Node id per coordinate (graph must not be empty)
+        """
+        if self._tree is None:
+            self._tree = cKDTree(to_unit_vectors(self.node_lonlat[:, 0], self.node_lonlat[:, 1]))
+        _, nodes = self._tree.query(to_unit_vectors(lons, lats))
+        return np.asarray(nodes, dtype=np.int64).reshape(-1)
+
+    def snap(self, lon, lat):
+        """
+        Project a coordinate onto the nearest road edge (see snap_many()).
+
+        Args:
+            lon, lat (float): Coordinate in degrees
+
+        Returns:
+            EdgeSnap | None: None if the graph has no edges
+        """
+        if not self.num_edges:
+            return None
+        return self.snap_many([lon], [lat])[0]
+
+    def snap_many(self, lons, lats):
+        """
+        Project many coordinates onto their nearest road edges at once.
+
+        Candidates come from the segment STRtree: the nearest segment in
+        degrees, then every segment that could be nearer in metres (a
+        degree of longitude is shorter than one of latitude). Each is
+        projected in a local equirectangular frame and the closest
+        projection by haversine distance wins.
+
+        Args:
+            lons, lats (array-like): Coordinates in degrees (graph must
+                have edges)
+
+        Returns:
+            list: EdgeSnap per coordinate
+        """
+        lons = np.asarray(lons, dtype=np.float64).reshape(-1)
+        lats = np.asarray(lats, dtype=np.float64).reshape(-1)
+        if not len(lons):
+            return []
+        tree = self._segment_index()
+        points = shapely.points(lons, lats)
+        (which, nearest), reach = tree.query_nearest(points, return_distance=True)
+        # Ties return several segments per point: keep the first
+        first = np.unique(which, return_index=True)[1]
+        which, nearest, reach = which[first], nearest[first], reach[first]
+        reach = reach / np.maximum(np.cos(np.radians(lats)), 1e-6)
+        point_of, candidates = tree.query(points, predicate="dwithin", distance=reach * (1 + 1e-9))
+        # The nearest segment in degrees is always a candidate
+        point_of = np.concatenate([point_of, which])
+        candidates = np.concatenate([candidates, nearest])
+
+        a = self.node_lonlat[self.edge_u[candidates]]
+        b = self.node_lonlat[self.edge_v[candidates]]
+        p = np.column_stack([lons, lats])[point_of]
+        scale = np.column_stack([np.cos(np.radians(p[:, 1])), np.ones(len(p))])
+        ab, ap = (b - a) * scale, (p - a) * scale
+        denom = np.einsum("ij,ij->i", ab, ab)
+        fraction = np.clip(np.einsum("ij,ij->i", ap, ab) / np.where(denom > 0, denom, 1.0), 0.0, 1.0)
+        projected = a + fraction[:, None] * (b - a)
+        distance = haversine_m(p[:, 0], p[:, 1], projected[:, 0], projected[:, 1])
+
+        # Closest candidate per point
+        order = np.lexsort((distance, point_of))
+        best = order[np.unique(point_of[order], return_index=True)[1]]
+        edges = candidates[best]
+        return [
+            EdgeSnap(e, u, v, f, length, tuple(xy), d)
+            for e, u, v, f, length, xy, d in zip(
+                edges.tolist(), self.edge_u[edges].tolist(), self.edge_v[edges].tolist(),
+                fraction[best].tolist(), self.edge_length[edges].tolist(),
+                projected[best].tolist(), distance[best].tolist(),
+            )
+        ]
+
+    def edge_segments(self):
+        """Two-point LineString of every edge, indexed by edge id (built lazily)."""
+        if self._segments is None:
+            coords = np.stack([self.node_lonlat[self.edge_u], self.node_lonlat[self.edge_v]], axis=1)
+            self._segments = shapely.linestrings(coords)
+        return self._segments
+
+    def edges_touching(self, geometries):
+        """
+        Edge hits of a set of geometries.
+
+        Args:
+            geometries: Shapely geometry or array of geometries in lon/lat
+
+        Returns:
+            tuple: (geometry indices, edge ids) of every intersecting pair
+        """
+        geometries = np.atleast_1d(np.asarray(geometries, dtype=object))
+        if not len(geometries) or not self.num_edges:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return self._segment_index().query(geometries, predicate="intersects")
+
+    def _segment_index(self):
+        if self._segment_tree is None:
+            self._segment_tree = shapely.STRtree(self.edge_segments())
+        return self._segment_tree
+
+    def edges_intersecting(self, geometries):
+        """
+        Edges that touch any of a set of geometries.
+
+        Args:
+            geometries: Shapely geometry or array of geometries in lon/lat
+
+        Returns:
+            np.ndarray: Boolean mask over edge ids
+        """
+        mask = np.zeros(self.num_edges, dtype=bool)
+        mask[self.edges_touching(geometries)[1]] = True
+        return mask
+
+    def closed_edges(self):
+        """Blocked roads as a per-edge bool list for the searches (built once)."""
+        if self._closed is None:
+            self._closed = self.edge_blocked.tolist()
+        return self._closed
+
+    def neighbors(self, node):
+        """(neighbour node ids, edge ids) of a node."""
+        lo, hi = self.indptr[node], self.indptr[node + 1]
+        return self.heads[lo:hi], self.arc_edge[lo:hi]
+
+    def _search_arrays(self):
+        # Scalar access to NumPy arrays is slow in a Python loop; the
+        # searches read flat array.array copies instead
+        if self._arrays is None:
+            self._arrays = (
+                array("q", self.indptr.tobytes()),
+                array("q", self.heads.astype(np.int64).tobytes()),
+                array("q", self.arc_edge.astype(np.int64).tobytes()),
+                array("d", self.edge_length.tobytes()),
+            )
+        return self._arrays
+
+    def to_csgraph(self, blocked=None):
+        """
+        Symmetric sparse matrix of edge lengths for scipy.sparse.csgraph
+        (parallel edges keep the shortest).
+
+        Args:
+            blocked (sequence, optional): bool per edge id; blocked edges
+                are left out. The unblocked matrix is built once.
+
+        Returns:
+            scipy.sparse.csr_matrix
+        """
+        if blocked is None and self._csgraph is not None:
+            return self._csgraph
+
+        n = self.num_nodes
+        tails = np.repeat(np.arange(n), np.diff(self.indptr))
+        heads, lengths = self.heads, self.edge_length[self.arc_edge]
+        if blocked is not None:
+            keep = ~np.asarray(blocked, dtype=bool)[self.arc_edge]
+            tails, heads, lengths = tails[keep], heads[keep], lengths[keep]
+        order = np.lexsort((lengths, heads, tails))
+        tails, heads, lengths = tails[order], heads[order], lengths[order]
+        first = np.ones(len(tails), dtype=bool)
+        first[1:] = (tails[1:] != tails[:-1]) | (heads[1:] != heads[:-1])
+        matrix = csr_matrix((lengths[first], (tails[first], heads[first])), shape=(n, n))
+        if blocked is None:
+            self._csgraph = matrix
+        return matrix
+
+    # ---------- Heuristics ----------
+
+    def landmarks(self, count=16):
+        """
+        ALT landmarks and their distances to every node (computed once).
+
+        Landmarks are picked by farthest selection inside the largest
+        connected component, which spreads them along the network's edges.
+        Distances use edge lengths with every road open, so they stay lower
+        bounds when roads are closed.
+
+        Args:
+            count (int): Number of landmarks
+
+        Returns:
+            tuple: (landmark node ids, (count, n) distance matrix in metres)
+        """
+        # Keyed on the count asked for: the largest component may hold fewer
+        if self._landmarks is not None and self._landmarks[3] >= count:
+            return self._landmarks[:2]
+        if not self.num_nodes:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0))
+
+        matrix = self.to_csgraph()
+        _, labels = connected_components(matrix, directed=False)
+        main = labels == np.bincount(labels).argmax()
+
+        chosen, rows = [], []
+        nearest = np.where(main, np.inf, -1.0)
+        start = int(np.flatnonzero(main)[0])
+        seed = dijkstra(matrix, directed=False, indices=start)
+        candidate = int(np.argmax(np.where(main, seed, -1)))
+        for _ in range(min(count, int(main.sum()))):
+            row = dijkstra(matrix, directed=False, indices=candidate)
+            chosen.append(candidate)
+            rows.append(row)
+            nearest = np.minimum(nearest, np.where(main, row, -1.0))
+            candidate = int(np.argmax(nearest))
+
+        # Nodes a landmark cannot reach lie in another component than the
+        # ones it can; a bound of 0 there is harmless since no path exists
+        distances = np.vstack(rows)
+        distances[np.isinf(distances)] = 0.0
+        # Flat copies for the heuristic's scalar reads, made once
+        self._landmarks = (np.array(chosen, dtype=np.int64), distances,
+                           [array("d", row.tobytes()) for row in distances], count)
+        return self._landmarks[:2]
+
+    def heuristic(self, target, landmarks=0):
+        """
+        Admissible, consistent A* heuristic towards a node, in metres.
+
+        The straight chord through the Earth between two nodes is never
+        longer than a road path between them. With landmarks, the ALT
+        bound max |d(L, target) - d(L, v)| is used when it is larger.
+
+        Args:
+            target (int | dict): Target node id, or {node: remaining cost}
+                for the ends of a snapped point (the bound is the least
+                bound via any of them)
+            landmarks (int): Number of ALT landmarks (0 for none)
+
+        Returns:
+            callable: heuristic(node) -> lower bound in metres
+        """
+        if isinstance(target, dict):
+            bounds = [(self.heuristic(t, landmarks), rest) for t, rest in target.items()]
+            if len(bounds) == 1:
+                (bound, rest), = bounds
+                return lambda v: bound(v) + rest
+            return lambda v: min(bound(v) + rest for bound, rest in bounds)
+
+        if self._xyz is None:
+            xyz = to_unit_vectors(self.node_lonlat[:, 0], self.node_lonlat[:, 1]) * (1000 * EARTH_RADIUS_KM)
+            self._xyz = tuple(array("d", np.ascontiguousarray(col).tobytes()) for col in xyz.T)
+        xs, ys, zs = self._xyz
+        tx, ty, tz = xs[target], ys[target], zs[target]
+        sqrt = math.sqrt
+
+        if not landmarks:
+            def chord(v):
+                return sqrt((xs[v] - tx) ** 2 + (ys[v] - ty) ** 2 + (zs[v] - tz) ** 2)
+            return chord
+
+        self.landmarks(landmarks)
+        pairs = [(row, row[target]) for row in self._landmarks[2][:landmarks]]
+
+        def alt(v):
+            best = sqrt((xs[v] - tx) ** 2 + (ys[v] - ty) ** 2 + (zs[v] - tz) ** 2)
+            for row, dt in pairs:
+                d = row[v] - dt
+                if d < 0:
+                    d = -d
+                if d > best:
+                    best = d
+            return best
+        return alt
+
+    # ---------- Search ----------
+
+    def search(self, source, target=None, weights=None, blocked=None, heuristic=None):
+        """
+        Dijkstra (or A* when a heuristic is given) from a source node.
+
+        One search yields the costs, the predecessor tree and the search
+        space size; paths are read from the tree without searching again.
+
+        Args:
+            source (int | dict): Node id, or {node: initial cost} to start
+                from several nodes (the ends of a snapped point)
+            target (int | dict, optional): Stop once this node is settled;
+                or {node: remaining cost}: stop once no path through these
+                nodes can beat the best found (default: settle every
+                reachable node)
+            weights (sequence, optional): Cost per edge id (default: length)
+            blocked (sequence, optional): Truthy per edge id to skip it
+            heuristic (callable, optional): heuristic(node) -> lower bound
+                of the remaining cost to target
+
+        Returns:
+            SearchTree
+        """
+        indptr, heads, arc_edge, lengths = self._search_arrays()
+        if weights is None:
+            weights = lengths
+
+        dist = dict(source) if isinstance(source, dict) else {source: 0.0}
+        pred = {}
+        done = set()
+        heap = [(d + heuristic(v) if heuristic else d, v) for v, d in dist.items()]
+        heapq.heapify(heap)
+        push, pop = heapq.heappush, heapq.heappop
+        relaxed = 0
+        targets = target if isinstance(target, dict) else None
+        best = float("inf")
+
+        while heap:
+            key, u = pop(heap)
+            if u in done:
+                continue
+            if u == target:
+                break
+            if targets is not None:
+                if key >= best:
+                    break
+                if u in targets:
+                    best = min(best, dist[u] + targets[u])
+            done.add(u)
+
+            du = dist[u]
+            relaxed += indptr[u + 1] - indptr[u]
+            for k in range(indptr[u], indptr[u + 1]):
+                e = arc_edge[k]
+                if blocked is not None and blocked[e]:
+                    continue
+                v = heads[k]
+                nd = du + weights[e]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    pred[v] = (u, e)
+                    push(heap, (nd + heuristic(v) if heuristic else nd, v))
+
+        return SearchTree(source, dist, pred, {"settled_nodes": len(done), "relaxed_edges": relaxed})
+
+    def shortest_path(self, source, target, weights=None, blocked=None, heuristic=None, stats=None):
+        """
+        Shortest path between two nodes (see search()).
+
+        Args:
+            source, target (int | dict): Node ids, or {node: cost} of
+                several ends (see search()); the cost includes them
+            weights, blocked, heuristic: As for search()
+            stats (dict, optional): Filled with the search space size
+                ("settled_nodes", "relaxed_edges")
+
+        Returns:
+            tuple | None: (cost, node ids, edge ids), or None if unreachable
+        """
+        tree = self.search(source, target, weights, blocked, heuristic)
+        if stats is not None:
+            stats.update(tree.stats)
+        ends = target if isinstance(target, dict) else {target: 0.0}
+        reached = [(tree.cost(t) + rest, t) for t, rest in ends.items() if t in tree.dist]
+        if not reached:
+            return None
+        cost, end = min(reached)
+        return (cost, *tree.path_to(end))
+
+    def snapped_path(self, start, end, weights=None, blocked=None, heuristic=None, stats=None):
+        """
+        Shortest path between two snapped points (see snap()).
+
+        The snapped edges are split virtually: the search starts from both
+        ends of start's edge, each at the cost of the partial edge, and
+        ends at either end of end's edge likewise. The partial edges are
+        used even if their edge is blocked, since the points lie on them.
+
+        Args:
+            start, end (EdgeSnap): Snapped endpoints
+            weights, blocked, heuristic, stats: As for shortest_path()
+                (heuristic towards end.ends(weights))
+
+        Returns:
+            tuple | None: (cost, node ids, edge ids) between the nodes
+            where the path leaves start's edge and joins end's; empty
+            node and edge lists when going directly along a shared edge.
+            segments(nodes, edges, start, end) adds the partial edges.
+        """
+        found = self.shortest_path(start.ends(weights), end.ends(weights), weights, blocked, heuristic, stats)
+        direct = start.direct_cost(end, weights)
+        if direct <= (found[0] if found else float("inf")):
+            return direct, [], []
+        return found
+
+    def segments(self, nodes, edges, start=None, end=None):
+        """
+        Per-segment attributes of a path, gathered from the edge arrays.
+
+        Args:
+            nodes (sequence): Node ids along the path
+            edges (sequence): Edge ids between consecutive nodes
+            start, end (EdgeSnap, optional): Snapped endpoints of the path
+                (see snapped_path()); their partial edges become the first
+                and last segments
+
+        Returns:
+            dict: Arrays "from" and "to" ((m, 2) lon/lat), "edge" (ids),
+            "length" (metres), "road_type", "condition" (names) and
+            "cumulative" (metres at the end of each segment)
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        edges = np.asarray(edges, dtype=np.int64)
+        coords = self.node_lonlat[nodes]
+        length = self.edge_length[edges]
+
+        if start is not None and end is not None and not len(nodes):
+            coords = np.array([start.lonlat, end.lonlat])
+            edges = np.array([start.edge], dtype=np.int64)
+            length = np.array([start.direct_cost(end)])
+        else:
+            if start is not None and start.ends()[nodes[0]] > 0:
+                coords = np.vstack([start.lonlat, coords])
+                edges = np.concatenate([[start.edge], edges])
+                length = np.concatenate([[start.ends()[nodes[0]]], length])
+            if end is not None and end.ends()[nodes[-1]] > 0:
+                coords = np.vstack([coords, end.lonlat])
+                edges = np.concatenate([edges, [end.edge]])
+                length = np.concatenate([length, [end.ends()[nodes[-1]]]])
+        return {
+            "from": coords[:-1],
+            "to": coords[1:],
+            "edge": edges,
+            "length": length,
+            "road_type": np.asarray(self.road_type_names, dtype=object)[self.edge_road_type[edges]],
+            "condition": np.asarray(self.condition_names, dtype=object)[self.edge_condition[edges]],
+            "cumulative": np.cumsum(length),
+        }
+
+
+class EdgeSnap:
+    """
+    A point projected onto a road edge: a virtual node splitting the edge.
+    """
+
+    def __init__(self, edge, u, v, fraction, length, lonlat, distance_m):
+        """
+        Args:
+            edge (int): Edge id
+            u, v (int): Edge end nodes (edge_u, edge_v)
+            fraction (float): Position along the edge from u (0-1)
+            length (float): Edge length in metres
+            lonlat (tuple): Projected point
+            distance_m (float): Distance from the query point to lonlat
+        """
+        self.edge = edge
+        self.u = u
+        self.v = v
+        self.fraction = fraction
+        self.length = length
+        self.lonlat = lonlat
+        self.distance_m = distance_m
+
+    def ends(self, weights=None):
+        """
+        Cost from the point to each end of its edge.
+
+        Args:
+            weights (sequence, optional): Cost per edge id (default: length);
+                the edge's cost is split in proportion
+
+        Returns:
+            dict: {node: cost}
+        """
+        cost = self.length if weights is None else weights[self.edge]
+        if self.u == self.v:
+            return {self.u: cost * min(self.fraction, 1 - self.fraction)}
+        return {self.u: cost * self.fraction, self.v: cost * (1 - self.fraction)}
+
+    def direct_cost(self, other, weights=None):
+        """Cost along the edge to another snap on the same edge (inf otherwise)."""
+        if other.edge != self.edge:
+            return float("inf")
+        cost = self.length if weights is None else weights[self.edge]
+        return cost * abs(other.fraction - self.fraction)
+
+
+class SearchTree:
+    """
+    Costs and predecessor edges grown by one search from a source.
+    """
+
+    def __init__(self, source, dist, pred, stats):
+        """
+        Args:
+            source (int | dict): Source node id (or {node: initial cost})
+            dist (dict): Node -> cost of the best path found
+            pred (dict): Node -> (previous node, edge id) on that path
+            stats (dict): Search space size
+        """
+        self.source = source
+        self.dist = dist
+        self.pred = pred
+        self.stats = stats
+
+    def cost(self, node):
+        """Cost of the best path to node (inf when not reached)."""
+        return self.dist.get(node, float("inf"))
+
+    def path_to(self, node):
+        """
+        Path from the source to node.
+
+        Returns:
+            tuple | None: (node ids, edge ids), or None if not reached
+        """
+        if node not in self.dist:
+            return None
+        nodes, edges = [node], []
+        while nodes[-1] in self.pred:
+            u, e = self.pred[nodes[-1]]
+            nodes.append(u)
+            edges.append(e)
+        nodes.reverse()
+        edges.reverse()
+        return nodes, edges
+
+
+def _compile(collection):
+    graph = RoadGraph.from_geojson(collection)
+    if config.ROUTING_ALGORITHM == "alt":
+        # Part of compiling, so no query pays for the landmark searches
+        graph.landmarks(config.ROUTING_LANDMARKS)
+    return graph
+
+
+def get_road_graph():
+    """
+    Routing graph of the "roads" layer (compiled once per layer version,
+    with its ALT landmarks when ROUTING_ALGORITHM = 'alt').
+
+    Returns:
+        RoadGraph: Empty when the road file is missing
+    """
+    return DATA.derived("roads", "graph", _compile)
@@ -0,0 +1,122 @@
+"""
+Route Cache Module
+==================
+LRU cache of searched route paths keyed by snapped endpoints.
+
+Evacuees from one village asking for the same shelter snap to the same
+stretches of road and share one search. Paths are cached under
+(profile, start, end), where the endpoints are snapped positions on road
+edges rounded to a few metres and the profile holds whatever else changes
+the answer (algorithm, hazard avoidance). Only the path between the two
+snapped edges is cached; each request cuts the first and last partial
+edges at its own points (see route_optimizer.route_along()), so a hit
+never returns another requester's coordinates or distance. Each entry is
+stamped with the state it was computed on: the roads layer version and
+the hazard overlay revision. The first request to see a newer stamp
+drops every entry computed on older ones, so hazard updates invalidate
+the cache without any hook. Hits are counted together with the search
+time they saved.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+
+class RouteCache:
+    """
+    LRU cache of paths (including "no route" results) per endpoint pair.
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # (profile, start, end) -> (stamp, path, seconds)
+        self._stamps = {}               # profile -> latest stamp seen
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    def route(self, profile, stamp, start, end, compute):
+        """
+        Return the cached path between two snapped points, computing it on a miss.
+
+        Args:
+            profile (hashable): Routing options that change the result
+            stamp (tuple): Version of the graph and hazards routed on;
+                increases with every change. Requests still holding an
+                older stamp are computed but not cached
+            start, end (hashable): Snapped endpoints (see snap_key())
+            compute (callable): Returns the path (or None); it is shared
+                between requests, so it must not be modified
+
+        Returns:
+            The cached or computed path
+        """
+        key = (profile, start, end)
+        with self._lock:
+            latest = self._stamps.get(profile)
+            if latest is None or stamp > latest:
+                self._invalidate(profile, stamp)
+            cached = self._entries.get(key) if self._stamps[profile] == stamp else None
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += cached[2]
+                return cached[1]
+
+        # Search outside the lock; concurrent misses may both compute
+        started = time.perf_counter()
+        path = compute()
+        seconds = time.perf_counter() - started
+
+        with self._lock:
+            self.misses += 1
+            if self._stamps.get(profile) == stamp:
+                self._entries[key] = (stamp, path, seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return path
+
+    def _invalidate(self, profile, stamp):
+        """Drop the entries of a profile computed on another stamp. Call with the lock held."""
+        stale = [k for k, v in self._entries.items() if k[0] == profile and v[0] != stamp]
+        for key in stale:
+            del self._entries[key]
+        if profile in self._stamps:
+            self.invalidations += 1
+        self._stamps[profile] = stamp
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stamps.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+def snap_key(snap, resolution=25.0):
+    """
+    Cache key of a snapped endpoint: its edge and position along it,
+    rounded to `resolution` metres so neighbouring requests share routes.
+    """
+    return snap.edge, int(snap.fraction * snap.length // resolution)
+
+
+# Shared by every request of this worker
+ROUTE_CACHE = RouteCache(config.ROUTE_CACHE_MAX_ENTRIES)
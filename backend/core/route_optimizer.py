@@ -1,64 +1,35 @@
 """
 Route Optimizer Module
 ======================
-Network analysis and routing using NetworkX.
+Network analysis and routing on the compiled road graph (see road_graph).
 Computes shortest safe evacuation routes avoiding disaster zones.
 """
 
-import networkx as nx
-import geopandas as gpd
-from shapely.geometry import Point, LineString
 import numpy as np
-from backend.core.spatial_analysis import spatial_intersection
+import shapely
+from backend.core.road_graph import EdgeSnap, RoadGraph
+from backend.core.route_safety import SafetyScorer
 import config
 
 
 
 def build_road_network(roads_gdf):
     """
-    Build a NetworkX graph from road GeoDataFrame.
+    Build a routing graph from road GeoDataFrame.
+
+    Requests should use the shared graph of the loaded roads layer
+    (road_graph.get_road_graph()) instead of building one.
 
     Args:
         roads_gdf (GeoDataFrame): Roads with LineString geometries
 
     Returns:
-        nx.Graph: Road network graph
+        RoadGraph: Road network graph
     """
     try:
-
-        G = nx.Graph()
-
-        for idx, road in roads_gdf.iterrows():
-            # Get coordinates from LineString
-            coords = list(road.geometry.coords)
-
-            # Add edges between consecutive points
-            for i in range(len(coords) - 1):
-                start = coords[i]
-                end = coords[i + 1]
-
-                # Calculate edge length (weight)
-                start_point = Point(start)
-                end_point = Point(end)
-                length = start_point.distance(end_point) * 111000  # Rough conversion to meters
-
-                # Add edge attributes
-                edge_attrs = {
-                    'length': length,
-                    'road_id': idx,
-                    'road_type': road.get('road_type', 'unknown'),
-                    'is_blocked': road.get('is_blocked', False),
-                    'condition': road.get('condition', 'unknown'),
-                    'geometry': LineString([start, end])
-                }
-
-                # Add edge to graph
-                G.add_edge(start, end, **edge_attrs)
-
-        return G
-
+        return RoadGraph.from_geojson(roads_gdf.__geo_interface__)
     except Exception as e:
-        return nx.Graph()
+        return RoadGraph.from_geojson(None)
 
 
 def find_nearest_node(graph, point):
@@ -66,155 +37,218 @@ def find_nearest_node(graph, point):
     Find the nearest node in the graph to a given point.
 
     Args:
-        graph (nx.Graph): Road network graph
+        graph (RoadGraph): Road network graph
         point (tuple): (lon, lat) coordinates
 
     Returns:
-        tuple: Nearest node coordinates
+        int: Nearest node id
     """
     try:
-        nodes = np.array(list(graph.nodes()))
-
-        if len(nodes) == 0:
-            return None
+        return graph.nearest_node(point[0], point[1])
+    except Exception as e:
+        return None
 
-        # Calculate distances
-        distances = np.sqrt(
-            (nodes[:, 0] - point[0])**2 +
-            (nodes[:, 1] - point[1])**2
-        )
 
-        # Find nearest
-        nearest_idx = np.argmin(distances)
-        nearest_node = tuple(nodes[nearest_idx])
+def snap_to_road(graph, point):
+    """
+    Snap a point onto the nearest road edge.
 
-        return nearest_node
+    Args:
+        graph (RoadGraph): Road network graph
+        point (tuple | EdgeSnap): (lon, lat) coordinates, or a point
+            already snapped (returned as is)
 
+    Returns:
+        EdgeSnap: Or None if the graph has no edges
+    """
+    if isinstance(point, EdgeSnap):
+        return point
+    try:
+        return graph.snap(float(point[0]), float(point[1]))
     except Exception as e:
         return None
 
 
-def compute_shortest_path(graph, start_point, end_point, algorithm='dijkstra'):
+def _route_result(graph, cost, nodes, edges, start=None, end=None):
+    """Route dict of a node/edge path found in the graph (from/to snapped points)."""
+    segments = graph.segments(nodes, edges, start, end)
+    if len(segments['length']):
+        coordinates = segments['from'].tolist() + [segments['to'][-1].tolist()]
+    else:
+        coordinates = graph.node_lonlat[nodes].tolist() or [list(start.lonlat)]
+    path = [tuple(c) for c in coordinates]
+    total_distance = float(segments['cumulative'][-1]) if len(segments['length']) else 0.0
+
+    # Edge attributes along path, from the edge arrays in one pass
+    path_details = [
+        {'from': a, 'to': b, 'length': length, 'road_type': road_type}
+        for a, b, length, road_type in zip(
+            path[:-1], path[1:], segments['length'].tolist(), segments['road_type'].tolist()
+        )
+    ]
+
+    return {
+        'path': path,
+        'path_coordinates': list(path),
+        'geometry': ({'type': 'LineString', 'coordinates': coordinates} if len(path) > 1
+                     else {'type': 'Point', 'coordinates': coordinates[0]}),
+        'total_distance_meters': round(total_distance, 2),
+        'total_distance_km': round(total_distance / 1000, 2),
+        'num_segments': len(path) - 1,
+        'path_details': path_details
+    }
+
+
+def compute_shortest_path(graph, start_point, end_point, algorithm='dijkstra', blocked=None, hierarchy=None):
     """
     Compute shortest path between two points.
 
+    Both points are snapped onto their nearest road edge, which is split
+    virtually there, so the route starts and ends on the road next to
+    them rather than at the nearest junction.
+
     Args:
-        graph (nx.Graph): Road network graph
-        start_point (tuple): (lon, lat) start coordinates
-        end_point (tuple): (lon, lat) end coordinates
-        algorithm (str): 'dijkstra' or 'astar'
+        graph (RoadGraph): Road network graph
+        start_point (tuple | EdgeSnap): (lon, lat) start coordinates
+        end_point (tuple | EdgeSnap): (lon, lat) end coordinates
+        algorithm (str): 'dijkstra', 'astar', 'alt' (A* with landmarks) or 'ch'
+        blocked (sequence, optional): Truthy per edge id for edges to avoid
+        hierarchy (ContractionHierarchy, optional): Required for 'ch'
+            (falls back to Dijkstra without it)
 
     Returns:
-        dict: Path information including coordinates, distance, and geometry
+        dict: Path information including coordinates, distance, geometry
+        and the size of the search space
     """
     try:
 
-        # Find nearest nodes
-        start_node = find_nearest_node(graph, start_point)
-        end_node = find_nearest_node(graph, end_point)
+        # Snap both points onto the road network
+        start = snap_to_road(graph, start_point)
+        end = snap_to_road(graph, end_point)
 
-        if start_node is None or end_node is None:
+        if start is None or end is None:
             return None
 
-        # Compute shortest path
-        if algorithm == 'astar':
-            # A* requires a heuristic function
-            def heuristic(n1, n2):
-                return np.sqrt((n1[0] - n2[0])**2 + (n1[1] - n2[1])**2)
+        path = find_path(graph, start, end, algorithm, blocked, hierarchy)
+        return route_along(graph, path, start, end) if path is not None else None
 
-            path = nx.astar_path(graph, start_node, end_node, heuristic=heuristic, weight='length')
-        else:
-            # Dijkstra's algorithm
-            path = nx.shortest_path(graph, start_node, end_node, weight='length')
-
-        # Calculate total distance
-        total_distance = nx.shortest_path_length(graph, start_node, end_node, weight='length')
-
-        # Create LineString geometry
-        path_geometry = LineString(path)
-
-        # Get edge attributes along path
-        path_details = []
-        for i in range(len(path) - 1):
-            edge_data = graph.get_edge_data(path[i], path[i + 1])
-            path_details.append({
-                'from': path[i],
-                'to': path[i + 1],
-                'length': edge_data.get('length', 0),
-                'road_type': edge_data.get('road_type', 'unknown')
-            })
-
-        result = {
-            'path': path,
-            'path_coordinates': list(path),
-            'geometry': path_geometry.__geo_interface__,
-            'total_distance_meters': round(total_distance, 2),
-            'total_distance_km': round(total_distance / 1000, 2),
-            'num_segments': len(path) - 1,
-            'path_details': path_details
-        }
-
-        return result
-
-    except nx.NetworkXNoPath:
-        return None
     except Exception as e:
         return None
 
 
-def compute_safe_route(roads_gdf, start_point, end_point, disaster_zones_gdf, buffer_distance=1000):
+def find_path(graph, start, end, algorithm='dijkstra', blocked=None, hierarchy=None):
+    """
+    Search the shortest path between two snapped points.
+
+    Args:
+        graph (RoadGraph): Road network graph
+        start, end (EdgeSnap): Snapped endpoints
+        algorithm, blocked, hierarchy: As for compute_shortest_path()
+
+    Returns:
+        tuple | None: (node ids, edge ids, algorithm, search stats) of the
+        path between the snapped edges (see RoadGraph.snapped_path());
+        route_along() turns it into a route for any points on those edges
+    """
+    stats = {}
+    if algorithm == 'ch' and hierarchy is not None:
+        found = _hierarchy_path(hierarchy, start, end, hierarchy.metric(blocked), stats)
+    else:
+        if algorithm == 'astar':
+            heuristic = graph.heuristic(end.ends())
+        elif algorithm == 'alt':
+            heuristic = graph.heuristic(end.ends(), landmarks=config.ROUTING_LANDMARKS)
+        else:
+            algorithm, heuristic = 'dijkstra', None
+        found = graph.snapped_path(start, end, blocked=blocked, heuristic=heuristic, stats=stats)
+
+    if found is None:
+        return None
+    return found[1], found[2], algorithm, stats
+
+
+def route_along(graph, path, start, end):
+    """
+    Route dict of a path from find_path(), with its partial first and last
+    edges cut at the given snapped points (which may differ from the ones
+    searched, as long as they lie on the same edges).
+    """
+    nodes, edges, algorithm, stats = path
+    result = _route_result(graph, None, nodes, edges, start=start, end=end)
+    result['search_space'] = {'algorithm': algorithm, **stats}
+    result['snap_distance_meters'] = [round(start.distance_m, 2), round(end.distance_m, 2)]
+    return result
+
+
+def _hierarchy_path(hierarchy, start, end, metric, stats):
+    """
+    Best hierarchy path between snapped points: one query per pair of
+    edge ends (hierarchy queries are cheap), or the direct way along a
+    shared edge.
+    """
+    best = (start.direct_cost(end), [], [])
+    for a, to_a in start.ends().items():
+        for b, from_b in end.ends().items():
+            query = {}
+            found = hierarchy.shortest_path(a, b, metric, stats=query)
+            for k, v in query.items():
+                stats[k] = stats.get(k, 0) + v
+            if found is not None and to_a + found[0] + from_b < best[0]:
+                best = (to_a + found[0] + from_b, found[1], found[2])
+    return None if best[0] == float('inf') else best
+
+
+def compute_safe_route(graph, start_point, end_point, disaster_zones_gdf=None, buffer_distance=1000,
+                       algorithm='dijkstra', blocked=None, hierarchy=None):
     """
     Compute a safe evacuation route that avoids disaster zones.
 
+    Roads are not filtered and rebuilt: edges that are blocked or touch a
+    buffered disaster zone are masked out of the search on the shared graph.
+    Standing hazards come precomputed in `blocked` (see hazard_overlay);
+    disaster_zones_gdf is for ad hoc zones and costs an overlay per call.
+
     Args:
-        roads_gdf (GeoDataFrame): Road network
+        graph (RoadGraph): Road network
         start_point (tuple): (lon, lat) start coordinates
         end_point (tuple): (lon, lat) end coordinates
-        disaster_zones_gdf (GeoDataFrame): Active disaster zones
+        disaster_zones_gdf (GeoDataFrame, optional): Extra disaster zones
         buffer_distance (float): Safety buffer around disaster zones in meters
+        algorithm (str): 'dijkstra', 'astar', 'alt' or 'ch'
+        blocked (sequence, optional): Precomputed blocked-edge mask
+            (default: the graph's blocked roads)
+        hierarchy (ContractionHierarchy, optional): Required for 'ch'. Each
+            new mask object costs one customization, so ad hoc zones are
+            better routed without it
 
     Returns:
         dict: Safe route information
     """
     try:
+        if graph.num_edges == 0:
+            return None
 
-        # Filter out roads that intersect disaster zones
-        if len(disaster_zones_gdf) > 0:
+        num_zones = 0 if disaster_zones_gdf is None else len(disaster_zones_gdf)
+        if num_zones > 0:
             # Create buffer around disaster zones
             from backend.core.spatial_analysis import create_buffer
 
             disaster_buffered = create_buffer(disaster_zones_gdf, buffer_distance)
 
-            # Find roads that intersect disaster zones
-            unsafe_roads = spatial_intersection(roads_gdf, disaster_buffered)
-
-            # Get indices of unsafe roads
-            unsafe_indices = unsafe_roads.index
-
-            # Filter safe roads
-            safe_roads = roads_gdf[~roads_gdf.index.isin(unsafe_indices)]
-
-        else:
-            safe_roads = roads_gdf
-
-        # Also filter out blocked roads
-        safe_roads = safe_roads[safe_roads.get('is_blocked', False) == False]
-
-        if len(safe_roads) == 0:
-            return None
-
-        # Build network from safe roads
-        graph = build_road_network(safe_roads)
-
-        if graph.number_of_nodes() == 0:
-            return None
+            # Find road edges that intersect disaster zones
+            base = graph.edge_blocked if blocked is None else np.asarray(blocked, dtype=bool)
+            blocked = (base | graph.edges_intersecting(disaster_buffered.geometry.values)).tolist()
+        elif blocked is None:
+            # Also avoid blocked roads
+            blocked = graph.closed_edges()
 
         # Compute shortest path
-        route = compute_shortest_path(graph, start_point, end_point)
+        route = compute_shortest_path(graph, start_point, end_point, algorithm, blocked=blocked,
+                                      hierarchy=hierarchy if num_zones == 0 else None)
 
         if route:
             route['safety_status'] = 'safe'
-            route['avoided_disaster_zones'] = len(disaster_zones_gdf)
+            route['avoided_disaster_zones'] = num_zones
 
         return route
 
@@ -222,68 +256,82 @@ def compute_safe_route(roads_gdf, start_point, end_point, disaster_zones_gdf, bu
         return None
 
 
-def find_alternative_routes(graph, start_point, end_point, num_routes=3):
+def find_alternative_routes(graph, start_point, end_point, num_routes=3, blocked=None, penalty=1.5,
+                            max_overlap=0.7, max_stretch=1.5, max_iterations=None):
     """
     Find multiple alternative routes between two points.
 
+    Uses the penalty method: after each search the edges of the path found
+    are made more expensive (weights multiplied by `penalty`) and the
+    search is repeated. A candidate is kept if it shares at most
+    `max_overlap` of its length with every route kept so far and is at
+    most `max_stretch` times as long as the shortest route. The number of
+    searches is bounded, so the running time is predictable whatever the
+    network looks like.
+
     Args:
-        graph (nx.Graph): Road network graph
+        graph (RoadGraph): Road network graph
         start_point (tuple): Start coordinates
         end_point (tuple): End coordinates
         num_routes (int): Number of alternative routes to find
+        blocked (sequence, optional): Truthy per edge id for edges to avoid
+        penalty (float): Weight factor applied to used edges per round
+        max_overlap (float): Largest shared length fraction (0-1) allowed
+        max_stretch (float): Longest route allowed, relative to the shortest
+        max_iterations (int, optional): Search budget (default: 3 * num_routes)
 
     Returns:
-        list: List of route dictionaries
+        list: List of route dictionaries, shortest first
     """
     try:
 
-        # Find nearest nodes
-        start_node = find_nearest_node(graph, start_point)
-        end_node = find_nearest_node(graph, end_point)
+        # Snap both points onto the road network
+        start = snap_to_road(graph, start_point)
+        end = snap_to_road(graph, end_point)
 
-        if start_node is None or end_node is None:
+        if start is None or end is None or num_routes <= 0:
             return []
 
-        # Find k-shortest paths
-        routes = []
-
-        # This is a simple implementation - for production, use more sophisticated algorithms
-        # like Yen's k-shortest paths algorithm
-        try:
-            # Get all simple paths (limited to avoid combinatorial explosion)
-            all_paths = nx.all_simple_paths(
-                graph,
-                start_node,
-                end_node,
-                cutoff=50  # Limit path length
+        weights = graph.edge_length.tolist()
+        heuristic = graph.heuristic(end.ends())     # penalties only raise weights
+        max_iterations = max_iterations or 3 * num_routes
+
+        routes, kept_edges, shortest = [], [], None
+        settled = 0
+        for _ in range(max_iterations):
+            stats = {}
+            found = graph.snapped_path(start, end, weights=weights, blocked=blocked, heuristic=heuristic, stats=stats)
+            settled += stats.get('settled_nodes', 0)
+            if found is None:
+                break
+            _, nodes, edges = found
+
+            # Partial edges at the snapped ends count as used too
+            segments = graph.segments(nodes, edges, start, end)
+            edge_ids = segments['edge']
+            length = float(segments['length'].sum())
+            if shortest is None:
+                shortest = length
+
+            overlap = max(
+                (float(segments['length'][np.isin(edge_ids, kept)].sum()) / length if length else 1.0
+                 for kept in kept_edges),
+                default=0.0,
             )
-
-            # Sort by path length
-            paths_with_length = []
-            for path in all_paths:
-                length = sum(
-                    graph[path[i]][path[i + 1]]['length']
-                    for i in range(len(path) - 1)
-                )
-                paths_with_length.append((path, length))
-
-            # Sort and take top k
-            paths_with_length.sort(key=lambda x: x[1])
-
-            for i, (path, length) in enumerate(paths_with_length[:num_routes]):
-                route = {
-                    'path': path,
-                    'path_coordinates': list(path),
-                    'geometry': LineString(path).__geo_interface__,
-                    'total_distance_meters': round(length, 2),
-                    'total_distance_km': round(length / 1000, 2),
-                    'route_number': i + 1
-                }
+            if length <= max_stretch * shortest and overlap <= max_overlap:
+                route = _route_result(graph, length, nodes, edges, start, end)
+                route['route_number'] = len(routes) + 1
+                route['overlap'] = round(overlap, 3)
                 routes.append(route)
+                kept_edges.append(np.unique(edge_ids))
+                if len(routes) >= num_routes:
+                    break
 
-        except Exception as e:
-            pass
+            for e in np.unique(edge_ids).tolist():
+                weights[e] *= penalty
 
+        for route in routes:
+            route['search_space'] = {'algorithm': 'penalty', 'settled_nodes': settled}
         return routes
 
     except Exception as e:
@@ -294,6 +342,10 @@ def calculate_route_safety_score(route_geometry, disaster_zones_gdf):
     """
     Calculate a safety score for a route based on proximity to disaster zones.
 
+    Distances are in metres from an STRtree over the zones (see
+    route_safety); to score several routes, use SafetyScorer.score_routes
+    once instead.
+
     Args:
         route_geometry (LineString): Route geometry
         disaster_zones_gdf (GeoDataFrame): Disaster zones
@@ -305,19 +357,12 @@ def calculate_route_safety_score(route_geometry, disaster_zones_gdf):
         if len(disaster_zones_gdf) == 0:
             return 100.0
 
-        # Calculate minimum distance to any disaster zone
-        route_gdf = gpd.GeoDataFrame(geometry=[route_geometry], crs=f"EPSG:{config.DEFAULT_SRID}")
-
-        min_distance = float('inf')
-        for _, disaster in disaster_zones_gdf.iterrows():
-            distance = route_gdf.iloc[0].geometry.distance(disaster.geometry)
-            min_distance = min(min_distance, distance)
-
-        # Convert distance to safety score (exponential decay)
-        # 10km away = 100, 0km = 0
-        safety_score = 100 * (1 - np.exp(-min_distance * 111000 / 5000))
+        zones = disaster_zones_gdf
+        if zones.crs is not None and zones.crs != f"EPSG:{config.DEFAULT_SRID}":
+            zones = zones.to_crs(epsg=config.DEFAULT_SRID)
 
-        return round(safety_score, 2)
+        scorer = SafetyScorer(np.asarray(zones.geometry.values, dtype=object))
+        return scorer.score_routes([shapely.get_coordinates(route_geometry)])[0]['safety_score']
 
     except Exception as e:
         return 50.0
@@ -0,0 +1,186 @@
+"""
+Route Safety Module
+===================
+Safety scores of routes from their distance to hazard zones, in metres.
+
+Zones are projected once into a local equirectangular frame in metres
+(centred on the zones; within about 1% across the state) and put in an
+STRtree. Every segment of every route being scored goes into one
+nearest-neighbour query, which gives each segment its nearest zone and
+distance. From those come the per-segment exposure along a route and the
+route score, so a set of alternative routes is scored in one batch.
+
+Scores follow the decay used before: 100 * (1 - exp(-d / 5 km)) for the
+closest approach d, so 0 on a zone and about 86 at 10 km.
+"""
+
+import math
+
+import numpy as np
+import shapely
+
+from backend.core.data_loader import DATA
+from backend.core.facility_index import EARTH_RADIUS_KM
+from backend.core.layer_index import geometry_nbytes, get_layer_index
+from backend.core.road_graph import haversine_m
+
+# Distance (metres) over which exposure decays by a factor e
+SAFETY_DECAY_M = 5000.0
+
+_METRES_PER_DEGREE = math.radians(1) * EARTH_RADIUS_KM * 1000
+
+
+class SafetyScorer:
+    """
+    Nearest-zone distances and safety scores of routes against one set of
+    hazard zones.
+    """
+
+    def __init__(self, zones):
+        """
+        Args:
+            zones (array-like): Shapely geometries in lon/lat
+        """
+        zones = np.asarray(zones, dtype=object).reshape(-1)
+        if len(zones):
+            zones = zones[~(shapely.is_missing(zones) | shapely.is_empty(zones))]
+        if len(zones):
+            minx, miny, maxx, maxy = shapely.total_bounds(zones)
+            self.origin_lat = (miny + maxy) / 2
+        else:
+            self.origin_lat = 0.0
+        self._x_scale = _METRES_PER_DEGREE * math.cos(math.radians(self.origin_lat))
+        self.zones = shapely.transform(zones, self._to_metres) if len(zones) else zones
+        self.tree = shapely.STRtree(self.zones) if len(zones) else None
+
+    def __len__(self):
+        return len(self.zones)
+
+    @property
+    def nbytes(self):
+        """Memory held by the projected zones and their tree."""
+        return geometry_nbytes(self.zones)
+
+    def _to_metres(self, lonlat):
+        return np.asarray(lonlat, dtype=np.float64) * [self._x_scale, _METRES_PER_DEGREE]
+
+    def segment_distances(self, routes):
+        """
+        Distance from each segment of each route to its nearest zone.
+
+        Args:
+            routes (list): Route coordinate sequences ([(lon, lat), ...])
+
+        Returns:
+            list: Per route, (distances_m, zone indices) arrays with one
+            entry per segment (one for a single-point route); inf and -1
+            when there are no zones
+        """
+        coords = [np.asarray(r, dtype=np.float64).reshape(-1, 2) for r in routes]
+        counts = np.array([max(len(c) - 1, 1) for c in coords], dtype=np.int64)
+        if self.tree is None or not len(coords):
+            return [(np.full(n, np.inf), np.full(n, -1, dtype=np.int64)) for n in counts]
+
+        # One geometry per segment, every route in the same query
+        parts = []
+        for c in coords:
+            xy = self._to_metres(c)
+            if len(xy) > 1:
+                parts.append(shapely.linestrings(np.stack([xy[:-1], xy[1:]], axis=1)))
+            else:
+                parts.append(shapely.points(xy))
+        segments = np.concatenate(parts)
+
+        (which, zone), distance = self.tree.query_nearest(segments, return_distance=True)
+        # Ties return several zones per segment: keep the first
+        first = np.unique(which, return_index=True)[1]
+        which, zone, distance = which[first], zone[first], distance[first]
+        nearest = np.full(len(segments), np.inf)
+        zones = np.full(len(segments), -1, dtype=np.int64)
+        nearest[which], zones[which] = distance, zone
+
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        return [(nearest[a:b], zones[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def score_routes(self, routes):
+        """
+        Safety of many routes in one query (see route_safety()).
+
+        Args:
+            routes (list): Route coordinate sequences ([(lon, lat), ...])
+
+        Returns:
+            list: route_safety() dict per route
+        """
+        return [
+            route_safety(coords, distances)
+            for coords, (distances, _) in zip(routes, self.segment_distances(routes))
+        ]
+
+
+def route_safety(coords, distances):
+    """
+    Safety summary of one route from its per-segment zone distances.
+
+    Args:
+        coords (sequence): Route coordinates ([(lon, lat), ...])
+        distances (np.ndarray): Nearest-zone distance per segment (metres)
+
+    Returns:
+        dict: safety_score (0-100, higher is safer), min_distance_m (null
+        without zones), exposure_m (segment lengths weighted by
+        exp(-d / SAFETY_DECAY_M)), and per segment: distance_m and
+        exposure (0-1)
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    lengths = haversine_m(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+    exposure = np.exp(-np.asarray(distances, dtype=np.float64) / SAFETY_DECAY_M)
+    closest = float(np.min(distances)) if len(distances) else float("inf")
+
+    return {
+        "safety_score": round(100 * (1 - math.exp(-closest / SAFETY_DECAY_M)), 2),
+        "min_distance_m": round(closest, 1) if math.isfinite(closest) else None,
+        "exposure_m": round(float((lengths * exposure[:len(lengths)]).sum()), 1),
+        "segments": [
+            {"distance_m": round(d, 1) if math.isfinite(d) else None, "exposure": round(e, 4)}
+            for d, e in zip(np.asarray(distances, dtype=np.float64).tolist(), exposure.tolist())
+        ],
+    }
+
+
+def get_safety_scorer(key):
+    """
+    Safety scorer over the zones of a hazard layer (built once per version).
+
+    Args:
+        key (str): Layer key in DATA
+
+    Returns:
+        SafetyScorer
+    """
+    return DATA.derived(key, "safety", lambda layer: SafetyScorer(get_layer_index(key).geometries))
+
+
+def score_routes(routes, layers):
+    """
+    Safety of many routes against the zones of several hazard layers.
+
+    Args:
+        routes (list): Route coordinate sequences ([(lon, lat), ...])
+        layers (iterable): Hazard layer keys in DATA
+
+    Returns:
+        list: route_safety() dict per route, against the nearest zone of
+        any layer
+    """
+    closest = None
+    for key in layers:
+        try:
+            scorer = get_safety_scorer(key)
+        except KeyError:
+            continue
+        distances = [d for d, _ in scorer.segment_distances(routes)]
+        closest = distances if closest is None else [np.minimum(a, b) for a, b in zip(closest, distances)]
+    if closest is None:
+        closest = [d for d, _ in SafetyScorer([]).segment_distances(routes)]
+    return [route_safety(coords, d) for coords, d in zip(routes, closest)]
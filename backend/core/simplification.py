@@ -0,0 +1,207 @@
+"""
+Simplification Module
+=====================
+Zoom-dependent geometry simplification pyramids for boundary layers.
+
+At low zoom a village polygon is a few pixels wide, yet it would be sent
+with every surveyed vertex. A pyramid keeps one simplified copy of a layer
+per zoom band, using a Douglas-Peucker tolerance of about half a screen
+pixel and rounding coordinates to match, so each band looks the same on
+screen at a fraction of the payload.
+
+Neighbouring villages and taluks share their borders. Simplifying each
+polygon on its own would simplify a shared border twice, differently,
+leaving gaps and overlaps between neighbours. Instead the layer's shared
+arcs (see topology.py) are simplified once, together, with junctions
+kept in place and no arc allowed to cross another, and every polygon is
+rebuilt from its simplified arcs.
+"""
+
+import math
+
+import numpy as np
+import shapely
+
+from backend.core.data_loader import DATA
+from backend.core.layer_registry import estimate_size
+from backend.core.topology import build_topology, get_topology
+
+# Highest zoom of each simplified band; above the last one the full
+# resolution layer is served
+ZOOM_BANDS = [6, 8, 10, 12]
+
+TILE_SIZE = 256
+
+
+def tolerance_for_zoom(zoom):
+    """Half a screen pixel at the equator, in degrees."""
+    return 360.0 / (TILE_SIZE * 2 ** zoom) / 2
+
+
+def band_for_zoom(zoom):
+    """
+    Pyramid band serving a zoom level.
+
+    Returns:
+        int | None: Highest zoom of the band, or None for full resolution
+    """
+    if zoom is None:
+        return None
+    for band in ZOOM_BANDS:
+        if zoom <= band:
+            return band
+    return None
+
+
+class SimplificationPyramid:
+    """
+    Pre-simplified GeoJSON geometries of one layer for every zoom band.
+    """
+
+    def __init__(self, collection, topology=None):
+        """
+        Args:
+            collection (dict | None): GeoJSON FeatureCollection
+            topology (dict, optional): TopoJSON topology of the collection
+                (see build_topology(); built when omitted)
+        """
+        self.features = collection.get("features", []) if collection else []
+        if topology is None:
+            topology = build_topology(collection)
+
+        (layer,) = topology["objects"].values()
+        transform = topology.get("transform")
+        scale = np.array(transform["scale"]) if transform else np.ones(2)
+        translate = np.array(transform["translate"]) if transform else np.zeros(2)
+        decode = lambda q: (np.asarray(q, dtype=np.float64) * scale + translate).tolist()
+        arcs = [np.cumsum(np.asarray(arc, dtype=np.float64), axis=0) * scale + translate for arc in topology["arcs"]]
+
+        self.levels = {}
+        for band in ZOOM_BANDS:
+            simplified = _simplify_arcs(arcs, tolerance_for_zoom(band))
+            self.levels[band] = [_rebuild(g, simplified, decode) for g in layer["geometries"]]
+
+    @property
+    def nbytes(self):
+        """Memory held by the simplified geometries (the properties are the layer's)."""
+        return estimate_size(self.levels)
+
+    def features_for(self, band, indices=None):
+        """
+        GeoJSON features of one band, optionally restricted to indices.
+
+        Args:
+            band (int): Band from band_for_zoom()
+            indices (iterable, optional): Feature indices (default: all)
+
+        Returns:
+            list: GeoJSON features sharing the layer's property dicts
+        """
+        geometries = self.levels[band]
+        if indices is None:
+            indices = range(len(self.features))
+
+        return [
+            {
+                "type": "Feature",
+                "properties": self.features[i].get("properties"),
+                "geometry": geometries[i],
+            }
+            for i in indices
+            if geometries[i] is not None
+        ]
+
+
+def _simplify_arcs(arcs, tolerance):
+    """
+    Simplify shared arcs together: their end points (the junctions) stay,
+    and no arc is simplified across another.
+
+    Returns:
+        list: (n, 2) coordinate arrays, one per arc, rounded to the
+        digits visible at this tolerance
+    """
+    if not arcs:
+        return []
+    lines = shapely.linestrings(
+        np.concatenate(arcs), indices=np.repeat(np.arange(len(arcs)), [len(a) for a in arcs])
+    )
+    parts = shapely.get_parts(shapely.simplify(shapely.multilinestrings(lines), tolerance, preserve_topology=True))
+    if len(parts) != len(arcs):
+        # Components were merged or dropped: fall back to arc by arc
+        parts = shapely.simplify(lines, tolerance, preserve_topology=True)
+
+    # Digits beyond a tenth of the tolerance are invisible at this zoom
+    decimals = max(0, math.ceil(-math.log10(tolerance)) + 1)
+    coords, index = shapely.get_coordinates(parts, return_index=True)
+    coords = np.round(coords, decimals)
+    simplified = np.split(coords, np.flatnonzero(np.diff(index)) + 1)
+    return [_dedupe(arc) for arc in simplified]
+
+
+def _dedupe(points):
+    """Drop repeated consecutive points (e.g. merged by rounding)."""
+    if len(points) > 1:
+        points = points[np.concatenate(([True], np.any(points[1:] != points[:-1], axis=1)))]
+    return points
+
+
+def _path(refs, arcs, closed):
+    """
+    Coordinates of a line or ring joined from arc references (negative
+    references walk an arc backwards), or None if it collapsed.
+    """
+    pieces = []
+    for i, ref in enumerate(refs):
+        arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+        pieces.append(arc if i == 0 else arc[1:])
+    points = _dedupe(np.concatenate(pieces))
+    if len(points) < (4 if closed else 2):
+        return None
+    return points.tolist()
+
+
+def _rebuild(obj, arcs, decode):
+    """GeoJSON geometry of a TopoJSON geometry object, from simplified arcs."""
+    kind = obj.get("type")
+    if kind == "Point":
+        return {"type": kind, "coordinates": decode(obj["coordinates"])}
+    if kind == "MultiPoint":
+        return {"type": kind, "coordinates": decode(obj["coordinates"])}
+    if kind == "LineString":
+        line = _path(obj["arcs"], arcs, closed=False)
+        return {"type": kind, "coordinates": line} if line else None
+    if kind == "MultiLineString":
+        lines = [l for l in (_path(a, arcs, closed=False) for a in obj["arcs"]) if l]
+        return {"type": kind, "coordinates": lines} if lines else None
+    if kind == "Polygon":
+        rings = _rings(obj["arcs"], arcs)
+        return {"type": kind, "coordinates": rings} if rings else None
+    if kind == "MultiPolygon":
+        polygons = [r for r in (_rings(p, arcs) for p in obj["arcs"]) if r]
+        return {"type": kind, "coordinates": polygons} if polygons else None
+    if kind == "GeometryCollection":
+        parts = [p for p in (_rebuild(g, arcs, decode) for g in obj["geometries"]) if p]
+        return {"type": kind, "geometries": parts}
+    return None
+
+
+def _rings(refs, arcs):
+    """Rings of one polygon; a collapsed exterior drops the polygon, a collapsed hole is left out."""
+    rings = [_path(r, arcs, closed=True) for r in refs]
+    if not rings or rings[0] is None:
+        return None
+    return [r for r in rings if r is not None]
+
+
+def get_pyramid(key):
+    """
+    Simplification pyramid of a registered layer (built once per version).
+
+    Args:
+        key (str): Layer key in DATA
+
+    Returns:
+        SimplificationPyramid
+    """
+    return DATA.derived(key, "pyramid", lambda layer: SimplificationPyramid(layer, get_topology(key)))
@@ -0,0 +1,289 @@
+"""
+Layer Snapshot Module
+=====================
+Compiled, columnar snapshots of processed GeoJSON layers.
+
+A snapshot stores every coordinate of a FeatureCollection in one float64
+array, the geometry nesting as offset arrays (feature -> parts -> rings ->
+coordinates) and the feature properties as a column table. Rebuilding the
+GeoJSON dict from it only costs Python work per ring and per feature, not
+per coordinate, so it is much faster than re-parsing the source JSON.
+
+Snapshots are keyed by the source file's mtime and size and are rebuilt
+whenever the source changes.
+"""
+
+import os
+import json
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snap.npz"
+
+GEOMETRY_TYPES = ["Point", "MultiPoint", "LineString", "MultiLineString", "Polygon", "MultiPolygon"]
+_TYPE_CODES = {name: code for code, name in enumerate(GEOMETRY_TYPES)}
+
+# Geometry codes outside GEOMETRY_TYPES
+NULL_GEOMETRY = -1
+RAW_GEOMETRY = -2   # kept verbatim (GeometryCollection, 3D coordinates, ...)
+
+
+def snapshot_path(source_path, base_dir, snapshot_dir):
+    """
+    Path of the snapshot for a source file.
+
+    Args:
+        source_path (str): GeoJSON file
+        base_dir (str): Processed data directory the source lives in
+        snapshot_dir (str): Directory holding the snapshots
+
+    Returns:
+        str: Snapshot file path
+    """
+    rel = os.path.relpath(source_path, base_dir).replace(os.sep, "__")
+    return os.path.join(snapshot_dir, rel + SNAPSHOT_SUFFIX)
+
+
+def source_signature(path):
+    """(mtime_ns, size) of a file, used to check snapshot freshness."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+# ---------- Encoding ----------
+
+def _is_2d(ring):
+    return all(len(c) == 2 for c in ring)
+
+
+def _geometry_rings(geom):
+    """
+    Normalize a geometry to (type_code, parts) where parts is a list of
+    lists of coordinate rings. Returns None when it cannot be encoded.
+    """
+    gtype = geom.get("type")
+    coords = geom.get("coordinates")
+
+    if gtype == "Point":
+        parts = [[[coords]]]
+    elif gtype in ("MultiPoint", "LineString"):
+        parts = [[coords]]
+    elif gtype in ("MultiLineString", "Polygon"):
+        parts = [coords]
+    elif gtype == "MultiPolygon":
+        parts = coords
+    else:
+        return None
+
+    for rings in parts:
+        for ring in rings:
+            if not _is_2d(ring):
+                return None
+
+    return _TYPE_CODES[gtype], parts
+
+
+def encode_collection(collection):
+    """
+    Encode a GeoJSON FeatureCollection into columnar arrays.
+
+    Args:
+        collection (dict): GeoJSON FeatureCollection
+
+    Returns:
+        dict: name -> numpy array, ready for np.savez
+    """
+    features = collection["features"]
+
+    geom_type = np.empty(len(features), dtype=np.int8)
+    geom_offsets = [0]
+    part_offsets = [0]
+    ring_offsets = [0]
+    ring_arrays = []
+
+    columns = {}
+    missing = {}
+    null_properties = []
+    raw_geometries = {}
+    members = {}
+
+    for i, feat in enumerate(features):
+        geom = feat.get("geometry")
+        encoded = _geometry_rings(geom) if geom else None
+
+        if geom is None:
+            geom_type[i] = NULL_GEOMETRY
+        elif encoded is None:
+            geom_type[i] = RAW_GEOMETRY
+            raw_geometries[str(i)] = geom
+        else:
+            code, parts = encoded
+            geom_type[i] = code
+            for rings in parts:
+                for ring in rings:
+                    ring_arrays.append(np.asarray(ring, dtype=np.float64).reshape(-1, 2))
+                    ring_offsets.append(ring_offsets[-1] + len(ring))
+                part_offsets.append(part_offsets[-1] + len(rings))
+        geom_offsets.append(len(part_offsets) - 1)
+
+        props = feat.get("properties")
+        if props is None:
+            null_properties.append(i)
+            props = {}
+        for key, value in props.items():
+            if key not in columns:
+                # Column appears late: every earlier feature lacks it
+                columns[key] = [None] * i
+                missing[key] = list(range(i))
+            columns[key].append(value)
+        for key in columns:
+            if key not in props:
+                columns[key].append(None)
+                missing[key].append(i)
+
+        extra = {k: v for k, v in feat.items() if k not in ("type", "geometry", "properties")}
+        if extra:
+            members[str(i)] = extra
+
+    coords = np.concatenate(ring_arrays) if ring_arrays else np.empty((0, 2), dtype=np.float64)
+
+    table = {
+        "columns": list(columns),
+        "values": list(columns.values()),
+        "missing": [missing[k] for k in columns],
+        "null": null_properties,
+    }
+    extra = {
+        "raw": raw_geometries,
+        "members": members,
+        "collection": {k: v for k, v in collection.items() if k != "features"},
+    }
+
+    return {
+        "geom_type": geom_type,
+        "geom_offsets": np.asarray(geom_offsets, dtype=np.int64),
+        "part_offsets": np.asarray(part_offsets, dtype=np.int64),
+        "ring_offsets": np.asarray(ring_offsets, dtype=np.int64),
+        "coords": coords,
+        "properties": _json_bytes(table),
+        "extra": _json_bytes(extra),
+    }
+
+
+def _json_bytes(obj):
+    return np.frombuffer(json.dumps(obj, separators=(",", ":")).encode("utf-8"), dtype=np.uint8)
+
+
+def _json_load(arr):
+    return json.loads(arr.tobytes().decode("utf-8"))
+
+
+# ---------- Decoding ----------
+
+def decode_collection(arrays):
+    """
+    Rebuild a GeoJSON FeatureCollection from columnar arrays.
+
+    Args:
+        arrays (Mapping): Arrays produced by encode_collection
+
+    Returns:
+        dict: GeoJSON FeatureCollection
+    """
+    geom_type = arrays["geom_type"].tolist()
+    geom_offsets = arrays["geom_offsets"].tolist()
+    part_offsets = arrays["part_offsets"].tolist()
+    ring_offsets = arrays["ring_offsets"].tolist()
+    points = arrays["coords"].tolist()
+    table = _json_load(arrays["properties"])
+    extra = _json_load(arrays["extra"])
+
+    rings = [points[ring_offsets[r]:ring_offsets[r + 1]] for r in range(len(ring_offsets) - 1)]
+    parts = [rings[part_offsets[p]:part_offsets[p + 1]] for p in range(len(part_offsets) - 1)]
+
+    n = len(geom_type)
+    columns = table["columns"]
+    if columns:
+        properties = [dict(zip(columns, row)) for row in zip(*table["values"])]
+    else:
+        properties = [{} for _ in range(n)]
+    for key, absent in zip(columns, table["missing"]):
+        for i in absent:
+            del properties[i][key]
+    for i in table["null"]:
+        properties[i] = None
+
+    raw = extra["raw"]
+    members = extra["members"]
+
+    features = []
+    for i, code in enumerate(geom_type):
+        if code == NULL_GEOMETRY:
+            geometry = None
+        elif code == RAW_GEOMETRY:
+            geometry = raw[str(i)]
+        else:
+            geometry = {"type": GEOMETRY_TYPES[code], "coordinates": _coordinates(code, parts[geom_offsets[i]:geom_offsets[i + 1]])}
+
+        feature = {"type": "Feature", "properties": properties[i], "geometry": geometry}
+        if members:
+            feature.update(members.get(str(i), {}))
+        features.append(feature)
+
+    collection = dict(extra["collection"])
+    collection["features"] = features
+    return collection
+
+
+def _coordinates(code, feature_parts):
+    name = GEOMETRY_TYPES[code]
+    if name == "MultiPolygon":
+        return feature_parts
+    first = feature_parts[0]
+    if name == "Point":
+        return first[0][0]
+    if name in ("MultiPoint", "LineString"):
+        return first[0]
+    return first
+
+
+# ---------- Files ----------
+
+def write_snapshot(path, collection, signature):
+    """
+    Write a snapshot atomically.
+
+    Args:
+        path (str): Snapshot file path
+        collection (dict): Parsed GeoJSON FeatureCollection
+        signature (tuple): (mtime_ns, size) of the source file
+    """
+    arrays = encode_collection(collection)
+    arrays["meta"] = np.asarray([SNAPSHOT_VERSION, signature[0], signature[1]], dtype=np.int64)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path, signature):
+    """
+    Read a snapshot if it matches the source signature.
+
+    Args:
+        path (str): Snapshot file path
+        signature (tuple): (mtime_ns, size) of the source file
+
+    Returns:
+        dict | None: GeoJSON FeatureCollection, or None when missing or stale
+    """
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path, allow_pickle=False) as npz:
+        version, mtime_ns, size = npz["meta"].tolist()
+        if version != SNAPSHOT_VERSION or (mtime_ns, size) != tuple(signature):
+            return None
+        return decode_collection(npz)
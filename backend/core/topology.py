@@ -0,0 +1,309 @@
+"""
+Topology Module
+===============
+TopoJSON encoding of polygon and line layers.
+
+Adjacent administrative units share their borders, so a GeoJSON layer
+stores most edges twice. TopoJSON stores every shared border once as an
+arc, referenced by index from each geometry that uses it (a negative,
+one's-complement index walks the arc backwards). Coordinates are
+quantized to an integer grid and arcs are delta-encoded, which keeps the
+numbers short before compression.
+
+Arcs are cut at junctions: points where the set of neighbouring points
+differs between two visits (where borders meet or part), plus the ends
+of lines.
+"""
+
+import numpy as np
+
+from backend.core.data_loader import DATA
+
+# Grid size per axis; 1e5 steps over Kerala is about 4 m
+DEFAULT_QUANTIZATION = 100_000
+
+
+class _Quantizer:
+    """Maps lon/lat to integers on a grid spanning the layer's bbox."""
+
+    def __init__(self, bbox, quantization):
+        x0, y0, x1, y1 = bbox
+        self.q = int(quantization)
+        self.x0, self.y0 = x0, y0
+        self.kx = (x1 - x0) / (self.q - 1) if x1 > x0 else 1.0
+        self.ky = (y1 - y0) / (self.q - 1) if y1 > y0 else 1.0
+
+    def __call__(self, coords):
+        try:
+            coords = np.asarray(coords, dtype=np.float64)[:, :2]
+        except ValueError:
+            # Mixed 2D/3D positions
+            coords = np.array([c[:2] for c in coords], dtype=np.float64)
+        qx = np.rint((coords[:, 0] - self.x0) / self.kx).astype(np.int64)
+        qy = np.rint((coords[:, 1] - self.y0) / self.ky).astype(np.int64)
+        return np.column_stack([qx, qy])
+
+    def key(self, points):
+        return points[:, 0] * self.q + points[:, 1]
+
+    @property
+    def transform(self):
+        return {"scale": [self.kx, self.ky], "translate": [self.x0, self.y0]}
+
+
+def _dedupe(points, closed):
+    """Drop repeated consecutive points; None if the path degenerates."""
+    if len(points) > 1:
+        moved = np.any(points[1:] != points[:-1], axis=1)
+        points = points[np.concatenate(([True], moved))]
+    if closed:
+        if len(points) > 1 and (points[-1] == points[0]).all():
+            points = points[:-1]
+        return points if len(points) >= 3 else None
+    return points if len(points) >= 2 else None
+
+
+def _iter_coords(geometry):
+    """Yield every coordinate pair of a GeoJSON geometry."""
+    kind = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if kind == "GeometryCollection":
+        for part in geometry.get("geometries") or []:
+            yield from _iter_coords(part)
+    elif kind == "Point":
+        yield coords
+    elif kind in ("MultiPoint", "LineString"):
+        yield from coords
+    elif kind in ("MultiLineString", "Polygon"):
+        for line in coords:
+            yield from line
+    elif kind == "MultiPolygon":
+        for polygon in coords:
+            for ring in polygon:
+                yield from ring
+
+
+def _bbox(features):
+    xs, ys = [], []
+    for feat in features:
+        geom = feat.get("geometry")
+        if not geom:
+            continue
+        for c in _iter_coords(geom):
+            xs.append(c[0])
+            ys.append(c[1])
+    if not xs:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class _Paths:
+    """Every quantized line and ring of a layer, in visiting order."""
+
+    def __init__(self):
+        self.paths = []      # (points, closed)
+
+    def add(self, points, closed):
+        points = _dedupe(points, closed)
+        if points is None:
+            return None
+        self.paths.append((points, closed))
+        return len(self.paths) - 1
+
+    def junctions(self, quantize):
+        """Grid keys of the points where arcs must be cut."""
+        if not self.paths:
+            return np.empty(0, dtype=np.int64)
+
+        keys, lows, highs, ends = [], [], [], []
+        for points, closed in self.paths:
+            k = quantize.key(points)
+            if closed:
+                prev, nxt = np.roll(k, 1), np.roll(k, -1)
+            else:
+                prev = np.concatenate(([-1], k[:-1]))
+                nxt = np.concatenate((k[1:], [-1]))
+                ends.append(k[[0, -1]])
+            keys.append(k)
+            lows.append(np.minimum(prev, nxt))
+            highs.append(np.maximum(prev, nxt))
+
+        visits = np.unique(np.column_stack([
+            np.concatenate(keys), np.concatenate(lows), np.concatenate(highs)
+        ]), axis=0)
+        point_keys, counts = np.unique(visits[:, 0], return_counts=True)
+        junctions = point_keys[counts > 1]
+        if ends:
+            junctions = np.union1d(junctions, np.concatenate(ends))
+        return junctions
+
+
+class _Arcs:
+    """Deduplicated arcs; a reversed copy of an arc reuses its index."""
+
+    def __init__(self):
+        self.arcs = []
+        self._index = {}
+
+    def add(self, points):
+        forward = points.tobytes()
+        found = self._index.get(forward)
+        if found is not None:
+            return found
+
+        backward = points[::-1].tobytes()
+        found = self._index.get(backward)
+        if found is not None:
+            return ~found
+
+        self._index[forward] = len(self.arcs)
+        self.arcs.append(points)
+        return len(self.arcs) - 1
+
+    def encoded(self):
+        """Delta-encoded arcs (first point absolute)."""
+        return [
+            np.diff(arc, axis=0, prepend=[[0, 0]]).tolist()
+            for arc in self.arcs
+        ]
+
+
+def _cut(points, closed, is_junction, arcs):
+    """Split one path at its junctions and return its arc indices."""
+    cuts = np.flatnonzero(is_junction)
+
+    if closed:
+        if len(cuts) == 0:
+            # Rotate isolated rings to a canonical start so that identical
+            # rings (e.g. an enclave and the hole it fills) share one arc
+            start = int(np.lexsort((points[:, 1], points[:, 0]))[0])
+            ring = np.roll(points, -start, axis=0)
+            return [arcs.add(np.vstack([ring, ring[:1]]))]
+
+        start = int(cuts[0])
+        points = np.vstack([np.roll(points, -start, axis=0), points[start:start + 1]])
+        cuts = np.append(cuts - start, len(points) - 1)
+    else:
+        cuts = np.unique(np.concatenate(([0], cuts, [len(points) - 1])))
+
+    return [arcs.add(points[a:b + 1]) for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+def build_topology(collection, name="layer", quantization=DEFAULT_QUANTIZATION):
+    """
+    Convert a GeoJSON FeatureCollection to a quantized TopoJSON Topology.
+
+    Args:
+        collection (dict | None): GeoJSON FeatureCollection
+        name (str): Name of the single object in the topology
+        quantization (int): Grid steps per axis
+
+    Returns:
+        dict: TopoJSON Topology with one GeometryCollection object
+    """
+    features = collection.get("features", []) if collection else []
+    bbox = _bbox(features)
+    if bbox is None:
+        return {
+            "type": "Topology",
+            "objects": {name: {"type": "GeometryCollection", "geometries": []}},
+            "arcs": [],
+        }
+
+    quantize = _Quantizer(bbox, quantization)
+    paths = _Paths()
+
+    # First pass: quantize every line and ring and lay out the geometries
+    # with path ids, which are swapped for arc ids once junctions are known
+    def layout(geom):
+        kind = geom.get("type")
+        coords = geom.get("coordinates")
+
+        if kind == "Point":
+            return {"type": kind, "coordinates": quantize([coords])[0].tolist()}
+        if kind == "MultiPoint":
+            return {"type": kind, "coordinates": quantize(coords).tolist()} if coords else None
+        if kind == "LineString":
+            path = paths.add(quantize(coords), closed=False)
+            return {"type": kind, "arcs": path} if path is not None else None
+        if kind == "MultiLineString":
+            lines = [p for p in (paths.add(quantize(c), closed=False) for c in coords) if p is not None]
+            return {"type": kind, "arcs": lines} if lines else None
+        if kind == "Polygon":
+            rings = _polygon_paths(coords)
+            return {"type": kind, "arcs": rings} if rings else None
+        if kind == "MultiPolygon":
+            polygons = [r for r in (_polygon_paths(p) for p in coords) if r]
+            return {"type": kind, "arcs": polygons} if polygons else None
+        if kind == "GeometryCollection":
+            parts = [p for p in (layout(g) for g in geom.get("geometries") or []) if p]
+            return {"type": kind, "geometries": parts}
+        return None
+
+    def _polygon_paths(rings):
+        out = []
+        for i, ring in enumerate(rings):
+            path = paths.add(quantize(ring), closed=True)
+            if path is None:
+                if i == 0:
+                    return None     # exterior collapsed: drop the polygon
+                continue
+            out.append(path)
+        return out
+
+    geometries = []
+    for feat in features:
+        geom = feat.get("geometry")
+        obj = layout(geom) if geom else None
+        if obj is None:
+            obj = {"type": None}
+        if feat.get("properties") is not None:
+            obj["properties"] = feat["properties"]
+        if "id" in feat:
+            obj["id"] = feat["id"]
+        geometries.append(obj)
+
+    # Second pass: cut every path at the junctions into shared arcs
+    junctions = paths.junctions(quantize)
+    arcs = _Arcs()
+    path_arcs = [
+        _cut(points, closed, np.isin(quantize.key(points), junctions), arcs)
+        for points, closed in paths.paths
+    ]
+
+    def resolve(obj):
+        kind = obj.get("type")
+        if kind in ("LineString", "Polygon"):
+            obj["arcs"] = (path_arcs[obj["arcs"]] if kind == "LineString"
+                           else [path_arcs[p] for p in obj["arcs"]])
+        elif kind == "MultiLineString":
+            obj["arcs"] = [path_arcs[p] for p in obj["arcs"]]
+        elif kind == "MultiPolygon":
+            obj["arcs"] = [[path_arcs[p] for p in polygon] for polygon in obj["arcs"]]
+        elif kind == "GeometryCollection":
+            for part in obj["geometries"]:
+                resolve(part)
+
+    for obj in geometries:
+        resolve(obj)
+
+    return {
+        "type": "Topology",
+        "bbox": list(bbox),
+        "transform": quantize.transform,
+        "objects": {name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": arcs.encoded(),
+    }
+
+
+def get_topology(key):
+    """
+    TopoJSON topology of a registered layer (built once per version).
+
+    Args:
+        key (str): Layer key in DATA
+
+    Returns:
+        dict: TopoJSON Topology whose object is named after the layer
+    """
+    return DATA.derived(key, "topology", lambda layer: build_topology(layer, name=key))
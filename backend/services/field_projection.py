@@ -0,0 +1,90 @@
+"""
+Field Projection Service
+========================
+`fields=` query parameter support for the layer endpoints.
+
+Source layers carry every OSM attribute, while the map popups read only a
+few of them. A projection copies the features with only the requested
+properties (or none, for geometry-only output); geometries are shared with
+the loaded layer, not copied. Callers add `cache_suffix()` to their
+response cache names so each field set is serialized once per version.
+"""
+
+from flask import request
+
+
+def requested_fields():
+    """
+    Parse the ?fields= parameter of the current request.
+
+    `fields=name,amenity` keeps those properties; an empty `fields=`
+    returns geometry only.
+
+    Returns:
+        tuple | None: Sorted property names, () for geometry only, or
+        None when all properties are requested
+    """
+    if "fields" not in request.args:
+        return None
+    value = request.args.get("fields", "")
+    return tuple(sorted({f.strip() for f in value.split(",") if f.strip()}))
+
+
+def cache_suffix(fields):
+    """Response cache name suffix of a field set ("" for all fields)."""
+    return "" if fields is None else ":fields=" + ",".join(fields)
+
+
+def project_properties(properties, fields):
+    if fields is None or properties is None:
+        return properties
+    return {f: properties[f] for f in fields if f in properties}
+
+
+def project_feature(feature, fields):
+    """Shallow copy of a GeoJSON feature with only the requested properties."""
+    if fields is None:
+        return feature
+    projected = dict(feature)
+    projected["properties"] = project_properties(feature.get("properties"), fields) or {}
+    return projected
+
+
+def project(layer, fields):
+    """
+    Apply a field projection to a loaded layer.
+
+    Args:
+        layer (dict | list | None): FeatureCollection, list of feature dicts
+            or collections, or TopoJSON Topology
+        fields (tuple | None): From requested_fields()
+
+    Returns:
+        Layer of the same shape (the input itself when fields is None)
+    """
+    if fields is None or layer is None:
+        return layer
+
+    if isinstance(layer, list):
+        return [project(item, fields) for item in layer]
+    if not isinstance(layer, dict):
+        return layer
+
+    kind = layer.get("type")
+    if kind == "FeatureCollection":
+        projected = dict(layer)
+        projected["features"] = [project_feature(f, fields) for f in layer.get("features", [])]
+        return projected
+    if kind == "Feature":
+        return project_feature(layer, fields)
+    if kind == "Topology":
+        projected = dict(layer)
+        projected["objects"] = {
+            name: {**obj, "geometries": [
+                {**g, "properties": project_properties(g.get("properties"), fields) or {}}
+                for g in obj.get("geometries", [])
+            ]}
+            for name, obj in layer.get("objects", {}).items()
+        }
+        return projected
+    return layer
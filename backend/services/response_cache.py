@@ -0,0 +1,198 @@
+"""
+Response Cache Service
+======================
+Pre-serialized, pre-compressed JSON responses for static layer endpoints.
+
+Large layer payloads are encoded to JSON once per layer version and stored
+as identity, gzip and (when the `brotli` package is installed) brotli bytes.
+Responses carry a strong ETag per encoding, and a matching If-None-Match is
+answered with 304 Not Modified, so dashboard reloads neither re-encode nor
+re-download unchanged GeoJSON.
+
+The cache's bytes count against the layer registry's memory budget
+(see LayerRegistry.track_cache()).
+"""
+
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+import config
+from backend.core.data_loader import DATA
+
+try:
+    import brotli
+except ImportError:  # optional dependency: serve gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+
+_SUFFIX = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+
+class CachedPayload:
+    """One serialized payload and its compressed variants."""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.encoded = {
+            "identity": body,
+            "gzip": gzip.compress(body, GZIP_LEVEL),
+        }
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+
+    def etag_for(self, encoding):
+        """Strong ETag of one encoded representation."""
+        return self.etag + _SUFFIX[encoding]
+
+    @property
+    def nbytes(self):
+        return sum(len(b) for b in self.encoded.values())
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized payloads keyed by name and source version.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # name -> (version, CachedPayload)
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.registry = None    # set by LayerRegistry.track_cache()
+
+    def payload(self, name, version, build, encode=None):
+        """
+        Return the cached payload for name, building it if the cached copy
+        is missing or was made from another version.
+
+        Args:
+            name (str): Cache entry name (e.g. "boundaries:2")
+            version (hashable): Version of the data the payload is built from
+            build (callable): Returns the JSON-serializable payload
+            encode (callable, optional): Turns the built value into bytes
+                (default: compact UTF-8 JSON)
+
+        Returns:
+            CachedPayload
+        """
+        with self._lock:
+            cached = self._entries.get(name)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return cached[1]
+
+        # Serialize outside the lock; concurrent misses may both build
+        payload = CachedPayload((encode or encode_json)(build()))
+
+        with self._lock:
+            self.misses += 1
+            replaced = self._entries.pop(name, None)
+            if replaced is not None:
+                self._nbytes -= replaced[1].nbytes
+            self._entries[name] = (version, payload)
+            self._nbytes += payload.nbytes
+            while len(self._entries) > self.max_entries:
+                self._nbytes -= self._entries.popitem(last=False)[1][1].nbytes
+
+        if self.registry is not None:
+            self.registry.enforce_budget()
+        return payload
+
+    @property
+    def nbytes(self):
+        """Bytes held by the cached payloads."""
+        with self._lock:
+            return self._nbytes
+
+    def shrink(self, nbytes):
+        """Drop the least recently used payloads until at most nbytes are held."""
+        with self._lock:
+            while self._entries and self._nbytes > nbytes:
+                self._nbytes -= self._entries.popitem(last=False)[1][1].nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def encode_json(value):
+    """Compact UTF-8 JSON body."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+response_cache = ResponseCache(max_entries=config.RESPONSE_CACHE_MAX_ENTRIES)
+DATA.track_cache(response_cache)
+
+
+def _negotiate_encoding(available):
+    accepted = request.accept_encodings
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted[encoding] > 0:
+            return encoding
+    return "identity"
+
+
+def cached_json_response(name, version, build):
+    """
+    Serve a JSON payload from the response cache.
+
+    Args:
+        name (str): Cache entry name
+        version (hashable): Version of the underlying layers
+        build (callable): Returns the payload on a cache miss
+
+    Returns:
+        Response: 200 with the best accepted encoding, or 304 when the
+        client's If-None-Match already names this version
+    """
+    return payload_response(response_cache.payload(name, version, build), "application/json")
+
+
+def payload_response(payload, mimetype):
+    """
+    Serve a CachedPayload with content negotiation and ETag revalidation.
+
+    Args:
+        payload (CachedPayload): Body and its compressed variants
+        mimetype (str): Content type of the uncompressed body
+
+    Returns:
+        Response: 200 with the best accepted encoding, or 304 when the
+        client's If-None-Match names any variant of this payload
+    """
+    encoding = _negotiate_encoding(payload.encoded)
+    etag = payload.etag_for(encoding)
+
+    if any(request.if_none_match.contains(payload.etag_for(e)) for e in payload.encoded):
+        response = Response(status=304)
+    else:
+        response = Response(payload.encoded[encoding], mimetype=mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    # Let browsers keep the body but revalidate with If-None-Match each time
+    response.headers["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,406 @@
+"""
+Vector Tiles Service
+====================
+Mapbox Vector Tiles (MVT) rendered from the layers in DATA.
+
+A tile request only touches the features whose bounding boxes meet the
+tile (through the layer's STRtree index). Their geometries are projected
+to Web Mercator tile coordinates, simplified below the tile resolution,
+clipped to the tile plus a small buffer and quantized to the integer tile
+grid before being written in the MVT protobuf format.
+
+Encoded tiles are kept in an LRU cache keyed by tile and layer versions,
+with gzip/brotli variants and ETags (see response_cache), and optionally
+in an on-disk tile store so a restarted worker does not render them again.
+"""
+
+import os
+import math
+import struct
+import hashlib
+import threading
+
+import numpy as np
+import shapely
+from flask import current_app
+
+import config
+from backend.core.data_loader import DATA, source_signatures
+from backend.core.layer_index import get_layer_index
+from backend.services.field_projection import cache_suffix, project_properties
+from backend.services.response_cache import ResponseCache, payload_response
+
+MVT_MIMETYPE = "application/vnd.mapbox-vector-tile"
+
+EXTENT = 4096        # tile grid units per tile side
+BUFFER = 64          # grid units kept outside the tile so strokes join up
+MAX_ZOOM = 20
+MAX_LATITUDE = 85.0511287798
+
+# Simplification tolerance in grid units (1/16 of a screen pixel)
+SIMPLIFY_TOLERANCE = 1.0
+
+# MVT geometry types and commands
+_POINT, _LINESTRING, _POLYGON = 1, 2, 3
+_MOVE_TO, _LINE_TO, _CLOSE_PATH = 1, 2, 7
+
+# Protobuf wire types
+_VARINT, _FIXED64, _BYTES = 0, 1, 2
+
+
+# ---------- Protobuf encoding ----------
+
+def _varint(value, out):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _field(number, wire_type, out):
+    _varint((number << 3) | wire_type, out)
+
+
+def _bytes_field(number, payload, out):
+    _field(number, _BYTES, out)
+    _varint(len(payload), out)
+    out += payload
+
+
+def _packed(values):
+    out = bytearray()
+    for v in values:
+        _varint(int(v), out)
+    return out
+
+
+def _zigzag(values):
+    return np.where(values >= 0, values * 2, -values * 2 - 1)
+
+
+def _command(command, count):
+    return (command & 0x7) | (count << 3)
+
+
+def _encode_value(value):
+    """Encode one property value as a vector_tile.Tile.Value message."""
+    out = bytearray()
+    if isinstance(value, bool):
+        _field(7, _VARINT, out)
+        _varint(int(value), out)
+    elif isinstance(value, int) and -(1 << 63) <= value < (1 << 63):
+        _field(6, _VARINT, out)
+        _varint((value << 1) if value >= 0 else ((-value) << 1) - 1, out)
+    elif isinstance(value, float):
+        _field(3, _FIXED64, out)
+        out += struct.pack("<d", value)
+    else:
+        if not isinstance(value, str):
+            value = str(value)
+        _bytes_field(1, value.encode("utf-8"), out)
+    return out
+
+
+# ---------- Geometry encoding ----------
+
+class _Cursor:
+    """Pen position shared by all parts of one feature geometry."""
+
+    __slots__ = ("x", "y")
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+
+
+def _path(points, cursor, closed):
+    """
+    Command integers for one line or ring, or None if it degenerates after
+    quantization.
+    """
+    points = np.asarray(points, dtype=np.int64)[:, :2]
+    if len(points) > 1:
+        moved = np.any(points[1:] != points[:-1], axis=1)
+        points = points[np.concatenate(([True], moved))]
+    if closed and len(points) > 1 and (points[-1] == points[0]).all():
+        points = points[:-1]
+    if len(points) < (3 if closed else 2):
+        return None
+
+    deltas = np.diff(points, axis=0, prepend=[[cursor.x, cursor.y]])
+    params = _zigzag(deltas).ravel().tolist()
+    cursor.x, cursor.y = (int(v) for v in points[-1])
+
+    commands = [_command(_MOVE_TO, 1), params[0], params[1], _command(_LINE_TO, len(points) - 1)]
+    commands += params[2:]
+    if closed:
+        commands.append(_command(_CLOSE_PATH, 1))
+    return commands
+
+
+def _signed_area(ring):
+    ring = np.asarray(ring, dtype=np.float64)
+    x, y = ring[:, 0], ring[:, 1]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _ring(coords, exterior, cursor):
+    # MVT exterior rings have positive surveyor's area in tile coordinates
+    # (clockwise on screen, y pointing down), interior rings negative
+    area = _signed_area(coords)
+    if area == 0:
+        return None
+    if (area > 0) != exterior:
+        coords = coords[::-1]
+    return _path(coords, cursor, closed=True)
+
+
+def encode_geometry(geom):
+    """
+    MVT geometry type and command integers of a quantized geometry.
+
+    Args:
+        geom: Shapely geometry in integer tile coordinates
+
+    Returns:
+        tuple | None: (geometry type, commands), or None if nothing is left
+    """
+    kind = geom.geom_type
+    cursor = _Cursor()
+    commands = []
+
+    if kind in ("Point", "MultiPoint"):
+        points = np.rint(shapely.get_coordinates(geom)).astype(np.int64)
+        if not len(points):
+            return None
+        deltas = np.diff(points, axis=0, prepend=[[0, 0]])
+        commands = [_command(_MOVE_TO, len(points))] + _zigzag(deltas).ravel().tolist()
+        return _POINT, commands
+
+    if kind in ("LineString", "MultiLineString"):
+        lines = geom.geoms if kind == "MultiLineString" else [geom]
+        for line in lines:
+            commands += _path(line.coords, cursor, closed=False) or []
+        return (_LINESTRING, commands) if commands else None
+
+    if kind in ("Polygon", "MultiPolygon"):
+        polygons = geom.geoms if kind == "MultiPolygon" else [geom]
+        for polygon in polygons:
+            exterior = _ring(polygon.exterior.coords, True, cursor)
+            if exterior is None:
+                continue
+            commands += exterior
+            for interior in polygon.interiors:
+                commands += _ring(interior.coords, False, cursor) or []
+        return (_POLYGON, commands) if commands else None
+
+    if kind == "GeometryCollection":
+        # Only homogeneous parts can share one feature; keep the first kind
+        for part in geom.geoms:
+            encoded = encode_geometry(part)
+            if encoded is not None:
+                return encoded
+    return None
+
+
+# ---------- Tile math ----------
+
+def tile_bounds(z, x, y):
+    """
+    Longitude/latitude bounds of a tile.
+
+    Returns:
+        tuple: (west, south, east, north) in degrees
+    """
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _projector(z, x, y):
+    """Map lon/lat coordinate arrays to tile grid units (y down)."""
+    n = 2 ** z
+
+    def project(coords):
+        lon = coords[:, 0]
+        lat = np.radians(np.clip(coords[:, 1], -MAX_LATITUDE, MAX_LATITUDE))
+        px = ((lon + 180.0) / 360.0 * n - x) * EXTENT
+        py = ((1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / math.pi) / 2 * n - y) * EXTENT
+        return np.column_stack([px, py])
+
+    return project
+
+
+# ---------- Tile rendering ----------
+
+def _encode_layer(name, index, z, x, y, fields=None):
+    """Encode the features of one layer that fall in a tile (None if none do)."""
+    west, south, east, north = tile_bounds(z, x, y)
+    pad_x = (east - west) * BUFFER / EXTENT
+    pad_y = (north - south) * BUFFER / EXTENT
+    hits = index.query_bbox(west - pad_x, south - pad_y, east + pad_x, north + pad_y)
+    if not len(hits):
+        return None
+
+    geoms = shapely.transform(index.geometries[hits], _projector(z, x, y))
+    geoms = shapely.simplify(geoms, SIMPLIFY_TOLERANCE, preserve_topology=True)
+    geoms = shapely.clip_by_rect(geoms, -BUFFER, -BUFFER, EXTENT + BUFFER, EXTENT + BUFFER)
+    geoms = shapely.transform(geoms, np.rint)
+
+    keys, values = {}, {}
+    features = bytearray()
+
+    for i, geom in zip(hits, geoms):
+        if geom is None or geom.is_empty:
+            continue
+        encoded = encode_geometry(geom)
+        if encoded is None:
+            continue
+        geom_type, commands = encoded
+
+        tags = []
+        properties = project_properties(index.features[i].get("properties"), fields)
+        for k, v in (properties or {}).items():
+            if v is None or isinstance(v, (dict, list)):
+                continue
+            value = _encode_value(v)
+            tags.append(keys.setdefault(k, len(keys)))
+            tags.append(values.setdefault(bytes(value), len(values)))
+
+        feature = bytearray()
+        _field(1, _VARINT, feature)
+        _varint(int(i) + 1, feature)
+        _bytes_field(2, _packed(tags), feature)
+        _field(3, _VARINT, feature)
+        _varint(geom_type, feature)
+        _bytes_field(4, _packed(commands), feature)
+        _bytes_field(2, feature, features)
+
+    if not features:
+        return None
+
+    layer = bytearray()
+    _field(15, _VARINT, layer)
+    _varint(2, layer)
+    _bytes_field(1, name.encode("utf-8"), layer)
+    layer += features
+    for k in keys:
+        _bytes_field(3, k.encode("utf-8"), layer)
+    for v in values:
+        _bytes_field(4, v, layer)
+    _field(5, _VARINT, layer)
+    _varint(EXTENT, layer)
+    return layer
+
+
+def render_tile(keys, z, x, y, fields=None):
+    """
+    Encode one MVT tile with a tile layer per DATA key.
+
+    Args:
+        keys (list): Layer keys in DATA (each becomes an MVT layer)
+        z, x, y (int): Tile address
+        fields (tuple, optional): Properties to keep (default: all)
+
+    Returns:
+        bytes: Tile (empty when no feature falls in it)
+    """
+    tile = bytearray()
+    for key in keys:
+        if DATA.get(key) is None:
+            continue
+        layer = _encode_layer(key, get_layer_index(key), z, x, y, fields)
+        if layer is not None:
+            _bytes_field(3, layer, tile)
+    return bytes(tile)
+
+
+# ---------- Caches ----------
+
+class TileStore:
+    """
+    Encoded tiles on disk, under <root>/<name>/<stamp>/<z>/<x>/<y>.pbf.
+
+    The stamp is derived from the source files' signatures, so tiles of
+    changed data are never served; directories of old stamps can be
+    removed at any time.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name, stamp, z, x, y):
+        return os.path.join(self.root, name, stamp, str(z), str(x), f"{y}.pbf")
+
+    def get(self, name, stamp, z, x, y):
+        try:
+            with open(self._path(name, stamp, z, x, y), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, name, stamp, z, x, y, body):
+        path = self._path(name, stamp, z, x, y)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] Could not store tile {name}/{z}/{x}/{y}: {e}")
+
+
+tile_cache = ResponseCache(max_entries=config.TILE_CACHE_MAX_ENTRIES)
+DATA.track_cache(tile_cache)
+tile_store = TileStore(config.TILE_CACHE_DIR) if config.TILE_CACHE_DIR else None
+
+
+def _source_stamp(keys):
+    """Digest of the source file signatures the loaded layers were read from."""
+    base = current_app.config["DATA_PROCESSED_DIR"]
+    signatures = [
+        DATA.derived(key, "source_signature", lambda layer, key=key: source_signatures(base).get(key))
+        for key in keys
+    ]
+    return hashlib.sha1(repr(signatures).encode("utf-8")).hexdigest()[:16]
+
+
+def tile_response(name, keys, z, x, y, fields=None):
+    """
+    Serve a vector tile from the caches, rendering it on a miss.
+
+    Args:
+        name (str): Tile layer name used in cache keys (e.g. "districts")
+        keys (list): Layer keys in DATA drawn into the tile
+        z, x, y (int): Tile address
+        fields (tuple, optional): Properties to keep (default: all)
+
+    Returns:
+        Response: MVT body with ETag, gzip/brotli negotiation and 304s
+    """
+    suffix = cache_suffix(fields)
+
+    def build():
+        if tile_store is None:
+            return render_tile(keys, z, x, y, fields)
+
+        # Field sets get their own directory next to the full tiles
+        store_name = name if fields is None else f"{name}.{hashlib.sha1(suffix.encode('utf-8')).hexdigest()[:8]}"
+        stamp = _source_stamp(keys)
+        body = tile_store.get(store_name, stamp, z, x, y)
+        if body is None:
+            body = render_tile(keys, z, x, y, fields)
+            tile_store.put(store_name, stamp, z, x, y, body)
+        return body
+
+    version = tuple(DATA.version(key) for key in keys)
+    payload = tile_cache.payload(f"{name}{suffix}/{z}/{x}/{y}", version, build, encode=bytes)
+    return payload_response(payload, MVT_MIMETYPE)
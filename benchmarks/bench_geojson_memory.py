@@ -0,0 +1,79 @@
+"""
+GeoJSON Loading Memory Benchmark
+================================
+Compares peak memory and time of the two parsing paths in data_loader
+(json.load vs. the feature-by-feature streaming parser) on one layer,
+by default the village layer.
+
+Usage:
+    python benchmarks/bench_geojson_memory.py [path/to/layer.geojson]
+
+Each path runs in a fresh subprocess so the measurements do not share
+allocator state.
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import config
+from backend.core.geojson_stream import load_geojson_streaming
+
+
+def _measure(mode, path):
+    """Parse path with one loader and return (seconds, retained bytes, peak bytes)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    if mode == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = load_geojson_streaming(path)
+
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert data["features"] is not None
+    return elapsed, current, peak
+
+
+def _run_child(mode, path):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode, path],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        print(json.dumps(_measure(sys.argv[2], sys.argv[3])))
+        return
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        config.DATA_PROCESSED_DIR, "kerala_village_fixed.geojson"
+    )
+    if not os.path.exists(path):
+        sys.exit(f"Layer not found: {path}")
+
+    size = os.path.getsize(path)
+    print(f"File: {path} ({size / 1_048_576:.1f} MB)")
+    print(f"{'loader':<10} {'time (s)':>10} {'retained MB':>12} {'peak MB':>10} {'peak / file':>12}")
+
+    for mode in ("json", "streaming"):
+        elapsed, current, peak = _run_child(mode, path)
+        print(
+            f"{mode:<10} {elapsed:>10.2f} {current / 1_048_576:>12.1f} "
+            f"{peak / 1_048_576:>10.1f} {peak / size:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
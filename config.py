@@ -67,6 +67,14 @@ API_RATE_LIMIT = os.getenv('API_RATE_LIMIT', '100 per hour')
 CACHE_TYPE = os.getenv('CACHE_TYPE', 'simple')  # simple, redis, memcached
 CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 300))  # 5 minutes
 
+# Pre-serialized, pre-compressed layer responses kept in memory per worker
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 64))
+
+# Encoded vector tiles kept in memory per worker, and a directory where they
+# are also stored so they survive restarts ('' keeps tiles in memory only)
+TILE_CACHE_MAX_ENTRIES = int(os.getenv('TILE_CACHE_MAX_ENTRIES', 4096))
+TILE_CACHE_DIR = os.getenv('TILE_CACHE_DIR', '')
+
 # Redis configuration (if using Redis cache)
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
@@ -87,7 +95,34 @@ WEATHER_UPDATE_INTERVAL = int(os.getenv('WEATHER_UPDATE_INTERVAL', 600))  # 10 m
 MAX_ROUTE_DISTANCE = int(os.getenv('MAX_ROUTE_DISTANCE', 100000))  # 100km
 
 # Routing algorithm preference
-ROUTING_ALGORITHM = os.getenv('ROUTING_ALGORITHM', 'dijkstra')  # dijkstra, astar
+# ('alt' is A* with landmark bounds; 'ch' preprocesses a contraction
+# hierarchy of the road graph at load time)
+ROUTING_ALGORITHM = os.getenv('ROUTING_ALGORITHM', 'dijkstra')  # dijkstra, astar, alt, ch
+
+# Landmarks whose road distances are precomputed for 'alt'
+ROUTING_LANDMARKS = int(os.getenv('ROUTING_LANDMARKS', 16))
+
+# Hazard layers whose zones close road edges for safe routing (comma separated)
+ROUTING_HAZARD_LAYERS = [k for k in os.getenv('ROUTING_HAZARD_LAYERS', 'landslides').split(',') if k]
+
+# Safety buffer around each hazard zone (in meters)
+ROUTING_HAZARD_BUFFER = int(os.getenv('ROUTING_HAZARD_BUFFER', 1000))
+
+# Alternative routes: most routes per request, largest shared length
+# fraction between two routes, and weight factor applied to used roads
+ROUTING_ALTERNATIVES_MAX = int(os.getenv('ROUTING_ALTERNATIVES_MAX', 5))
+ROUTING_ALTERNATIVE_OVERLAP = float(os.getenv('ROUTING_ALTERNATIVE_OVERLAP', 0.7))
+ROUTING_ALTERNATIVE_PENALTY = float(os.getenv('ROUTING_ALTERNATIVE_PENALTY', 1.5))
+
+# Distance matrices: worker processes for the searches, and most
+# source x target cells per request
+ROUTING_MATRIX_WORKERS = int(os.getenv('ROUTING_MATRIX_WORKERS', min(8, os.cpu_count() or 1)))
+ROUTING_MATRIX_MAX_CELLS = int(os.getenv('ROUTING_MATRIX_MAX_CELLS', 1000000))
+
+# Routes kept per worker, keyed by snapped endpoints (0 disables the cache),
+# and the distance along a road within which endpoints share cached routes
+ROUTE_CACHE_MAX_ENTRIES = int(os.getenv('ROUTE_CACHE_MAX_ENTRIES', 2048))
+ROUTE_CACHE_SNAP_METRES = float(os.getenv('ROUTE_CACHE_SNAP_METRES', 25))
 
 # =============================================================================
 # File Upload Configuration
@@ -111,3 +146,48 @@ DATA_PROCESSED_DIR = os.path.join(BASE_DIR, "database", "processed")
 # (Optional) static data served to frontend
 STATIC_DATA_DIR = os.path.join(BASE_DIR, "frontend", "static", "data")
 
+
+# =============================================================================
+# Data Loading Configuration
+# =============================================================================
+# Number of workers used to parse the GeoJSON layers at startup (1 = sequential)
+DATA_LOADER_WORKERS = int(os.getenv('DATA_LOADER_WORKERS', min(8, os.cpu_count() or 1)))
+
+# Pool type for the loader: 'thread' (default) overlaps file I/O and
+# snapshot reads without forking the server process; 'process' parses in
+# parallel but forks the server and pickles every parsed layer back, which
+# for the large layers costs about as much as the parse it saves
+DATA_LOADER_EXECUTOR = os.getenv('DATA_LOADER_EXECUTOR', 'thread')
+
+# Compiled columnar snapshots of the processed layers (rebuilt when a
+# source file's mtime or size changes)
+DATA_SNAPSHOTS_ENABLED = os.getenv('DATA_SNAPSHOTS_ENABLED', 'True') == 'True'
+DATA_SNAPSHOT_DIR = os.getenv('DATA_SNAPSHOT_DIR', os.path.join(DATA_PROCESSED_DIR, ".snapshots"))
+
+# Load layers on first access instead of all at startup
+DATA_LAZY_LOADING = os.getenv('DATA_LAZY_LOADING', 'True') == 'True'
+
+# Layers parsed at startup even when lazy loading is on (comma separated)
+DATA_PRELOAD_LAYERS = [k for k in os.getenv('DATA_PRELOAD_LAYERS', 'districts,hospitals,shelters,roads').split(',') if k]
+
+# Budget per worker for resident layers, the structures derived from them
+# (indexes, road graph, ...) and the response caches; cold layers are
+# evicted above it, roads and hazard layers excepted (0 = unlimited)
+DATA_MEMORY_BUDGET_MB = int(os.getenv('DATA_MEMORY_BUDGET_MB', 1024))
+
+# Reload changed or added files under DATA_PROCESSED_DIR in the background
+DATA_HOT_RELOAD = os.getenv('DATA_HOT_RELOAD', 'True') == 'True'
+DATA_RELOAD_INTERVAL = float(os.getenv('DATA_RELOAD_INTERVAL', 5))  # seconds
+
+# GeoJSON files at least this large are parsed feature by feature instead
+# of with one json.load (lower peak memory; 0 disables)
+DATA_STREAMING_THRESHOLD_MB = float(os.getenv('DATA_STREAMING_THRESHOLD_MB', 32))
+
+# =============================================================================
+# Facility Query Configuration
+# =============================================================================
+# Largest number of origins accepted by /api/shelters/nearest/batch
+NEAREST_BATCH_MAX_POINTS = int(os.getenv('NEAREST_BATCH_MAX_POINTS', 20000))
+
+# Largest k accepted by the nearest-facility endpoints
+NEAREST_MAX_K = int(os.getenv('NEAREST_MAX_K', 50))
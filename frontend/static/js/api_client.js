@@ -294,6 +294,11 @@ const API = {
         return fetch(`${this.BASE}/layers/boundaries`).then(r => r.json());
     },
 
+    // URL template of a vector tile layer, e.g. tileUrl("boundaries", "level=3")
+    tileUrl(layer, query = "") {
+        return `${this.BASE}/layers/tiles/${layer}/{z}/{x}/{y}.pbf` + (query ? `?${query}` : "");
+    },
+
     async getHealth() {
         return fetch(`/api/health`).then(r => r.json());
     }
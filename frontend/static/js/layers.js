@@ -376,10 +376,61 @@ function isValidGeoJSON(obj) {
          obj.type === "GeometryCollection");
 }
 
+/* ------------------------------
+    Vector tiles (Leaflet.VectorGrid); without the plugin
+    layers are downloaded whole as GeoJSON
+--------------------------------*/
+const USE_VECTOR_TILES = !!(L.vectorGrid && L.vectorGrid.protobuf);
+
+function vectorTileLayer(layer, styles, query = "") {
+    const tiles = L.vectorGrid.protobuf(API.tileUrl(layer, query), {
+        vectorTileLayerStyles: styles,
+        maxNativeZoom: 16,
+        interactive: true
+    });
+
+    // Tile features are not layers of their own: open the popup the
+    // GeoJSON layers bind per feature from the clicked feature instead
+    tiles.on("click", e => {
+        if (!e.layer || !e.layer.properties) return;
+        L.popup()
+            .setLatLng(e.latlng)
+            .setContent(propertiesPopup(e.layer.properties))
+            .openOn(map);
+    });
+    return tiles;
+}
+
+function escapeHTML(value) {
+    return String(value).replace(/[&<>"']/g, c => ({
+        "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"
+    })[c]);
+}
+
+function propertiesPopup(props) {
+    const rows = Object.entries(props)
+        .filter(([key, value]) => key !== "name" && value !== null && value !== "")
+        .map(([key, value]) => `<p><strong>${escapeHTML(key)}:</strong> ${escapeHTML(value)}</p>`)
+        .join("");
+    return `
+        <div class="popup-header">📍 ${escapeHTML(props.name || "Unnamed")}</div>
+        <div class="popup-content">${rows}</div>
+    `;
+}
+
 /* ------------------------------
     Load Hospitals
 --------------------------------*/
 async function loadHospitals() {
+    if (USE_VECTOR_TILES) {
+        LAYERS.hospitals = vectorTileLayer("hospitals", {
+            hospitals: { radius: 4, color: "green", fill: true }
+        });
+        if (document.getElementById("layer-hospitals").checked)
+            LAYERS.hospitals.addTo(map);
+        return;
+    }
+
     const response = await API.getHospitals();
     const data = response?.data;
 
@@ -397,6 +448,15 @@ async function loadHospitals() {
     Load Shelters
 --------------------------------*/
 async function loadShelters() {
+    if (USE_VECTOR_TILES) {
+        LAYERS.shelters = vectorTileLayer("shelters", {
+            shelters: { radius: 4, color: "blue", fill: true }
+        });
+        if (document.getElementById("layer-shelters").checked)
+            LAYERS.shelters.addTo(map);
+        return;
+    }
+
     const response = await API.getShelters();
     const data = response?.data;
 
@@ -431,13 +491,25 @@ async function loadRoads() {
     Load Boundaries
 --------------------------------*/
 async function loadBoundaries() {
+    if (USE_VECTOR_TILES) {
+        LAYERS.boundaries = vectorTileLayer("boundaries", {
+            districts: { color: "#444", weight: 1, fill: true, fillOpacity: 0.1 }
+        }, "level=2");
+        if (document.getElementById("layer-boundaries").checked)
+            LAYERS.boundaries.addTo(map);
+        return;
+    }
+
     const response = await API.getBoundaries();
     const data = response?.data;
 
     if (!isValidGeoJSON(data)) return console.error("Invalid Boundaries GeoJSON");
 
     LAYERS.boundaries = L.geoJSON(data, {
-        style: { color: "#444", weight: 1, fillOpacity: 0.1 }
+        style: { color: "#444", weight: 1, fillOpacity: 0.1 },
+        onEachFeature: (f, layer) => {
+            if (f.properties) layer.bindPopup(propertiesPopup(f.properties));
+        }
     });
 
     if (document.getElementById("layer-boundaries").checked)
@@ -448,6 +520,17 @@ async function loadBoundaries() {
     Load Cyclones (lines + points)
 --------------------------------*/
 async function loadCyclones() {
+    if (USE_VECTOR_TILES) {
+        // One tile layer draws both the tracks and the track points
+        LAYERS.cycloneLines = vectorTileLayer("cyclones", {
+            cyclone_lines: { color: "red", weight: 2 },
+            cyclone_points: { radius: 3, color: "orange", fill: true }
+        });
+        if (document.getElementById("layer-disaster-zones").checked)
+            LAYERS.cycloneLines.addTo(map);
+        return;
+    }
+
     const data = await API.getCyclones();
 
     if (data.lines && isValidGeoJSON(data.lines)) {
@@ -473,6 +556,16 @@ async function loadCyclones() {
     Load Landslides (multiple files)
 --------------------------------*/
 async function loadLandslides() {
+    if (USE_VECTOR_TILES) {
+        const layer = vectorTileLayer("landslides", {
+            landslides: { color: "#660000", weight: 2, fill: true }
+        });
+        LAYERS.landslides.push(layer);
+        if (document.getElementById("layer-disaster-zones").checked)
+            layer.addTo(map);
+        return;
+    }
+
     const list = await API.getLandslides();   // array of FeatureCollection objects
 
     if (!Array.isArray(list)) return console.error("Invalid Landslide Array");
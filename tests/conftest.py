@@ -6,3 +6,27 @@ def client():
     app = create_app()
     app.testing = True
     return app.test_client()
+
+
+@pytest.fixture
+def road_grid():
+    """
+    A 30 x 30 synthetic road grid in DATA (0.002 degree spacing from
+    lon 76.0, lat 10.0) with no hazard zones, and an empty route cache.
+
+    Returns:
+        callable: grid(i, j) -> [lon, lat] of row i, column j
+    """
+    from backend.core.data_loader import DATA
+    from backend.core.route_cache import ROUTE_CACHE
+
+    n = 30
+    grid = lambda i, j: [76.0 + j * 0.002, 10.0 + i * 0.002]
+    DATA.swap("roads", {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"highway": "primary" if h else "secondary"},
+         "geometry": {"type": "LineString", "coordinates": [grid(i, j) if h else grid(j, i) for j in range(n)]}}
+        for i in range(n) for h in (True, False)
+    ]})
+    DATA.swap("landslides", [])
+    ROUTE_CACHE.clear()
+    return grid
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def test_contraction_hierarchy_matches_dijkstra():
+    from backend.core.contraction import ContractionHierarchy
+    from backend.core.road_graph import RoadGraph
+
+    rng = np.random.default_rng(3)
+    points = rng.uniform([76.0, 10.0], [76.2, 10.2], size=(300, 2))
+    pairs = rng.integers(0, 300, size=(900, 2))
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"is_blocked": bool(i % 25 == 0)},
+         "geometry": {"type": "LineString", "coordinates": points[[a, b]].tolist()}}
+        for i, (a, b) in enumerate(pairs) if a != b
+    ]}
+    graph = RoadGraph.from_geojson(collection)
+    hierarchy = ContractionHierarchy(graph, leaf_size=8)
+
+    closed = graph.closed_edges()
+    hazard = (graph.edge_blocked | (rng.random(graph.num_edges) < 0.2)).tolist()
+    for blocked in (closed, hazard):
+        metric = hierarchy.metric(blocked)
+        for source, target in rng.integers(0, graph.num_nodes, size=(40, 2)).tolist():
+            expected = graph.shortest_path(source, target, blocked=blocked)
+            found = hierarchy.shortest_path(source, target, metric)
+            assert (found is None) == (expected is None)
+            if found:
+                cost, nodes, edges = found
+                assert np.isclose(cost, expected[0])
+                assert np.isclose(graph.edge_length[edges].sum(), cost)
+                assert nodes[0] == source and nodes[-1] == target
+                assert not any(blocked[e] for e in edges)
@@ -90,3 +90,102 @@ def test_layers_hospitals(client):
 def test_layers_shelters(client):
     res = client.get("/api/shelters/all")
     assert res.status_code == 200
+
+def test_layers_shelters_etag_revalidation(client):
+    res = client.get("/api/shelters/all", headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == 200
+    assert res.headers["Content-Encoding"] == "gzip"
+
+    etag = res.headers["ETag"]
+    again = client.get("/api/shelters/all", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+def test_layers_boundary_bbox(client):
+    res = client.get("/api/layers/boundaries?level=3&bbox=76.0,9.5,76.5,10.0")
+    assert res.status_code == 200
+    assert res.json["data"]["type"] == "FeatureCollection"
+
+    bad = client.get("/api/layers/boundaries?level=3&bbox=76.0,9.5")
+    assert bad.status_code == 400
+
+def test_layers_boundary_zoom(client):
+    res = client.get("/api/layers/boundaries?level=2&zoom=5")
+    assert res.status_code == 200
+    assert res.json["data"]["type"] == "FeatureCollection"
+
+def test_layers_vector_tile(client):
+    res = client.get("/api/layers/tiles/boundaries/7/91/59.pbf")
+    assert res.status_code == 200
+    assert res.mimetype == "application/vnd.mapbox-vector-tile"
+
+    assert client.get("/api/layers/tiles/roads/7/91/59.pbf").status_code == 404
+    assert client.get("/api/layers/tiles/shelters/1/2/0.pbf").status_code == 400
+
+def test_layers_boundary_topojson(client):
+    res = client.get("/api/layers/boundaries?level=2&format=topojson")
+    assert res.status_code == 200
+    assert res.json["data"]["type"] == "Topology"
+
+    assert client.get("/api/layers/boundaries?format=kml").status_code == 400
+
+def test_layers_boundary_topology_and_pyramid_are_lazy(client):
+    from backend.core.data_loader import DATA
+
+    square = lambda x: [[[x, 10.0], [x + 0.1, 10.0], [x + 0.1, 10.1], [x, 10.1], [x, 10.0]]]
+    DATA.swap("districts", {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"i": i}, "geometry": {"type": "Polygon", "coordinates": square(76 + i / 10)}}
+        for i in range(3)
+    ]})
+    built = lambda name: ("districts", name) in DATA._derived
+    assert built("index") and not built("topology") and not built("pyramid")
+
+    assert client.get("/api/layers/boundaries?level=2&format=topojson").status_code == 200
+    assert built("topology") and not built("pyramid")
+    assert client.get("/api/layers/boundaries?level=2&zoom=5").status_code == 200
+    assert built("pyramid")
+
+def test_layers_field_projection(client):
+    res = client.get("/api/shelters/all?fields=name")
+    assert res.status_code == 200
+    for feature in res.json["data"]["features"]:
+        assert set(feature["properties"]) <= {"name"}
+
+    res = client.get("/api/layers/boundaries?level=2&fields=")
+    assert res.status_code == 200
+    assert all(f["properties"] == {} for f in res.json["data"]["features"])
+
+def test_layers_boundary_ndjson_pages(client):
+    res = client.get("/api/layers/boundaries?level=4&format=ndjson&limit=5")
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    assert len(res.data.splitlines()) <= 5
+
+    page = client.get("/api/disaster/landslides?limit=5")
+    assert page.status_code == 200
+    assert "next_cursor" in page.json
+
+    assert client.get("/api/layers/boundaries?level=4&cursor=bogus").status_code == 400
+
+def test_nearest_batch(client):
+    points = [{"latitude": 9.93, "longitude": 76.27}, {"latitude": 11.25, "longitude": 75.78}]
+    res = client.post("/api/shelters/nearest/batch", json={"points": points, "k": 3})
+    assert res.status_code == 200
+
+    for layer in ("shelters", "hospitals"):
+        data = res.json["data"][layer]
+        assert len(data["nearest"]) == len(data["distance_km"]) == 2
+
+    bad = client.post("/api/shelters/nearest/batch", json={"points": points, "layers": ["roads"]})
+    assert bad.status_code == 400
+
+def test_facility_range_queries(client):
+    res = client.post("/api/shelters/hospitals/within_radius",
+                      json={"latitude": 9.93, "longitude": 76.27, "radius_km": 25})
+    assert res.status_code == 200
+    distances = [f["properties"]["distance_km"] for f in res.json["data"]["features"]]
+    assert distances == sorted(distances) and all(d <= 25 for d in distances)
+
+    polygon = {"type": "Polygon", "coordinates": [[[76.0, 9.5], [76.5, 9.5], [76.5, 10.0], [76.0, 10.0], [76.0, 9.5]]]}
+    res = client.post("/api/shelters/within_polygon", json={"polygon": polygon})
+    assert res.status_code == 200
+    assert res.json["count"] == len(res.json["data"]["features"])
@@ -0,0 +1,141 @@
+import json
+
+from backend.core import data_loader
+
+
+def _write_collection(path, n):
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"name": f"f{i}"},
+            "geometry": {"type": "Point", "coordinates": [76.0 + i * 0.01, 10.0]},
+        }
+        for i in range(n)
+    ]
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+
+
+def test_parallel_load_fills_same_keys(tmp_path):
+    _write_collection(tmp_path / "kerala_hospitals_fixed.geojson", 3)
+    _write_collection(tmp_path / "kerala_shelter_fixed.geojson", 2)
+    (tmp_path / "landslides_processed").mkdir()
+    _write_collection(tmp_path / "landslides_processed" / "a.geojson", 4)
+
+    sequential = data_loader.load_all(str(tmp_path), workers=1)
+    parallel = data_loader.load_all(str(tmp_path), workers=4, executor="thread")
+
+    assert sequential == parallel
+    assert len(parallel["hospitals"]["features"]) == 3
+    assert len(parallel["landslides"]) == 1
+    assert data_loader.LOAD_STATS["shelters"]["bytes"] > 0
+
+
+def test_snapshot_is_used_and_rebuilt_on_change(tmp_path):
+    src = tmp_path / "kerala_shelter_fixed.geojson"
+    snaps = str(tmp_path / ".snapshots")
+    _write_collection(src, 5)
+
+    first, _, _, origin = data_loader.load_geojson_timed(str(src), str(tmp_path), snaps)
+    assert origin == "json"
+
+    second, _, _, origin = data_loader.load_geojson_timed(str(src), str(tmp_path), snaps)
+    assert origin == "snapshot"
+    assert second == first
+
+    _write_collection(src, 7)
+    third, _, _, origin = data_loader.load_geojson_timed(str(src), str(tmp_path), snaps)
+    assert origin == "json"
+    assert len(third["features"]) == 7
+
+
+def test_registry_loads_lazily_and_evicts_under_budget():
+    from backend.core.layer_registry import LayerRegistry
+
+    calls = []
+
+    def loader(key):
+        def load():
+            calls.append(key)
+            return {"type": "FeatureCollection", "features": [{"type": "Feature"}] * 1000}
+        return load
+
+    registry = LayerRegistry()
+    registry.register("a", loader("a"))
+    registry.register("b", loader("b"))
+    assert calls == []
+
+    registry.get("a")
+    registry.get("a")
+    assert calls == ["a"]
+
+    registry.memory_budget = registry.resident_bytes() + 1
+    registry.get("b")
+    assert not registry.is_resident("a")
+    assert list(registry.resident()["resident"]) == ["b"]
+    assert registry.get("missing") is None
+
+
+def test_budget_counts_derived_structures_and_caches():
+    from backend.core.layer_registry import LayerRegistry
+    from backend.services.response_cache import ResponseCache
+
+    class Derived:
+        nbytes = 10_000_000
+
+    layer = lambda: {"type": "FeatureCollection", "features": [{"type": "Feature"}] * 10}
+    registry = LayerRegistry()
+    registry.register("roads", layer, pinned=True)
+    registry.register("a", layer)
+    registry.register("b", layer)
+    cache = ResponseCache()
+    registry.track_cache(cache)
+
+    registry.get("a")
+    registry.derived("roads", "graph", lambda value: Derived())
+    registry.memory_budget = registry.resident_bytes() + 1000
+    assert registry.resident()["resident"]["roads"]["derived_bytes"] == Derived.nbytes
+
+    # a's derived structure pushes it over the budget, but roads is pinned
+    registry.derived("a", "index", lambda value: Derived())
+    registry.get("b")
+    assert registry.is_resident("roads") and registry.is_resident("b")
+    assert not registry.is_resident("a")
+
+    # Cache entries go once only pinned layers are left to evict
+    cache.payload("x", 1, lambda: list(range(300_000)))
+    assert registry.resident_bytes() <= registry.memory_budget
+    assert cache.stats()["entries"] == 0 and registry.is_resident("roads")
+
+
+def test_watcher_swaps_changed_layer(tmp_path):
+    from backend.core.data_watcher import DataWatcher
+    from backend.core.layer_registry import LayerRegistry
+
+    base = str(tmp_path)
+    src = tmp_path / "kerala_shelter_fixed.geojson"
+    _write_collection(src, 2)
+
+    registry = LayerRegistry()
+    registry.register("shelters", lambda: data_loader.load_all(base, keys=["shelters"])["shelters"])
+    watcher = DataWatcher(registry, lambda: data_loader.source_signatures(base))
+
+    view = registry.snapshot()
+    old = view["shelters"]
+
+    _write_collection(src, 6)
+    assert watcher.poll() == []            # first sighting: wait for the file to settle
+    assert watcher.poll() == ["shelters"]
+
+    assert len(registry["shelters"]["features"]) == 6
+    assert view["shelters"] is old         # an in-flight view keeps its version
+    assert registry.version("shelters") == view.version("shelters") + 1
+
+
+def test_streaming_parser_matches_json_load(tmp_path):
+    from backend.core.geojson_stream import load_geojson_streaming
+
+    src = tmp_path / "kerala_village_fixed.geojson"
+    _write_collection(src, 50)
+
+    # A tiny chunk size forces values to straddle refills
+    assert load_geojson_streaming(str(src), chunk_size=7) == json.loads(src.read_text())
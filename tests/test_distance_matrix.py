@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def test_distance_matrix_matches_searches():
+    from backend.core.distance_matrix import MatrixEngine
+    from backend.core.road_graph import RoadGraph
+
+    rng = np.random.default_rng(5)
+    points = rng.uniform([76.0, 10.0], [76.2, 10.2], size=(200, 2))
+    pairs = rng.integers(0, 200, size=(400, 2))
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"is_blocked": bool(i % 20 == 0)},
+         "geometry": {"type": "LineString", "coordinates": points[[a, b]].tolist()}}
+        for i, (a, b) in enumerate(pairs) if a != b
+    ]}
+    graph = RoadGraph.from_geojson(collection)
+    blocked = (graph.edge_blocked | (rng.random(graph.num_edges) < 0.2)).tolist()
+
+    # Repeated points, a pair on one edge, and more sources than targets
+    # (searched transposed)
+    coords = rng.uniform([76.0, 10.0], [76.2, 10.2], size=(12, 2))
+    coords[3] = coords[0]
+    sources = graph.snap_many(coords[:, 0], coords[:, 1])
+    assert [s.edge for s in sources] == [graph.snap(*c).edge for c in coords.tolist()]
+    edge_point = graph.node_lonlat[[sources[1].u, sources[1].v]].mean(axis=0)
+    for coords in (rng.uniform([76.0, 10.0], [76.2, 10.2], size=(30, 2)), np.vstack([coords[:3], edge_point])):
+        targets = graph.snap_many(coords[:, 0], coords[:, 1])
+        matrix = MatrixEngine(workers=1).distances(graph, sources, targets, blocked=blocked)
+        assert matrix.shape == (len(sources), len(targets))
+        for i, source in enumerate(sources):
+            expected = [
+                (found[0] if found else np.inf)
+                for found in (graph.snapped_path(source, t, blocked=blocked) for t in targets)
+            ]
+            assert np.allclose(matrix[i], expected, rtol=1e-6)
+
+
+def test_process_pool_reads_the_graph_from_shared_memory():
+    from backend.core.distance_matrix import MatrixEngine
+    from backend.core.road_graph import RoadGraph
+
+    grid = lambda i, j: [76.0 + j * 0.002, 10.0 + i * 0.002]
+    graph = RoadGraph.from_geojson({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {},
+         "geometry": {"type": "LineString", "coordinates": [grid(i, j) if h else grid(j, i) for j in range(20)]}}
+        for i in range(20) for h in (True, False)
+    ]})
+    coords = np.random.default_rng(2).uniform([76.0, 10.0], [76.038, 10.038], size=(40, 2))
+    snaps = graph.snap_many(coords[:, 0], coords[:, 1])
+    blocked = (np.arange(graph.num_edges) % 7 == 0).tolist()
+
+    engine, serial = MatrixEngine(workers=2), MatrixEngine(workers=1)
+    try:
+        first = engine._prepare(graph, None)
+        engine._done(first)
+        for mask in (None, blocked):
+            expected = serial.distances(graph, snaps, snaps[:20], blocked=mask)
+            assert np.allclose(engine.distances(graph, snaps, snaps[:20], blocked=mask), expected)
+        # The graph of the previous mask was released, not re-forked
+        assert first.retired and not first._blocks
+    finally:
+        engine.shutdown()
@@ -0,0 +1,22 @@
+import numpy as np
+
+
+def test_facility_index_matches_haversine():
+    from backend.core.facility_index import FacilityIndex
+
+    rng = np.random.default_rng(7)
+    lon, lat = rng.uniform(74.8, 77.5, 300), rng.uniform(8.2, 12.8, 300)
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"i": i}, "geometry": {"type": "Point", "coordinates": [x, y]}}
+        for i, (x, y) in enumerate(zip(lon, lat))
+    ]}
+
+    def haversine(lon2, lat2, lon1=76.27, lat1=9.93):
+        p1, p2 = np.radians(lat1), np.radians(lat2)
+        a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+        return 2 * 6371.0088 * np.arcsin(np.sqrt(a))
+
+    expected = np.sort(haversine(lon, lat))[:5]
+    nearest = FacilityIndex(collection).nearest(9.93, 76.27, k=5)
+
+    assert np.allclose([d for _, d in nearest], expected)
@@ -0,0 +1,22 @@
+def test_hazard_overlay_updates_only_changed_zones(monkeypatch):
+    from backend.core import hazard_overlay, layer_index
+    from backend.core.layer_registry import LayerRegistry
+    from backend.core.road_graph import RoadGraph
+
+    registry = LayerRegistry()
+    monkeypatch.setattr(hazard_overlay, "DATA", registry)
+    monkeypatch.setattr(layer_index, "DATA", registry)
+
+    road = {"type": "Feature", "properties": {},
+            "geometry": {"type": "LineString", "coordinates": [[76.0 + i * 0.01, 10.0] for i in range(11)]}}
+    graph = RoadGraph.from_geojson({"type": "FeatureCollection", "features": [road]})
+    zone = lambda x: {"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [x, 10.0]}}
+
+    overlay = hazard_overlay.HazardOverlay(["landslides"], buffer_distance=100)
+    registry.put("landslides", [{"type": "FeatureCollection", "features": [zone(76.015)]}])
+    assert sum(overlay.blocked(graph)) == 1
+    assert overlay.blocked(graph) is overlay.blocked(graph)
+
+    registry.swap("landslides", [{"type": "FeatureCollection", "features": [zone(76.015), zone(76.075)]}])
+    assert sum(overlay.blocked(graph)) == 2
+    assert overlay.changed_edges.tolist() == [7]
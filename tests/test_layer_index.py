@@ -0,0 +1,11 @@
+def test_layer_index_bbox_query():
+    from backend.core.layer_index import LayerIndex
+
+    square = lambda x: {"type": "Polygon", "coordinates": [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]]}
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"i": i}, "geometry": square(i * 2)} for i in range(5)
+    ]}
+
+    index = LayerIndex(collection)
+    hits = index.features_in_bbox(1.5, 0.5, 4.5, 0.6)
+    assert [f["properties"]["i"] for f in hits] == [1, 2]
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+def test_road_graph_merges_junctions_and_routes_around_blocks():
+    from backend.core.road_graph import RoadGraph
+
+    line = lambda coords, **props: {"type": "Feature", "properties": props,
+                                    "geometry": {"type": "LineString", "coordinates": coords}}
+    # A square 0-1-2-3 with a direct (blocked) diagonal 0-2
+    collection = {"type": "FeatureCollection", "features": [
+        line([[76.0, 10.0], [76.01, 10.0], [76.01, 10.01]], highway="primary"),
+        line([[76.01, 10.01], [76.0, 10.01], [76.0, 10.0]], highway="residential"),
+        line([[76.0, 10.0], [76.01, 10.01]], highway="track", is_blocked=True),
+    ]}
+
+    graph = RoadGraph.from_geojson(collection)
+    assert (graph.num_nodes, graph.num_edges) == (4, 5)
+    assert graph.indptr[-1] == 2 * graph.num_edges
+
+    source, target = graph.nearest_node(76.0, 10.0), graph.nearest_node(76.01, 10.01)
+    cost, nodes, edges = graph.shortest_path(source, target)
+    assert len(edges) == 1
+
+    cost_around, nodes, edges = graph.shortest_path(source, target, blocked=graph.edge_blocked)
+    assert len(edges) == 2 and cost_around > cost
+    assert nodes[0] == source and nodes[-1] == target
+
+
+def test_astar_and_alt_are_exact_and_search_less():
+    from backend.core.road_graph import RoadGraph
+
+    n = 30
+    grid = lambda i, j: [76.0 + j * 0.002, 10.0 + i * 0.002]
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {},
+         "geometry": {"type": "LineString", "coordinates": [grid(i, j) if h else grid(j, i) for j in range(n)]}}
+        for i in range(n) for h in (True, False)
+    ]}
+    graph = RoadGraph.from_geojson(collection)
+    source, target = graph.nearest_node(*grid(2, 3)), graph.nearest_node(*grid(25, 20))
+
+    searched = {}
+    for name, heuristic in (("dijkstra", None), ("astar", graph.heuristic(target)),
+                            ("alt", graph.heuristic(target, landmarks=4))):
+        stats = {}
+        cost, _, _ = graph.shortest_path(source, target, heuristic=heuristic, stats=stats)
+        searched[name] = (round(cost, 6), stats["settled_nodes"])
+
+    assert searched["dijkstra"][0] == searched["astar"][0] == searched["alt"][0]
+    assert searched["alt"][1] <= searched["astar"][1] < searched["dijkstra"][1]
+
+    # Landmark rows are converted once, not per query
+    rows = graph._landmarks[2]
+    graph.heuristic(source, landmarks=4)
+    assert graph._landmarks[2] is rows
+
+
+def test_alt_landmarks_are_computed_with_the_graph(monkeypatch):
+    import config
+    from backend.core import road_graph
+
+    line = {"type": "Feature", "properties": {},
+            "geometry": {"type": "LineString", "coordinates": [[76.0, 10.0], [76.01, 10.0], [76.02, 10.0]]}}
+    collection = {"type": "FeatureCollection", "features": [line]}
+    assert road_graph._compile(collection)._landmarks is None
+
+    monkeypatch.setattr(config, "ROUTING_ALGORITHM", "alt")
+    monkeypatch.setattr(config, "ROUTING_LANDMARKS", 2)
+    graph = road_graph._compile(collection)
+    assert len(graph.landmarks(2)[0]) == 2 and graph.nbytes > graph.node_lonlat.nbytes
+
+
+def test_landmarks_are_cached_when_the_main_component_is_small():
+    from backend.core.road_graph import RoadGraph
+
+    line = lambda coords: {"type": "Feature", "properties": {}, "geometry": {"type": "LineString", "coordinates": coords}}
+    graph = RoadGraph.from_geojson({"type": "FeatureCollection", "features": [
+        line([[76.0, 10.0], [76.01, 10.0], [76.02, 10.0]]),
+        line([[77.0, 10.0], [77.01, 10.0]]),
+    ]})
+
+    ids, distances = graph.landmarks(16)
+    assert len(ids) == 3
+    assert graph.landmarks(16)[1] is distances
+
+
+def test_search_tree_serves_every_target_from_one_search():
+    from backend.core.road_graph import RoadGraph
+
+    line = lambda coords: {"type": "Feature", "properties": {"highway": "primary"},
+                           "geometry": {"type": "LineString", "coordinates": coords}}
+    collection = {"type": "FeatureCollection", "features": [
+        line([[76.0, 10.0], [76.01, 10.0], [76.02, 10.0]]),
+        line([[76.01, 10.0], [76.01, 10.01]]),
+    ]}
+    graph = RoadGraph.from_geojson(collection)
+    source = graph.nearest_node(76.0, 10.0)
+
+    tree = graph.search(source)
+    assert tree.stats["settled_nodes"] == graph.num_nodes
+    for target in range(graph.num_nodes):
+        nodes, edges = tree.path_to(target)
+        assert (tree.cost(target), nodes, edges) == graph.shortest_path(source, target)
+        if edges:
+            segments = graph.segments(nodes, edges)
+            assert np.isclose(segments["cumulative"][-1], tree.cost(target))
+            assert set(segments["road_type"]) == {"primary"}
@@ -0,0 +1,21 @@
+def test_route_cache_hits_and_invalidates_on_new_stamp():
+    from backend.core.route_cache import RouteCache
+
+    cache = RouteCache(max_entries=2)
+    calls = []
+    compute = lambda: calls.append(1) or ([1, 2], [5], "dijkstra", {})
+
+    first = cache.route("dijkstra", (1, 0), 3, 7, compute)
+    again = cache.route("dijkstra", (1, 0), 3, 7, compute)
+    assert len(calls) == 1 and again is first
+
+    # Hazards changed: recomputed, and a late request on the old stamp is not cached
+    cache.route("dijkstra", (1, 1), 3, 7, compute)
+    cache.route("dijkstra", (1, 0), 3, 7, compute)
+    cache.route("dijkstra", (1, 1), 3, 7, compute)
+    assert len(calls) == 3
+
+    cache.route("dijkstra", (1, 1), 4, 7, compute)
+    cache.route("dijkstra", (1, 1), 5, 7, compute)
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["hits"] == 2 and stats["invalidations"] == 1
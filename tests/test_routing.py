@@ -0,0 +1,74 @@
+import numpy as np
+
+
+def test_alternative_routes_are_diverse_and_bounded():
+    from backend.core.road_graph import RoadGraph
+    from backend.core.route_optimizer import find_alternative_routes
+
+    line = lambda coords: {"type": "Feature", "properties": {},
+                           "geometry": {"type": "LineString", "coordinates": coords}}
+    # Two disjoint corridors between the same endpoints, plus a long detour
+    collection = {"type": "FeatureCollection", "features": [
+        line([[76.0, 10.0], [76.05, 10.0], [76.1, 10.0]]),
+        line([[76.0, 10.0], [76.05, 10.01], [76.1, 10.0]]),
+        line([[76.0, 10.0], [76.05, 10.3], [76.1, 10.0]]),
+    ]}
+    graph = RoadGraph.from_geojson(collection)
+
+    routes = find_alternative_routes(graph, (76.0, 10.0), (76.1, 10.0), num_routes=3, max_iterations=6)
+    assert [r["route_number"] for r in routes] == [1, 2]
+    assert all(r["overlap"] == 0 for r in routes)
+    assert routes[0]["total_distance_meters"] <= routes[1]["total_distance_meters"]
+
+
+def test_routes_start_and_end_on_the_snapped_edge():
+    from backend.core.contraction import ContractionHierarchy
+    from backend.core.road_graph import RoadGraph
+    from backend.core.route_optimizer import compute_shortest_path
+
+    line = lambda coords: {"type": "Feature", "properties": {},
+                           "geometry": {"type": "LineString", "coordinates": coords}}
+    # One long road east, a side road north from its end
+    graph = RoadGraph.from_geojson({"type": "FeatureCollection", "features": [
+        line([[76.0, 10.0], [76.1, 10.0], [76.1, 10.1]]),
+    ]})
+    east, north = graph.edge_length.tolist()
+
+    snap = graph.snap(76.03, 10.001)
+    assert snap.edge == 0 and abs(snap.fraction - 0.3) < 1e-6
+    assert snap.lonlat == (76.03, 10.0) and 100 < snap.distance_m < 120
+
+    hierarchy = ContractionHierarchy(graph, leaf_size=2)
+    for algorithm in ("dijkstra", "astar", "alt", "ch"):
+        along = compute_shortest_path(graph, (76.03, 10.001), (76.07, 9.999), algorithm, hierarchy=hierarchy)
+        assert along["path"] == [(76.03, 10.0), (76.07, 10.0)]
+        assert np.isclose(along["total_distance_meters"], 0.4 * east, atol=0.01)
+
+        turn = compute_shortest_path(graph, (76.03, 10.001), (76.101, 10.05), algorithm, hierarchy=hierarchy)
+        assert turn["path"] == [(76.03, 10.0), (76.1, 10.0), (76.1, 10.05)]
+        assert np.isclose(turn["total_distance_meters"], 0.7 * east + 0.5 * north, atol=0.01)
+
+
+def test_safety_scorer_batches_routes_in_metres():
+    import geopandas as gpd
+    from shapely.geometry import LineString, Point
+
+    from backend.core.route_optimizer import calculate_route_safety_score
+    from backend.core.route_safety import SafetyScorer
+
+    zones = [Point(76.0, 10.0).buffer(0.001), Point(76.5, 10.0).buffer(0.001)]
+    scorer = SafetyScorer(zones)
+    # 0.01 degree of latitude is ~1.1 km; the zones have a ~110 m radius
+    near = [(75.99, 10.01), (76.01, 10.01)]
+    far = [(76.25, 10.1), (76.25, 10.2), (76.25, 10.3)]
+    through = [(75.99, 10.0), (76.01, 10.0)]
+    scores = scorer.score_routes([near, far, through, [(76.5, 10.02)]])
+
+    assert abs(scores[0]["min_distance_m"] - (1105.8 - 110.6)) < 15
+    assert scores[1]["safety_score"] > scores[0]["safety_score"] > scores[2]["safety_score"] == 0
+    assert len(scores[1]["segments"]) == 2 and len(scores[3]["segments"]) == 1
+    assert scores[1]["segments"][0]["distance_m"] < scores[1]["segments"][1]["distance_m"]
+    assert SafetyScorer([]).score_routes([near])[0]["safety_score"] == 100
+
+    gdf = gpd.GeoDataFrame(geometry=zones, crs="EPSG:4326")
+    assert calculate_route_safety_score(LineString(near), gdf) == scores[0]["safety_score"]
@@ -37,6 +37,10 @@
 #     # If route has geometry
 #     if "geometry" in data:
 #         assert data["geometry"] is not None
+
+import pytest
+
+
 def test_route_api_responds(client):
     sample_payload = {
         "start": {"lat": 10.0, "lng": 76.0},
@@ -47,3 +51,102 @@ def test_route_api_responds(client):
     res = client.post("/api/routes/calculate", json=sample_payload)
     assert res.status_code == 200
     assert isinstance(res.json, dict)
+
+
+def test_safe_route_cache_follows_hazard_changes(client, road_grid, monkeypatch):
+    from backend.core.data_loader import DATA
+    from backend.core.route_cache import ROUTE_CACHE
+
+    body = {"start": {"lon": 76.0, "lat": 10.0}, "end": {"lon": 76.04, "lat": 10.04}}
+    hits = ROUTE_CACHE.stats()["hits"]
+    first = client.post("/api/routes/safe-route", json=body)
+    assert first.status_code == 200
+    assert client.post("/api/routes/safe-route", json=body).json["data"] == first.json["data"]
+    assert ROUTE_CACHE.stats()["hits"] == hits + 1
+
+    # A landslide on the route, swapped in without the load hooks (as when
+    # the roads were not loaded yet): the next request must see it
+    lon, lat = first.json["data"]["path"][len(first.json["data"]["path"]) // 2]
+    zone = {"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [lon, lat]}}
+    monkeypatch.setattr(DATA, "_load_hooks", [])
+    DATA.swap("landslides", [{"type": "FeatureCollection", "features": [zone]}])
+
+    detour = client.post("/api/routes/safe-route", json=body)
+    assert detour.status_code == 200
+    assert ROUTE_CACHE.stats()["hits"] == hits + 1
+    assert [lon, lat] not in [list(p) for p in detour.json["data"]["path"]]
+
+
+def test_safe_route_starts_on_the_snapped_road(client, road_grid):
+    body = {"start": {"lon": 76.0005, "lat": 10.0001}, "end": road_grid(5, 5)}
+    body["end"] = {"lon": body["end"][0], "lat": body["end"][1]}
+
+    res = client.post("/api/routes/safe-route", json=body)
+    assert res.status_code == 200
+    route = res.json["data"]
+    assert route["path"][0] == [76.0005, 10.0]
+    assert route["path"][-1] == road_grid(5, 5)
+    assert route["total_distance_meters"] == round(sum(s["length"] for s in route["path_details"]), 2)
+
+    missing = client.post("/api/routes/safe-route", json={"start": body["start"]})
+    assert missing.status_code == 400
+
+
+def test_route_cache_endpoint_counts_hits(client, road_grid):
+    body = {"start": {"lon": 76.0005, "lat": 10.0001}, "end": {"lon": 76.01, "lat": 10.01}}
+    before = client.get("/api/routes/cache").json["data"]
+    first = client.post("/api/routes/safe-route", json=body).json["data"]
+
+    # A start a few metres along the same road shares the cached search,
+    # but the route starts at its own point
+    nearby = dict(body, start={"lon": 76.0006, "lat": 10.0001})
+    second = client.post("/api/routes/safe-route", json=nearby).json["data"]
+    assert second["path"][0] == [76.0006, 10.0] and second["path"][1:] == first["path"][1:]
+    expected = first["total_distance_meters"] - first["path_details"][0]["length"] + second["path_details"][0]["length"]
+    assert second["total_distance_meters"] == pytest.approx(expected, abs=0.02)
+    assert second["total_distance_meters"] < first["total_distance_meters"]
+
+    stats = client.get("/api/routes/cache").json["data"]
+    assert stats["entries"] == 1
+    assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (1, 1)
+
+
+def test_alternative_routes_are_ranked_and_scored(client, road_grid):
+    body = {"start": {"lon": 76.0005, "lat": 10.0001}, "end": {"lon": 76.01, "lat": 10.01}, "num_routes": 3}
+
+    res = client.post("/api/routes/alternative-routes", json=body)
+    assert res.status_code == 200
+    routes = res.json["data"]
+    assert res.json["count"] == len(routes) >= 2
+    distances = [r["total_distance_meters"] for r in routes]
+    assert distances == sorted(distances)
+    assert all(r["safety_score"] == 100.0 and r["safety"]["min_distance_m"] is None for r in routes)
+
+    assert client.post("/api/routes/alternative-routes", json=dict(body, num_routes=0)).status_code == 400
+    assert client.post("/api/routes/alternative-routes", json=dict(body, rank_by="time")).status_code == 400
+
+
+def test_distance_matrix_agrees_with_safe_route(client, road_grid):
+    from backend.core.data_loader import DATA
+
+    DATA.swap("shelters", {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"name": "school"}, "geometry": {"type": "Point", "coordinates": road_grid(3, 7)}}
+    ]})
+    sources = [{"lon": 76.0005, "lat": 10.0001}, {"lon": 76.0131, "lat": 10.0052}]
+    targets = [{"lon": 76.01, "lat": 10.01}, {"lon": 76.0007, "lat": 10.0}]
+
+    res = client.post("/api/routes/matrix", json={"sources": sources, "targets": targets, "layers": ["shelters"]})
+    assert res.status_code == 200
+    data = res.json["data"]
+    assert data["columns"] == [{"layer": "points", "count": 2}, {"layer": "shelters", "count": 1}]
+    assert data["facilities"]["shelters"][0]["properties"] == {"name": "school"}
+
+    # Snapped like /safe-route, including two points on the same edge
+    shelter = {"lon": road_grid(3, 7)[0], "lat": road_grid(3, 7)[1]}
+    for i, start in enumerate(sources):
+        for j, end in enumerate([*targets, shelter]):
+            route = client.post("/api/routes/safe-route", json={"start": start, "end": end}).json["data"]
+            assert data["distance_km"][i][j] == round(route["total_distance_meters"] / 1000, 3)
+
+    assert client.post("/api/routes/matrix", json={"sources": []}).status_code == 400
+    assert client.post("/api/routes/matrix", json={"sources": sources, "layers": ["roads"]}).status_code == 400
@@ -0,0 +1,55 @@
+from backend.core.data_loader import DATA
+
+
+def _shelters():
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"name": f"S{i}"},
+         "geometry": {"type": "Point", "coordinates": [76.0 + i * 0.01, 10.0]}}
+        for i in range(3)
+    ]}
+
+
+def test_nearest_limit_is_bounded(client):
+    DATA.swap("shelters", _shelters())
+    point = {"latitude": 10.0, "longitude": 76.0}
+
+    res = client.post("/api/shelters/nearest", json={**point, "limit": 2})
+    assert res.status_code == 200
+    assert [f["properties"]["name"] for f in res.json["data"]["features"]] == ["S0", "S1"]
+
+    for limit in (0, -1, 10 ** 9, 2.5, "two", True):
+        res = client.post("/api/shelters/nearest", json={**point, "limit": limit})
+        assert res.status_code == 400, limit
+    assert client.post("/api/shelters/hospitals/nearest", json={**point, "limit": -3}).status_code == 400
+
+
+def test_nearest_rejects_non_finite_coordinates(client):
+    DATA.swap("shelters", _shelters())
+
+    for point in ({"latitude": float("nan"), "longitude": 76.0}, {"latitude": 10.0, "longitude": float("inf")}):
+        assert client.post("/api/shelters/nearest", json=point).status_code == 400
+
+
+def test_within_radius_rejects_non_finite_input(client):
+    DATA.swap("shelters", _shelters())
+    point = {"latitude": 10.0, "longitude": 76.0}
+
+    res = client.post("/api/shelters/within_radius", json={**point, "radius_km": 1.5})
+    assert res.status_code == 200 and res.json["count"] == 2
+
+    for body in ({**point, "latitude": float("nan"), "radius_km": 5}, {**point, "radius_km": float("inf")},
+                 {**point, "radius_km": float("nan")}, {**point, "radius_km": 0}):
+        assert client.post("/api/shelters/within_radius", json=body).status_code == 400, body
+
+
+def test_batch_k_is_validated_like_limit(client):
+    DATA.swap("shelters", _shelters())
+    body = {"points": [{"latitude": 10.0, "longitude": 76.0}], "layers": ["shelters"]}
+
+    res = client.post("/api/shelters/nearest/batch", json={**body, "k": 2})
+    assert res.status_code == 200
+    assert res.json["data"]["shelters"]["nearest"] == [[0, 1]]
+
+    for k in (0, 10 ** 9, 2.9, "two", True):
+        res = client.post("/api/shelters/nearest/batch", json={**body, "k": k})
+        assert res.status_code == 400, k
@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def test_simplification_pyramid_reduces_vertices():
+    from backend.core.simplification import SimplificationPyramid, band_for_zoom
+
+    # A finely sampled circle: ~1000 vertices, far more than any low zoom needs
+    angles = np.linspace(0, 2 * np.pi, 1000)
+    ring = np.column_stack([76 + 0.1 * np.cos(angles), 10 + 0.1 * np.sin(angles)]).tolist()
+    ring[-1] = ring[0]
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"name": "x"}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+    pyramid = SimplificationPyramid(collection)
+    coarse = pyramid.features_for(band_for_zoom(5))[0]
+    fine = pyramid.features_for(band_for_zoom(12))[0]
+
+    assert coarse["properties"] == {"name": "x"}
+    assert len(coarse["geometry"]["coordinates"][0]) < len(fine["geometry"]["coordinates"][0]) <= len(ring)
+    assert band_for_zoom(15) is None
+
+
+def test_simplification_keeps_shared_borders_identical():
+    from shapely.geometry import shape
+    from backend.core.simplification import SimplificationPyramid, ZOOM_BANDS
+
+    # Two neighbours split by a finely sampled wavy border
+    y = np.linspace(10.0, 10.2, 500)
+    border = np.column_stack([76.1 + 0.01 * np.sin(y * 300), y]).tolist()
+    west = [[76.0, 10.0], *border, [76.0, 10.2], [76.0, 10.0]]
+    east = [[76.2, 10.0], [76.2, 10.2], *border[::-1], [76.2, 10.0]]
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+        for ring in (west, east)
+    ]}
+
+    pyramid = SimplificationPyramid(collection)
+    for band in ZOOM_BANDS:
+        a, b = (shape(f["geometry"]) for f in pyramid.features_for(band))
+        assert a.is_valid and b.is_valid
+        assert a.intersection(b).area < 1e-12
+        union = a.union(b)
+        assert union.geom_type == "Polygon" and not union.interiors
@@ -0,0 +1,16 @@
+def test_topology_shares_borders():
+    from backend.core.topology import build_topology
+
+    square = lambda x: {"type": "Polygon", "coordinates": [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]]}
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"i": i}, "geometry": square(i)} for i in range(2)
+    ]}
+
+    topology = build_topology(collection, name="districts", quantization=10)
+    left, right = topology["objects"]["districts"]["geometries"]
+
+    # The common edge is one arc, walked backwards by the right square
+    shared = set(left["arcs"][0]) & {~a for a in right["arcs"][0]}
+    assert len(shared) == 1
+    assert len(topology["arcs"]) == 3
+    assert left["properties"] == {"i": 0}
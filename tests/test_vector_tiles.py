@@ -0,0 +1,10 @@
+def test_vector_tile_polygon_encoding():
+    from shapely.geometry import Polygon
+    from backend.services.vector_tiles import encode_geometry
+
+    # Counter-clockwise on screen: the encoder must reverse it
+    geom_type, commands = encode_geometry(Polygon([(0, 0), (0, 10), (10, 10), (10, 0)]))
+
+    assert geom_type == 3
+    # MoveTo(1) (0,0), LineTo(3) (10,0) (0,10) (-10,0), ClosePath
+    assert commands == [9, 0, 0, 26, 20, 0, 0, 20, 19, 0, 15]